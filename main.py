@@ -1,3 +1,6 @@
+from src.core import startup
+startup.track_imports()
+
 import dotenv
 dotenv.load_dotenv()
 
@@ -5,17 +8,46 @@ import fastapi
 import contextlib
 import asgi_correlation_id
 
-from src.core.logging import setup_logging
+from src.core.retry import RetryBudgetMiddleware
+from src.core.request_charge import RequestChargeMiddleware
+from src.core.metrics import MetricsMiddleware
+from src.core.profiling import ProfilerMiddleware
+from src.core.config import CONFIG
+from src.core.logging import setup_logging, start_telemetry, stop_telemetry
+from src.db import cosmos, change_feed
 from src.api.v1 import router as v1_api_router
+from src.service import http_handler, rescore_handler, subject_index_handler
 
 
 @contextlib.asynccontextmanager
 async def _lifespan(*args, **kwargs):
-    setup_logging()
+    with startup.step("logging"):
+        setup_logging()
+    await start_telemetry()
+    with startup.step("cosmos"):
+        cosmos.open_client()
+    with startup.step("http"):
+        await http_handler.open_session()
+    with startup.step("change_feed"):
+        await change_feed.start()
+    with startup.step("subject_index"):
+        await subject_index_handler.start()
+    startup.finish()
     yield
+    await subject_index_handler.stop()
+    await change_feed.stop()
+    await rescore_handler.shutdown()
+    await http_handler.close_session()
+    await cosmos.close_client()
+    await stop_telemetry()
 
 
 app = fastapi.FastAPI(lifespan=_lifespan)
+app.add_middleware(RetryBudgetMiddleware)
+app.add_middleware(RequestChargeMiddleware)
+app.add_middleware(MetricsMiddleware)
+if CONFIG.PROFILING_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
 app.add_middleware(asgi_correlation_id.CorrelationIdMiddleware, header_name="correlation-id", validator=None)
 
 app.include_router(v1_api_router)
@@ -0,0 +1,19 @@
+import typing
+import fastapi
+import pydantic_core
+
+
+class ModelResponse(fastapi.responses.Response):
+    """
+    JSON response of models already validated by the handlers (serialized once, directly to bytes by the pydantic
+    serializer - routes returning the response skip re-validation against the response model, which is kept for docs)
+    """
+    media_type = "application/json"
+
+    def render(self, content: typing.Any) -> bytes:
+        """
+        Serialize content (models, lists of models or plain JSON data)
+        :param content: Content to serialize
+        :return: Serialized content
+        """
+        return pydantic_core.to_json(content, by_alias=True)
@@ -1,11 +1,14 @@
 import typing
 import logging
 import fastapi
+import pydantic
+import pydantic_core
 import datetime as dt
 
+from src.api.response import ModelResponse
 from src.model.document import Document
 from src.model.sheet import Sheet, SheetCell
-from src.service import document_handler, score_handler
+from src.service import document_handler, rescore_handler
 
 
 logger = logging.getLogger(__name__)
@@ -14,19 +17,55 @@ router = fastapi.APIRouter(
     tags=["document"],
 )
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+RANGE_PATTERN = r"^-?\d*:-?\d*$"
+CELL_PATTERN = r"^\d+:\d+$"
+
+
+def _parse_range(value: str | None) -> slice:
+    """
+    Parse python-like range (i.e. "a:b", "a:", ":b" or "-1:")
+    :param value: Range string
+    :return: Slice
+    """
+    if not value:
+        return slice(None)
+
+    start, stop = value.split(":")
+
+    return slice(int(start) if start else None, int(stop) if stop else None)
+
+
+def _ndjson_response(items: typing.AsyncIterator[pydantic.BaseModel]) -> fastapi.responses.StreamingResponse:
+    """
+    Stream items as newline delimited JSON
+    :param items: Async iterator of items
+    :return: Streaming response
+    """
+    async def _lines() -> typing.AsyncIterator[bytes]:
+        async for item in items:
+            yield pydantic_core.to_json(item, by_alias=True) + b"\n"
+
+    return fastapi.responses.StreamingResponse(_lines(), media_type=NDJSON_MEDIA_TYPE)
+
 
 @router.get("")
 async def get_documents(
     subject_id: str,
+    accept: typing.Annotated[str | None, fastapi.Header()] = None,
     correlation_id: typing.Annotated[str | None, fastapi.Header()] = None,
 ) -> list[Document]:
     """
     Get documents for a subject
     :param subject_id: ID of the subject
+    :param accept: Accepted media type (application/x-ndjson for streamed response)
     :param correlation_id: Correlation ID for tracing
     :return: List of documents for the subject
     """
-    return await document_handler.get_documents(subject_id=subject_id)
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return _ndjson_response(document_handler.iter_documents(subject_id=subject_id))
+
+    return ModelResponse(await document_handler.get_documents(subject_id=subject_id))
 
 
 @router.get("/{document_id}")
@@ -42,23 +81,28 @@ async def get_document(
     :param correlation_id: Correlation ID for tracing
     :return: Document object or raise HTTPException if not found
     """
-    return await document_handler.get_document(subject_id=subject_id, document_id=document_id)
+    return ModelResponse(await document_handler.get_document(subject_id=subject_id, document_id=document_id))
 
 
 @router.get("/{document_id}/sheet")
 async def get_document_sheets(
     subject_id: str,
     document_id: str,
+    accept: typing.Annotated[str | None, fastapi.Header()] = None,
     correlation_id: typing.Annotated[str | None, fastapi.Header()] = None,
 ) -> list[Sheet]:
     """
     Get document sheets
     :param subject_id: ID of the subject
     :param document_id: ID of the document
+    :param accept: Accepted media type (application/x-ndjson for streamed response)
     :param correlation_id: Correlation ID for tracing
     :return: List of document sheets
     """
-    return await document_handler.get_document_sheets(subject_id=subject_id, document_id=document_id)
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return _ndjson_response(document_handler.iter_document_sheets(subject_id=subject_id, document_id=document_id))
+
+    return ModelResponse(await document_handler.get_document_sheets(subject_id=subject_id, document_id=document_id))
 
 
 @router.get("/{document_id}/sheet/{sheet_num}")
@@ -66,17 +110,66 @@ async def get_document_sheet(
     subject_id: str,
     document_id: str,
     sheet_num: int,
+    rows: typing.Annotated[str | None, fastapi.Query(pattern=RANGE_PATTERN)] = None,
+    cols: typing.Annotated[str | None, fastapi.Query(pattern=RANGE_PATTERN)] = None,
     correlation_id: typing.Annotated[str | None, fastapi.Header()] = None,
 ) -> Sheet:
     """
-    Get document sheet
+    Get document sheet (windowed if rows or cols range is provided, total row count and window offset
+    are in sheet-row-count and sheet-row-offset headers)
     :param subject_id: ID of the subject
     :param document_id: ID of the document
     :param sheet_num: Number of the sheet
+    :param rows: Row range (i.e. "0:10", "-1:", negative bounds count from the end)
+    :param cols: Column range applied to each row (i.e. "2:4")
     :param correlation_id: Correlation ID for tracing
     :return: Document sheet object or raise HTTPException if not found
     """
-    return await document_handler.get_document_sheet(subject_id=subject_id, document_id=document_id, sheet_num=sheet_num)
+    if rows is None and cols is None:
+        return ModelResponse(
+            await document_handler.get_document_sheet(subject_id=subject_id, document_id=document_id, sheet_num=sheet_num)
+        )
+
+    row_range = _parse_range(rows)
+    sheet, row_count = await document_handler.get_document_sheet_window(
+        subject_id=subject_id,
+        document_id=document_id,
+        sheet_num=sheet_num,
+        rows=row_range,
+        cols=_parse_range(cols),
+    )
+
+    return ModelResponse(
+        sheet,
+        headers={"sheet-row-count": str(row_count), "sheet-row-offset": str(row_range.indices(row_count)[0])},
+    )
+
+
+@router.get("/{document_id}/sheet/{sheet_num}/cell")
+async def get_document_sheet_cells(
+    subject_id: str,
+    document_id: str,
+    sheet_num: int,
+    cell: typing.Annotated[list[typing.Annotated[str, pydantic.StringConstraints(pattern=CELL_PATTERN)]], fastapi.Query()],
+    correlation_id: typing.Annotated[str | None, fastapi.Header()] = None,
+) -> list[SheetCell]:
+    """
+    Get selected cells of document sheet
+    :param subject_id: ID of the subject
+    :param document_id: ID of the document
+    :param sheet_num: Number of the sheet
+    :param cell: Cell coordinates as "row:col" (repeated, i.e. ?cell=0:1&cell=5:2)
+    :param correlation_id: Correlation ID for tracing
+    :return: List of sheet cells (cells outside the sheet are omitted) or raise HTTPException if not found
+    """
+    cells = await document_handler.get_document_sheet_cells(
+        subject_id=subject_id,
+        document_id=document_id,
+        sheet_num=sheet_num,
+        cells=[tuple(int(i) for i in c.split(":")) for c in cell],
+    )
+
+    return ModelResponse(cells)
 
 
 @router.patch("/{document_id}/sheet/{sheet_num}")
@@ -85,6 +178,7 @@ async def update_document_sheet(
     document_id: str,
     sheet_num: int,
     sheet_cells: typing.Annotated[list[SheetCell], fastapi.Body()],
+    if_match: typing.Annotated[str | None, fastapi.Header()] = None,
     correlation_id: typing.Annotated[str | None, fastapi.Header()] = None,
 ) -> Sheet:
     """
@@ -93,20 +187,22 @@ async def update_document_sheet(
     :param document_id: ID of the document
     :param sheet_num: Number of the sheet
     :param sheet_cells: List of sheet cells to update
+    :param if_match: Expected etag of the sheet (optional - 412 if the sheet was modified since, otherwise the last write wins)
     :param correlation_id: Correlation ID for tracing
     :return: Updated sheet object
     """
-    sheet = await document_handler.patch_sheet_data(
+    sheet, etag = await document_handler.patch_sheet_data(
         subject_id=subject_id,
         document_id=document_id,
         sheet_num=sheet_num,
         cell_data=sheet_cells,
+        etag=if_match,
     )
 
-    # trigger recalculation (incorrect business logic, but for PoC purposes it does not matter)
-    await score_handler.trigger_score(subject_id=subject_id, correlation_id=correlation_id)
+    # schedule recalculation (incorrect business logic, but for PoC purposes it does not matter)
+    rescore_handler.schedule_rescore(subject_id=subject_id, correlation_id=correlation_id)
 
-    return sheet
+    return ModelResponse(sheet, headers={"etag": etag} if etag else None)
 
 
 @router.post("/refresh")
@@ -1,7 +1,12 @@
+import typing
 import logging
 import fastapi
 import azure.cosmos.exceptions
 
+from src.core import profiling, startup
+from src.core.cache import CACHES
+from src.core.config import CONFIG
+from src.core.metrics import render as render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 from src.core.exception import HTTPException
 
 
@@ -45,3 +50,64 @@ async def ready() -> fastapi.responses.JSONResponse:
         content={"detail": "Ready"},
     )
 
+
+@router.get("/cache")
+async def cache() -> fastapi.responses.JSONResponse:
+    """
+    Cache statistics endpoint (hits, misses, evictions, ...) for cache tuning.
+    :return: fastapi.responses.JSONResponse
+    """
+    return fastapi.responses.JSONResponse(
+        status_code=200,
+        content={name: cache.stats() for name, cache in CACHES.items()},
+    )
+
+
+@router.get("/startup")
+async def startup_report() -> fastapi.responses.JSONResponse:
+    """
+    Startup time report endpoint (total, import time by package and duration of the lifespan steps, in seconds).
+    :return: fastapi.responses.JSONResponse
+    """
+    return fastapi.responses.JSONResponse(
+        status_code=200,
+        content=startup.report(),
+    )
+
+
+@router.get("/metrics")
+async def metrics() -> fastapi.responses.PlainTextResponse:
+    """
+    Metrics endpoint (Prometheus text format) with route/dependency latency histograms, retries, throttles and caches.
+    :return: fastapi.responses.PlainTextResponse
+    """
+    return fastapi.responses.PlainTextResponse(
+        status_code=200,
+        content=render_metrics(),
+        media_type=METRICS_CONTENT_TYPE,
+    )
+
+
+@router.get("/profile/{correlation_id}")
+async def profile(
+    correlation_id: str,
+    output: typing.Literal["text", "html", "speedscope"] = "text",
+) -> fastapi.responses.Response:
+    """
+    Profile of a request (profiled requests return the correlation ID in x-profile-id header).
+    :param correlation_id: Correlation ID of the profiled request
+    :param output: Output format (text, html or speedscope JSON)
+    :return: fastapi.responses.Response or raise HTTPException if profiling is disabled or the profile is not found
+    """
+    if not CONFIG.PROFILING_ENABLED or (content := profiling.get_profile(correlation_id, output=output)) is None:
+        raise HTTPException(
+            status_code=404,
+            logger_name=__name__,
+            logger_lvl=logging.INFO,
+        )
+
+    return fastapi.responses.Response(
+        status_code=200,
+        content=content,
+        media_type={"text": "text/plain", "html": "text/html", "speedscope": "application/json"}[output],
+    )
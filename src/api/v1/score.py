@@ -3,9 +3,9 @@ import logging
 import fastapi
 import datetime as dt
 
-from src.core.exception import HTTPException
-from src.model.score import ScoreSummary
-from src.service import score_handler
+from src.api.response import ModelResponse
+from src.model.score import ScoreSummary, ScoreJob
+from src.service import score_handler, rescore_handler
 
 
 logger = logging.getLogger(__name__)
@@ -26,16 +26,7 @@ async def get_most_recent_score(
     :param correlation_id: Correlation ID for tracing
     :return: Most recent score value for the subject
     """
-    score_history = await score_handler.get_score_history(subject_id=subject_id)
-
-    if not score_history:
-        raise HTTPException(
-            status_code=404,
-            logger_name=__name__,
-            logger_lvl=logging.INFO,
-        )
-
-    return score_history[0]
+    return ModelResponse(await score_handler.get_latest_score(subject_id=subject_id))
 
 
 @router.get("/history")
@@ -53,7 +44,7 @@ async def get_score_history(
     :param correlation_id: Correlation ID for tracing
     :return: List of historical calculations
     """
-    return await score_handler.get_score_history(subject_id=subject_id, date_from=date_from, date_to=date_to)
+    return ModelResponse(await score_handler.get_score_history(subject_id=subject_id, date_from=date_from, date_to=date_to))
 
 
 @router.post("")
@@ -67,5 +58,21 @@ async def trigger_score(
     :param correlation_id: Correlation ID for tracing
     :return: Calculated score
     """
-    return await score_handler.trigger_score(subject_id=subject_id, correlation_id=correlation_id)
+    return ModelResponse(await score_handler.trigger_score(subject_id=subject_id, correlation_id=correlation_id))
+
+
+@router.get("/job")
+async def get_score_job(
+    subject_id: str,
+    wait: typing.Annotated[float | None, fastapi.Query(ge=0, le=60)] = None,
+    correlation_id: typing.Annotated[str | None, fastapi.Header()] = None,
+) -> ScoreJob:
+    """
+    Get status of the latest background score calculation (scheduled after sheet updates)
+    :param subject_id: ID of the subject
+    :param wait: Time (in seconds) to wait for the job to finish
+    :param correlation_id: Correlation ID for tracing
+    :return: Status of the score calculation job or raise HTTPException if there is no job
+    """
+    return ModelResponse(await rescore_handler.get_job(subject_id=subject_id, wait=wait))
 
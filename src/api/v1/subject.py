@@ -2,6 +2,7 @@ import typing
 import logging
 import fastapi
 
+from src.api.response import ModelResponse
 from src.model.subject import Subject, Address
 from src.service import subject_handler
 
@@ -18,17 +19,32 @@ async def search_subject(
     ic: str = None,
     name: str = None,
     include_not_active: bool = False,
+    limit: typing.Annotated[int | None, fastapi.Query(ge=1, le=1000)] = None,
+    cursor: str = None,
     correlation_id: typing.Annotated[str | None, fastapi.Header()] = None,
 ) -> list[Subject]:
     """
-    Search for subjects
+    Search for subjects (paginated if limit or cursor is provided, next page cursor is in continuation-token header)
     :param ic: IC number of the subject
     :param name: Name of the subject
     :param include_not_active: Include not active subjects
+    :param limit: Maximum number of subjects in the page
+    :param cursor: Continuation token of the previous page
     :param correlation_id: Correlation ID for tracing
     :return: List of subjects matching the search criteria
     """
-    return await subject_handler.search_subject(ic=ic, name=name, include_not_active=include_not_active)
+    if limit is None and cursor is None:
+        return ModelResponse(await subject_handler.search_subject(ic=ic, name=name, include_not_active=include_not_active))
+
+    subjects, continuation_token = await subject_handler.search_subject_page(
+        ic=ic,
+        name=name,
+        include_not_active=include_not_active,
+        limit=limit,
+        cursor=cursor,
+    )
+
+    return ModelResponse(subjects, headers={"continuation-token": continuation_token} if continuation_token else None)
 
 
 @router.get("/{subject_id}")
@@ -42,7 +58,7 @@ async def get_subject(
     :param correlation_id: Correlation ID for tracing
     :return: Subject object or raise HTTPException if not found
     """
-    return await subject_handler.get_subject(subject_id=subject_id)
+    return ModelResponse(await subject_handler.get_subject(subject_id=subject_id))
 
 
 @router.patch("/{subject_id}")
@@ -66,7 +82,7 @@ async def update_subject(
     :param correlation_id: Correlation ID for tracing
     :return: Updated Subject object
     """
-    return await subject_handler.update_subject(
+    subject = await subject_handler.update_subject(
         subject_id=subject_id,
         name=name,
         address=address,
@@ -75,6 +91,8 @@ async def update_subject(
         extra=extra,
     )
 
+    return ModelResponse(subject)
+
 
 @router.post("", status_code=201)
 async def create_subject(
@@ -87,7 +105,7 @@ async def create_subject(
     :param correlation_id: Correlation ID for tracing
     :return: Created Subject object
     """
-    return await subject_handler.create_subject(subject=subject)
+    return ModelResponse(await subject_handler.create_subject(subject=subject), status_code=201)
 
 
 @router.delete("/{subject_id}")
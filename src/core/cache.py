@@ -0,0 +1,145 @@
+import time
+import typing
+import collections
+
+
+CACHES: dict[str, "LRUCache"] = dict()
+
+
+class LRUCache:
+    """
+    In-process LRU cache with TTL and size bound (entries are kept after expiration for revalidation).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        ttl: float,
+        sizeof: typing.Callable[[typing.Any], int] = lambda value: 1,
+    ) -> None:
+        """
+        :param name: Name of the cache (used for stats)
+        :param max_size: Maximum total size of the cached values (in units returned by sizeof)
+        :param ttl: Time to live of the entries (in seconds)
+        :param sizeof: Function returning size of a value (defaults to 1, i.e. max_size is number of entries)
+        """
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sizeof = sizeof
+
+        self._entries: collections.OrderedDict[typing.Hashable, tuple[float, int, typing.Any]] = collections.OrderedDict()
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # number of writes, values read before a write are not filled in (the read may return the pre-image)
+        self.writes = 0
+
+        CACHES[name] = self
+
+    def get(self, key: typing.Hashable) -> typing.Any | None:
+        """
+        Get fresh (not expired) value from the cache.
+        :param key: Cache key
+        :return: Cached value or None if not cached or expired
+        """
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def peek(self, key: typing.Hashable) -> typing.Any | None:
+        """
+        Get value from the cache regardless of its expiration (does not affect stats nor LRU order).
+        :param key: Cache key
+        :return: Cached value or None if not cached
+        """
+        entry = self._entries.get(key)
+        return entry[2] if entry is not None else None
+
+    def set(self, key: typing.Hashable, value: typing.Any) -> None:
+        """
+        Set value in the cache (and evict the least recently used entries if over size).
+        :param key: Cache key
+        :param value: Value to be cached
+        :return: None
+        """
+        self.invalidate(key)
+
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self._size += size
+
+        while self._size > self.max_size:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.evictions += 1
+
+    def fill(self, key: typing.Hashable, value: typing.Any, writes: int) -> None:
+        """
+        Set value read from the database, unless there was a write since the read started.
+        :param key: Cache key
+        :param value: Value to be cached
+        :param writes: Number of writes when the read started
+        :return: None
+        """
+        if writes == self.writes:
+            self.set(key, value)
+
+    def update(self, key: typing.Hashable, value: typing.Any = None) -> None:
+        """
+        Set value written to the database (or invalidate if not provided), reads in flight are not filled in.
+        :param key: Cache key
+        :param value: Value to be cached (i.e. post-image of the write)
+        :return: None
+        """
+        self.writes += 1
+
+        if value is None:
+            self.invalidate(key)
+        else:
+            self.set(key, value)
+
+    def invalidate(self, key: typing.Hashable) -> None:
+        """
+        Remove value from the cache.
+        :param key: Cache key
+        :return: None
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def clear(self) -> None:
+        """
+        Remove all values from the cache.
+        :return: None
+        """
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+        :return: Dictionary with cache statistics
+        """
+        return {
+            "entries": len(self._entries),
+            "size": self._size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
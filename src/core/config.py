@@ -18,11 +18,69 @@ class Config(pydantic_settings.BaseSettings):
     COSMOS_SUBJECT_CONTAINER: str = "subject"
     COSMOS_DOCUMENT_CONTAINER: str = "document"
 
+    COSMOS_READ_CONCURRENCY: int = 16
+
+    COSMOS_CHANGE_FEED_ENABLED: bool = True
+    COSMOS_CHANGE_FEED_POLL_INTERVAL: float = 1.0
+    COSMOS_CHANGE_FEED_CHECKPOINT_FILE: str | None = None
+
+    # Search
+    SUBJECT_SEARCH_PAGE_SIZE: int = 50
+    SUBJECT_INDEX_ENABLED: bool = True
+    SUBJECT_INDEX_REBUILD_INTERVAL: float = 3600.0
+
+    # Caching
+    SUBJECT_CACHE_SIZE: int = 1024
+    SUBJECT_CACHE_TTL: float = 30.0
+    SHEET_CACHE_SIZE: int = 128 * 1024 * 1024
+    SHEET_CACHE_TTL: float = 300.0
+    SHEET_CACHE_FILLS: int = 4
+    SCORE_CACHE_SIZE: int = 1024
+    SCORE_CACHE_TTL: float = 3600.0
+
+    # Scoring
+    RESCORE_DEBOUNCE: float = 2.0
+    RESCORE_MAX_DELAY: float = 10.0
+    RESCORE_JOB_TTL: float = 3600.0
+
     # Microservices
     ONLINE_DATA_SERVICE_URL: str = "http://faspo-online-data-service/api/v1"
     MODEL_SERVICE_URL: str = "http://faspo-model-service/api/v1"
     EXPORT_SERVICE_URL: str = "http://faspo-export-service/api/v1"
 
+    MODEL_SERVICE_TIMEOUT: float = 60.0
+    ONLINE_DATA_SERVICE_TIMEOUT: float = 30.0
+    EXPORT_SERVICE_TIMEOUT: float = 30.0
+
+    # HTTP client (shared connection pool)
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 20
+    HTTP_DNS_CACHE_TTL: int = 300
+    HTTP_KEEPALIVE_TIMEOUT: float = 30.0
+
+    # Retries (Cosmos throttling/unavailability and downstream 5xx)
+    RETRY_MAX_ATTEMPTS: int = 5
+    RETRY_BASE_DELAY: float = 0.1
+    RETRY_MAX_DELAY: float = 5.0
+    RETRY_BUDGET: int = 10
+    RETRY_DEADLINE: float = 10.0
+
+    # Request charge (RU) budgets per route path (i.e. {"/api/v1/subject": 500}), exceeding requests are aborted
+    REQUEST_CHARGE_BUDGETS: dict[str, float] = {}
+
+    # Profiling (opt-in, requests are profiled if triggered by header or sampled)
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "x-profile"
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL: float = 0.001
+    PROFILING_MAX_STORED: int = 100
+    PROFILING_TTL: float = 3600.0
+
+    # Telemetry (Azure Monitor set up in the background of the startup, logs and traces before are not exported)
+    TELEMETRY_BACKGROUND: bool = True
+
     # General
     LOG_LEVEL: pydantic.constr(to_upper=True) = "INFO"
 
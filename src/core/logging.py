@@ -1,15 +1,23 @@
+import asyncio
 import logging
 import logging.config
-import azure.monitor.opentelemetry
-import azure.monitor.opentelemetry.exporter
 
+from src.core import startup
 from src.core.config import CONFIG
 
 
-def setup_logging():
+logger = logging.getLogger(__name__)
+
+_telemetry: asyncio.Task | None = None
+
+
+def setup_telemetry():
     """
-    Set up logging configuration.
+    Set up Azure Monitor telemetry (exporters and auto-instrumentation). The package is imported here, both the import
+    and the configuration (resource detection, instrumentation) are slow, so it is run in a thread by start_telemetry.
     """
+    import azure.monitor.opentelemetry
+
     azure.monitor.opentelemetry.configure_azure_monitor(
         logger_name="src",
         instrumentation_options={
@@ -20,6 +28,44 @@ def setup_logging():
         }
     )
 
+
+async def _setup_telemetry() -> None:
+    try:
+        with startup.step("telemetry"):
+            await asyncio.to_thread(setup_telemetry)
+    except Exception:
+        if not CONFIG.TELEMETRY_BACKGROUND:
+            raise
+        logger.exception("Telemetry setup failed")
+    else:
+        logger.info(f"Telemetry set up in {startup.STEPS['telemetry']:.3f} s")
+
+
+async def start_telemetry() -> None:
+    """
+    Start telemetry setup in the background (the startup waits for it if TELEMETRY_BACKGROUND is disabled)
+    """
+    global _telemetry
+    _telemetry = asyncio.create_task(_setup_telemetry())
+
+    if not CONFIG.TELEMETRY_BACKGROUND:
+        await _telemetry
+
+
+async def stop_telemetry() -> None:
+    """
+    Wait for the telemetry setup to finish (the thread cannot be cancelled)
+    """
+    global _telemetry
+    if _telemetry is not None:
+        await asyncio.gather(_telemetry, return_exceptions=True)
+        _telemetry = None
+
+
+def setup_logging():
+    """
+    Set up logging configuration (stdout, the telemetry is set up by start_telemetry).
+    """
     logging.getLogger("uvicorn.access").addFilter(
         lambda record: record.getMessage().find("/probe/") == -1
     )
@@ -34,17 +80,20 @@ def setup_logging():
                     "uuid_length": 16,
                     "default_value": "0" * 16,
                 },
+                "request-charge-filter": {
+                    "()": "src.core.request_charge.RequestChargeFilter",
+                },
             },
             "formatters": {
                 "stdout-fmt": {
                     "class": "logging.Formatter",
-                    "format": "%(asctime)s | %(levelname)-7s | %(name)-30s | %(funcName)-30s | %(correlation_id)-16s | %(message)s",
+                    "format": "%(asctime)s | %(levelname)-7s | %(name)-30s | %(funcName)-30s | %(correlation_id)-16s | %(request_charge)8.2f | %(message)s",
                 },
             },
             "handlers": {
                 "stdout-handler": {
                     "class": "logging.StreamHandler",
-                    "filters": ["correlation-id-filter"],
+                    "filters": ["correlation-id-filter", "request-charge-filter"],
                     "formatter": "stdout-fmt",
                 },
             },
@@ -0,0 +1,270 @@
+import time
+import bisect
+import typing
+
+from src.core import startup
+from src.core.cache import CACHES
+
+
+REGISTRY: list["_Metric"] = list()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    """
+    Format labels in the Prometheus text format
+    :param names: Label names
+    :param values: Label values
+    :param extra: Additional formatted label (i.e. le for histogram buckets)
+    :return: Formatted labels (empty string if no labels)
+    """
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)] + ([extra] if extra else [])
+
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+class _Metric:
+    """
+    Metric with labelled children (children are created on the first use of the label values and kept forever,
+    so the hot path is a single dict lookup and in-place updates without locks - all updates run on the event loop)
+    """
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        """
+        :param name: Metric name
+        :param help: Metric description
+        :param labels: Label names
+        """
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.children: dict[tuple, typing.Any] = dict()
+
+        REGISTRY.append(self)
+
+    def labels(self, *values) -> typing.Any:
+        """
+        Get child of the label values
+        :param values: Label values (in the order of label names)
+        :return: Child metric
+        """
+        if (child := self.children.get(values)) is None:
+            child = self.children[values] = self._child()
+
+        return child
+
+    def _child(self) -> typing.Any:
+        raise NotImplementedError
+
+    def _samples(self) -> typing.Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """
+        Render metric in the Prometheus text format
+        :return: Rendered metric
+        """
+        return "\n".join([f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}", *self._samples()])
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing counter
+    """
+    type = "counter"
+
+    def _child(self) -> _Value:
+        return _Value()
+
+    def _samples(self) -> typing.Iterator[str]:
+        for values, child in list(self.children.items()):
+            yield f"{self.name}{_format_labels(self.label_names, values)} {child.value}"
+
+
+class Gauge(Counter):
+    """
+    Gauge (value going up and down)
+    """
+    type = "gauge"
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    """
+    Histogram of observed values (i.e. latencies in seconds)
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """
+        :param name: Metric name
+        :param help: Metric description
+        :param labels: Label names
+        :param buckets: Upper bounds of the buckets (sorted)
+        """
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name=name, help=help, labels=labels)
+
+    def _child(self) -> _Histogram:
+        return _Histogram(self.buckets)
+
+    def _samples(self) -> typing.Iterator[str]:
+        for values, child in list(self.children.items()):
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], child.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.label_names, values, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, values)} {child.sum}"
+            yield f"{self.name}_count{_format_labels(self.label_names, values)} {child.count}"
+
+
+class Collected(_Metric):
+    """
+    Metric collected on render (for values already tracked elsewhere, i.e. cache statistics)
+    """
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        labels: tuple[str, ...],
+        collect: typing.Callable[[], typing.Iterable[tuple[tuple, float]]],
+    ) -> None:
+        """
+        :param name: Metric name
+        :param help: Metric description
+        :param type: Metric type (counter or gauge)
+        :param labels: Label names
+        :param collect: Function returning (label values, value) pairs
+        """
+        self.type = type
+        self.collect = collect
+        super().__init__(name=name, help=help, labels=labels)
+
+    def _samples(self) -> typing.Iterator[str]:
+        for values, value in self.collect():
+            yield f"{self.name}{_format_labels(self.label_names, values)} {value}"
+
+
+def render() -> str:
+    """
+    Render all registered metrics in the Prometheus text format
+    :return: Rendered metrics
+    """
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+HTTP_IN_FLIGHT = Gauge(
+    name="http_requests_in_flight",
+    help="Number of HTTP requests being handled",
+)
+HTTP_DURATION = Histogram(
+    name="http_request_duration_seconds",
+    help="Duration of HTTP requests by route",
+    labels=("method", "route", "status"),
+)
+DEPENDENCY_DURATION = Histogram(
+    name="dependency_duration_seconds",
+    help="Duration of downstream calls (Cosmos operations by container, HTTP calls by service)",
+    labels=("dependency", "operation", "target", "outcome"),
+)
+RETRIES = Counter(
+    name="dependency_retries_total",
+    help="Number of retried downstream calls by status",
+    labels=("dependency", "status"),
+)
+CHANGE_FEED_FAILURES = Counter(
+    name="change_feed_failures_total",
+    help="Number of failed change feed reads by container (caches and the subject index are not kept current)",
+    labels=("container",),
+)
+THROTTLES = Counter(
+    name="dependency_throttles_total",
+    help="Number of throttled (429) downstream calls",
+    labels=("dependency",),
+)
+
+for _stat in ("hits", "misses", "evictions"):
+    Collected(
+        name=f"cache_{_stat}_total",
+        help=f"Number of cache {_stat}",
+        type="counter",
+        labels=("cache",),
+        collect=lambda stat=_stat: [((name, ), getattr(cache, stat)) for name, cache in CACHES.items()],
+    )
+
+Collected(
+    name="startup_duration_seconds",
+    help="Duration of the startup (total, imports by package, steps of the lifespan)",
+    type="gauge",
+    labels=("phase", "name"),
+    collect=lambda: [
+        *([(("total", ""), startup.TOTAL)] if startup.TOTAL is not None else []),
+        *[(("import", name), elapsed) for name, elapsed in startup.report()["imports"].items()],
+        *[(("step", name), elapsed) for name, elapsed in startup.STEPS.items()],
+    ],
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware measuring in-flight requests and request duration by route
+    """
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def _send(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.labels().inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            HTTP_IN_FLIGHT.labels().dec()
+            route = scope.get("route")
+            HTTP_DURATION.labels(scope["method"], getattr(route, "path", ""), status).observe(time.perf_counter() - start)
@@ -0,0 +1,80 @@
+import random
+import logging
+import asgi_correlation_id
+
+from src.core.cache import LRUCache
+from src.core.config import CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile-id"
+
+# cached values are pyinstrument sessions keyed by correlation id
+_profiles = LRUCache(name="profile", max_size=CONFIG.PROFILING_MAX_STORED, ttl=CONFIG.PROFILING_TTL)
+
+
+def get_profile(correlation_id: str, output: str = "text") -> str | None:
+    """
+    Render stored profile of a request
+    :param correlation_id: Correlation ID of the profiled request
+    :param output: Output format (text, html or speedscope)
+    :return: Rendered profile or None if not found
+    """
+    import pyinstrument.renderers
+
+    if (session := _profiles.get(correlation_id)) is None:
+        return None
+
+    renderer = {
+        "text": lambda: pyinstrument.renderers.ConsoleRenderer(unicode=True, show_all=False),
+        "html": pyinstrument.renderers.HTMLRenderer,
+        "speedscope": pyinstrument.renderers.SpeedscopeRenderer,
+    }[output]()
+
+    return renderer.render(session)
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware profiling sampled requests or requests with the trigger header (added only if profiling is enabled,
+    the profile is stored under the correlation id and its ID is returned in x-profile-id header)
+    """
+    def __init__(self, app) -> None:
+        self.app = app
+        self.header = CONFIG.PROFILING_HEADER.lower().encode()
+
+    def _should_profile(self, scope: dict) -> bool:
+        """
+        Decide whether to profile the request (trigger header or sampling)
+        :param scope: ASGI scope of the request
+        :return: True if the request should be profiled
+        """
+        if any(name == self.header for name, _ in scope.get("headers", [])):
+            return True
+
+        return CONFIG.PROFILING_SAMPLE_RATE > 0 and random.random() < CONFIG.PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            return await self.app(scope, receive, send)
+
+        import pyinstrument
+
+        # the profiler follows the request context across awaits (time spent awaiting is attributed to the await)
+        profiler = pyinstrument.Profiler(interval=CONFIG.PROFILING_INTERVAL, async_mode="enabled")
+        profile_id = asgi_correlation_id.correlation_id.get()
+
+        async def _send(message: dict) -> None:
+            if message["type"] == "http.response.start" and profile_id:
+                message["headers"] = [*message.get("headers", []), (PROFILE_HEADER.encode(), profile_id.encode())]
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            session = profiler.stop()
+            if profile_id:
+                _profiles.set(profile_id, session)
+                logger.info(f"Request {scope.get('path')} profiled ({session.duration:.3f}s)")
@@ -0,0 +1,161 @@
+import typing
+import logging
+import contextvars
+import azure.core.async_paging
+
+from src.core.config import CONFIG
+from src.core.exception import HTTPException
+
+
+logger = logging.getLogger(__name__)
+
+COSMOS_CHARGE_HEADER = "x-ms-request-charge"
+RESPONSE_CHARGE_HEADER = "x-request-charge"
+
+
+class RequestCharge:
+    """
+    Request units (RU) consumed by the Cosmos operations of a single request
+    """
+    __slots__ = ("total", "operations", "scope")
+
+    def __init__(self, scope: dict = None) -> None:
+        """
+        :param scope: ASGI scope of the request (the matched route is resolved lazily for the route budget)
+        """
+        self.total = 0.0
+        self.operations = 0
+        self.scope = scope or {}
+
+    @property
+    def route(self) -> str | None:
+        """
+        Path template of the matched route
+        :return: Route path or None if not matched (yet)
+        """
+        route = self.scope.get("route")
+
+        return getattr(route, "path", None)
+
+    def add(self, charge: float) -> None:
+        """
+        Add request charge of a Cosmos operation (the budget is not checked, the operation has already been done)
+        :param charge: Request charge (in RU)
+        :return: None
+        """
+        self.total += charge
+        self.operations += 1
+
+    def check(self) -> None:
+        """
+        Check the route budget before the next Cosmos operation is issued
+        :return: None or raise HTTPException if the route budget is exceeded
+        """
+        budget = CONFIG.REQUEST_CHARGE_BUDGETS.get(self.route)
+        if budget is not None and self.total > budget:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Request charge budget of the route exceeded ({self.total:.2f} > {budget:.2f} RU), narrow the request",
+                logger_name=__name__,
+            )
+
+
+    def include(self, other: "RequestCharge") -> None:
+        """
+        Add request charge of the operations made on behalf of the request elsewhere (i.e. by a shared background task)
+        :param other: Request charge to be added
+        :return: None
+        """
+        self.total += other.total
+        self.operations += other.operations
+
+
+_charge: contextvars.ContextVar[RequestCharge | None] = contextvars.ContextVar("request_charge", default=None)
+
+
+def current() -> RequestCharge | None:
+    """
+    Get request charge accumulator of the current request
+    :return: Request charge or None if outside of a request
+    """
+    return _charge.get()
+
+
+def detached(charge: RequestCharge | None = None) -> contextvars.Context:
+    """
+    Build fresh context for a background task (nothing of the current request is inherited, i.e. the retry budget)
+    :param charge: Request charge accumulating the Cosmos operations of the task (optional - not accumulated if None)
+    :return: Context to run the task in
+    """
+    context = contextvars.Context()
+    context.run(_charge.set, charge)
+
+    return context
+
+
+def response_hook(hook: typing.Callable = None) -> typing.Callable | None:
+    """
+    Build Cosmos response hook accumulating request charge of the current request
+    :param hook: Response hook to be chained (optional)
+    :return: Response hook (the given hook if outside of a request)
+    """
+    if (charge := _charge.get()) is None:
+        return hook
+
+    def _hook(headers: typing.Mapping[str, typing.Any], result: typing.Any) -> None:
+        if hook:
+            hook(headers, result)
+
+        # queries invoke the hook on creation of the pager with headers of a previous operation
+        if isinstance(result, azure.core.async_paging.AsyncItemPaged):
+            return
+
+        charge.add(float(headers.get(COSMOS_CHARGE_HEADER) or 0))
+
+    return _hook
+
+
+class RequestChargeMiddleware:
+    """
+    ASGI middleware accumulating request charge of each HTTP request (exposed in x-request-charge header and logged)
+    """
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        charge = RequestCharge(scope)
+
+        async def _send(message: dict) -> None:
+            # streamed responses report the charge consumed before the response started (the total is logged)
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (RESPONSE_CHARGE_HEADER.encode(), f"{charge.total:.2f}".encode()),
+                ]
+            await send(message)
+
+        token = _charge.set(charge)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            if charge.operations:
+                logger.info(
+                    f"Request charge of {charge.route} is {charge.total:.2f} RU ({charge.operations} operations)",
+                    extra={"request_charge": charge.total, "route": charge.route},
+                )
+            _charge.reset(token)
+
+
+class RequestChargeFilter(logging.Filter):
+    """
+    Logging filter adding request charge of the current request (request_charge field)
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_charge"):
+            charge = _charge.get()
+            record.request_charge = round(charge.total, 2) if charge else 0.0
+
+        return True
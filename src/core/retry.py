@@ -0,0 +1,230 @@
+import time
+import random
+import typing
+import asyncio
+import logging
+import contextvars
+import email.utils
+import aiohttp
+import azure.cosmos.exceptions
+
+from src.core import metrics
+from src.core.config import CONFIG
+from src.core.exception import HTTPException
+
+
+logger = logging.getLogger(__name__)
+
+T = typing.TypeVar("T")
+
+COSMOS_RETRY_STATUS = {429, 449, 503}
+HTTP_RETRY_STATUS = {429, 502, 503, 504}
+# the request was not processed, so even non-idempotent requests are safe to retry
+HTTP_UNPROCESSED_STATUS = {429, 503}
+
+
+class RetryBudget:
+    """
+    Retry budget shared by all calls made while handling a single request
+    """
+    __slots__ = ("remaining", "deadline")
+
+    def __init__(self, retries: int = None, deadline: float = None) -> None:
+        """
+        :param retries: Maximum number of retries (optional - defaults to RETRY_BUDGET)
+        :param deadline: Time (in seconds) after which no more retries are attempted (optional - defaults to RETRY_DEADLINE)
+        """
+        self.remaining = CONFIG.RETRY_BUDGET if retries is None else retries
+        self.deadline = time.monotonic() + (CONFIG.RETRY_DEADLINE if deadline is None else deadline)
+
+    def spend(self, delay: float) -> bool:
+        """
+        Spend one retry (if any retry is left and the delay does not exceed the deadline)
+        :param delay: Delay (in seconds) before the retry
+        :return: True if the retry may be attempted
+        """
+        if self.remaining <= 0 or time.monotonic() + delay > self.deadline:
+            return False
+
+        self.remaining -= 1
+
+        return True
+
+
+_budget: contextvars.ContextVar[RetryBudget | None] = contextvars.ContextVar("retry_budget", default=None)
+
+
+class RetryBudgetMiddleware:
+    """
+    ASGI middleware starting a new retry budget for each HTTP request
+    """
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        token = _budget.set(RetryBudget())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _budget.reset(token)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse Retry-After header (delay in seconds or HTTP date)
+    :param value: Header value
+    :return: Delay in seconds or None if not provided or invalid
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_hint(error: Exception, idempotent: bool = True) -> tuple[bool, float | None]:
+    """
+    Classify error as retryable and get the server provided retry delay
+    :param error: Raised error
+    :param idempotent: Whether the failed HTTP request is idempotent (gateway errors are retried only if so)
+    :return: Whether the error is retryable and the server provided delay (in seconds) if any
+    """
+    if isinstance(error, (azure.cosmos.exceptions.CosmosHttpResponseError, azure.cosmos.exceptions.CosmosBatchOperationError)):
+        if error.status_code not in COSMOS_RETRY_STATUS:
+            return False, None
+
+        retry_after_ms = (error.headers or {}).get("x-ms-retry-after-ms")
+
+        return True, float(retry_after_ms) / 1000 if retry_after_ms else None
+
+    if isinstance(error, HTTPException):
+        if error.status_code not in (HTTP_RETRY_STATUS if idempotent else HTTP_UNPROCESSED_STATUS):
+            return False, None
+
+        return True, _parse_retry_after((error.headers or {}).get("Retry-After"))
+
+    # the request was not sent at all, so it is safe to retry
+    if isinstance(error, aiohttp.ClientConnectorError):
+        return True, None
+
+    return False, None
+
+
+def _dependency(error: Exception) -> str:
+    """
+    Get dependency of the error (for metrics)
+    :param error: Raised error
+    :return: Dependency name
+    """
+    if isinstance(error, (azure.cosmos.exceptions.CosmosHttpResponseError, azure.cosmos.exceptions.CosmosBatchOperationError)):
+        return "cosmos"
+
+    return "http"
+
+
+def backoff(attempt: int) -> float:
+    """
+    Jittered exponential backoff ("full jitter")
+    :param attempt: Number of the retry (starting from 0)
+    :return: Delay in seconds
+    """
+    return random.uniform(0, min(CONFIG.RETRY_MAX_DELAY, CONFIG.RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _next_delay(error: Exception, attempt: int, budget: RetryBudget, idempotent: bool = True) -> float | None:
+    """
+    Get delay before the next retry (honouring the server hint, the retry budget and the deadline)
+    :param error: Raised error
+    :param attempt: Number of the retry (starting from 0)
+    :param budget: Retry budget
+    :param idempotent: Whether the failed HTTP request is idempotent
+    :return: Delay in seconds or None if the error should not be retried
+    """
+    retryable, hint = retry_hint(error, idempotent=idempotent)
+
+    if not retryable:
+        return None
+
+    status = getattr(error, "status_code", None)
+    if status == 429:
+        metrics.THROTTLES.labels(_dependency(error)).inc()
+
+    if attempt + 1 >= CONFIG.RETRY_MAX_ATTEMPTS:
+        return None
+
+    delay = max(hint or 0.0, backoff(attempt))
+    if not budget.spend(delay):
+        return None
+
+    metrics.RETRIES.labels(_dependency(error), status or "connection").inc()
+
+    return delay
+
+
+async def call(operation: typing.Callable[[], typing.Awaitable[T]], name: str = None, idempotent: bool = True) -> T:
+    """
+    Call operation with retries of transient failures (throttling, unavailability)
+    :param operation: Operation to call (called again for each retry)
+    :param name: Name of the operation (for logging)
+    :param idempotent: Whether the operation is safe to repeat after a gateway error (502/504) of HTTP request
+        which may have been processed (throttled and unavailable requests are retried either way)
+    :return: Result of the operation
+    """
+    # calls outside of a request (background tasks) get their own budget
+    budget = _budget.get() or RetryBudget()
+    attempt = 0
+
+    while True:
+        try:
+            return await operation()
+        except Exception as e:
+            if (delay := _next_delay(e, attempt, budget, idempotent=idempotent)) is None:
+                raise
+
+            logger.info(f"Retrying {name or 'operation'} in {delay:.3f}s (attempt {attempt + 1}): {type(e).__name__}")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def iterate(factory: typing.Callable[[], typing.Any], name: str = None) -> typing.AsyncIterator[T]:
+    """
+    Iterate query results page by page with retries of transient failures (the query is resumed from the continuation
+    token of the last fetched page, so already yielded items are not fetched again)
+    :param factory: Factory of the query results supporting by_page (called again for each retry)
+    :param name: Name of the operation (for logging)
+    :return: Async iterator of items
+    """
+    budget = _budget.get() or RetryBudget()
+    attempt, continuation, pages = 0, None, None
+
+    while True:
+        try:
+            if pages is None:
+                pages = factory().by_page(continuation_token=continuation)
+            page = await anext(pages)
+            items = [item async for item in page]
+        except StopAsyncIteration:
+            return
+        except Exception as e:
+            if (delay := _next_delay(e, attempt, budget)) is None:
+                raise
+
+            logger.info(f"Retrying {name or 'iteration'} in {delay:.3f}s (attempt {attempt + 1}): {type(e).__name__}")
+            await asyncio.sleep(delay)
+            attempt, pages = attempt + 1, None
+            continue
+
+        # the token of the following page is known once the page is fetched
+        continuation = pages.continuation_token
+        for item in items:
+            yield item
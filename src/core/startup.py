@@ -0,0 +1,165 @@
+import sys
+import time
+import logging
+import threading
+import contextlib
+import typing
+
+
+logger = logging.getLogger(__name__)
+
+_STARTED = time.perf_counter()
+
+IMPORTS: dict[str, float] = dict()
+STEPS: dict[str, float] = dict()
+TOTAL: float | None = None
+
+_local = threading.local()
+
+
+def _stack() -> list[float]:
+    if (stack := getattr(_local, "stack", None)) is None:
+        stack = _local.stack = list()
+
+    return stack
+
+
+def _timed(func: typing.Callable, name: typing.Callable[[typing.Any], str]) -> typing.Callable:
+    """
+    Wrap loader method measuring its own duration (without the duration of the nested imports)
+    :param func: Loader method (create_module or exec_module)
+    :param name: Function returning module name of the method argument
+    :return: Wrapped method
+    """
+    def _wrapped(arg):
+        stack = _stack()
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return func(arg)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            module = name(arg)
+            IMPORTS[module] = IMPORTS.get(module, 0.0) + elapsed - nested
+
+    _wrapped.__wrapped__ = func
+    return _wrapped
+
+
+class _ImportTimer:
+    """
+    Meta path finder measuring import time of modules (specs are found by the following finders, their loaders are
+    instrumented in place, so the imported modules are not affected)
+    """
+    def __init__(self) -> None:
+        self.finding = threading.local()
+
+    def find_spec(self, fullname: str, path=None, target=None):
+        finding = self.finding.__dict__.setdefault("names", set())
+        if fullname in finding:
+            return None
+
+        finding.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or (find_spec := getattr(finder, "find_spec", None)) is None:
+                    continue
+                if (spec := find_spec(fullname, path, target)) is not None:
+                    break
+            else:
+                return None
+        finally:
+            finding.discard(fullname)
+
+        # builtin and frozen importers are classes shared by all their modules (and fast), they are left as they are
+        loader = spec.loader
+        if loader is not None and not isinstance(loader, type):
+            try:
+                if hasattr(loader, "exec_module") and not hasattr(loader.exec_module, "__wrapped__"):
+                    loader.exec_module = _timed(loader.exec_module, lambda module: module.__name__)
+                if hasattr(loader, "create_module") and not hasattr(loader.create_module, "__wrapped__"):
+                    loader.create_module = _timed(loader.create_module, lambda spec: spec.name)
+            except (AttributeError, TypeError):
+                pass
+
+        return spec
+
+
+_timer = _ImportTimer()
+
+
+def track_imports() -> None:
+    """
+    Start measuring import time of modules (call before importing anything else)
+    """
+    if _timer not in sys.meta_path:
+        sys.meta_path.insert(0, _timer)
+
+
+def untrack_imports() -> None:
+    """
+    Stop measuring import time of modules
+    """
+    if _timer in sys.meta_path:
+        sys.meta_path.remove(_timer)
+
+
+@contextlib.contextmanager
+def step(name: str) -> typing.Iterator[None]:
+    """
+    Measure duration of a startup step (i.e. client construction in the lifespan)
+    :param name: Step name
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STEPS[name] = time.perf_counter() - start
+
+
+def _group(module: str) -> str:
+    """
+    Group module by its top level package (modules of the service are kept as they are)
+    """
+    return module if module.startswith("src.") else module.partition(".")[0]
+
+
+def report(top: int = 20) -> dict:
+    """
+    Startup time report (import time by package, duration of startup steps)
+    :param top: Number of the slowest packages reported
+    :return: Report
+    """
+    imports = dict()
+    for module, elapsed in list(IMPORTS.items()):
+        group = _group(module)
+        imports[group] = imports.get(group, 0.0) + elapsed
+
+    return {
+        "total": TOTAL,
+        "imports_total": sum(imports.values()),
+        "imports": dict(sorted(imports.items(), key=lambda item: item[1], reverse=True)[:top]),
+        "steps": dict(STEPS),
+    }
+
+
+def finish() -> None:
+    """
+    Mark the startup as finished (imports are no longer measured) and log the report
+    """
+    global TOTAL
+    TOTAL = time.perf_counter() - _STARTED
+    untrack_imports()
+
+    startup_report = report(top=10)
+    logger.info(
+        f"Started in {startup_report['total']:.3f} s"
+        f" (imports {startup_report['imports_total']:.3f} s: "
+        + ", ".join(f"{name} {elapsed:.3f}" for name, elapsed in startup_report["imports"].items())
+        + "; steps: "
+        + ", ".join(f"{name} {elapsed:.3f}" for name, elapsed in startup_report["steps"].items())
+        + ")"
+    )
@@ -0,0 +1,171 @@
+import json
+import asyncio
+import typing
+import logging
+import azure.cosmos.aio
+
+from src.core import metrics
+from src.core.config import CONFIG
+from src.db import cosmos
+
+
+logger = logging.getLogger(__name__)
+
+_subscribers: dict[str, list[typing.Callable[[list[dict]], typing.Awaitable[None] | None]]] = dict()
+_checkpoints: dict[str, str] = dict()
+_tasks: list[asyncio.Task] = list()
+
+
+async def read_changes(
+    container: azure.cosmos.aio.ContainerProxy,
+    continuation: str | None = None,
+) -> typing.AsyncIterator[tuple[list[dict], str | None]]:
+    """
+    Read pending changes from the container change feed page by page (the backlog is never held in memory at once).
+    :param container: Container to read the change feed of
+    :param continuation: Continuation token of the previous read (optional - if not provided only new changes are read)
+    :return: Async iterator of changed items of each page and continuation token after the page (the last one,
+        after all pending changes were read, has no items)
+    """
+    pages = container.query_items_change_feed(
+        **({"continuation": continuation} if continuation else {"start_time": "Now"}),
+    ).by_page()
+
+    async for page in pages:
+        # the pager token is the composite continuation token (of all feed ranges) after the page
+        continuation = pages.continuation_token or continuation
+        yield [item async for item in page], continuation
+
+    # the final empty fetch ends the iteration without updating the pager token, its composite token is written to
+    # the last response headers of the client only (response hooks only get the LSN of a single partition) - read
+    # right after the fetch, before anything else runs on the client
+    headers = container.client_connection.last_response_headers or {}
+
+    yield [], headers.get("etag") or continuation
+
+
+def subscribe(container_name: str, callback: typing.Callable[[list[dict]], typing.Awaitable[None] | None]) -> None:
+    """
+    Subscribe to changes of a container (callback is invoked with each batch of changed items).
+    :param container_name: Name of the container (e.g. CONFIG.COSMOS_DOCUMENT_CONTAINER)
+    :param callback: Callback invoked with each non-empty batch of changed items
+    :return: None
+    """
+    _subscribers.setdefault(container_name, list()).append(callback)
+
+
+async def _dispatch(container_name: str, items: list[dict]) -> None:
+    """
+    Dispatch changed items to all subscribers of the container (failing subscriber does not affect the others).
+    :param container_name: Name of the container
+    :param items: Changed items
+    :return: None
+    """
+    for callback in _subscribers.get(container_name, []):
+        try:
+            result = callback(items)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"Change feed subscriber {callback.__qualname__} of {container_name} failed: {e!r}")
+
+
+def _load_checkpoints() -> None:
+    """
+    Load persisted change feed checkpoints (if checkpoint file is configured).
+    :return: None
+    """
+    if not CONFIG.COSMOS_CHANGE_FEED_CHECKPOINT_FILE:
+        return
+
+    try:
+        with open(CONFIG.COSMOS_CHANGE_FEED_CHECKPOINT_FILE) as file:
+            _checkpoints.update(json.load(file))
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"Loading change feed checkpoints failed, starting from now: {e!r}")
+
+
+def _checkpoint(container_name: str, continuation: str | None) -> None:
+    """
+    Store change feed checkpoint of the container (and persist it if checkpoint file is configured).
+    :param container_name: Name of the container
+    :param continuation: Continuation token of the container change feed
+    :return: None
+    """
+    if continuation is None or _checkpoints.get(container_name) == continuation:
+        return
+
+    _checkpoints[container_name] = continuation
+
+    if CONFIG.COSMOS_CHANGE_FEED_CHECKPOINT_FILE:
+        try:
+            with open(CONFIG.COSMOS_CHANGE_FEED_CHECKPOINT_FILE, "w") as file:
+                json.dump(_checkpoints, file)
+        except OSError as e:
+            logger.warning(f"Persisting change feed checkpoints failed: {e!r}")
+
+
+async def follow(container_name: str, container: azure.cosmos.aio.ContainerProxy) -> typing.NoReturn:
+    """
+    Follow the container change feed (forever) from its checkpoint and dispatch changes to the subscribers.
+    :param container_name: Name of the container
+    :param container: Container to follow the change feed of
+    :return: Never returns (cancel the task to stop following)
+    """
+    while True:
+        changed = False
+
+        try:
+            # each page is dispatched and checkpointed before the next one is read
+            async for items, continuation in read_changes(container=container, continuation=_checkpoints.get(container_name)):
+                if items:
+                    changed = True
+                    await _dispatch(container_name=container_name, items=items)
+                _checkpoint(container_name=container_name, continuation=continuation)
+        except Exception as e:
+            metrics.CHANGE_FEED_FAILURES.labels(container_name).inc()
+            logger.error(f"Reading change feed of {container_name} failed: {e!r}")
+
+        if not changed:
+            await asyncio.sleep(CONFIG.COSMOS_CHANGE_FEED_POLL_INTERVAL)
+
+
+async def start() -> None:
+    """
+    Start following change feeds of the subject and document containers in the background.
+    The change feed position is taken before returning, so no change made after start is missed.
+    :return: None
+    """
+    if not CONFIG.COSMOS_CHANGE_FEED_ENABLED or _tasks:
+        return
+
+    _load_checkpoints()
+
+    containers = {
+        CONFIG.COSMOS_SUBJECT_CONTAINER: cosmos.c_subject,
+        CONFIG.COSMOS_DOCUMENT_CONTAINER: cosmos.c_document,
+    }
+
+    for container_name, container in containers.items():
+        if container_name not in _checkpoints:
+            try:
+                async for _, continuation in read_changes(container=container):
+                    _checkpoint(container_name=container_name, continuation=continuation)
+            except Exception as e:
+                logger.warning(f"Reading change feed of {container_name} failed: {e!r}")
+
+        _tasks.append(asyncio.create_task(follow(container_name=container_name, container=container)))
+
+
+async def stop() -> None:
+    """
+    Stop following change feeds.
+    :return: None
+    """
+    for task in _tasks:
+        task.cancel()
+
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
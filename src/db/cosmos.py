@@ -1,30 +1,201 @@
+import time
 import asyncio
 import typing
 import datetime as dt
 import azure.cosmos.aio
+import azure.cosmos.documents
 import azure.identity.aio
 
+from src.core import retry, request_charge, metrics
 from src.core.config import CONFIG
 
 
-client = azure.cosmos.aio.CosmosClient(
-    url=CONFIG.COSMOS_URL,
-    credential=azure.identity.aio.WorkloadIdentityCredential(
-        tenant_id=CONFIG.AZURE_TENANT_ID,
-        client_id=CONFIG.AZURE_CLIENT_ID,
-        token_file_path=CONFIG.AZURE_FEDERATED_TOKEN_FILE,
-    ),
-)
+async def _timed(operation: str, target: str, call: typing.Callable[[], typing.Awaitable]) -> typing.Any:
+    """
+    Call Cosmos operation measuring its duration
+    :param operation: Operation name
+    :param target: Container name
+    :param call: Operation call
+    :return: Result of the operation
+    """
+    start, outcome = time.perf_counter(), "ok"
+    try:
+        return await call()
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        metrics.DEPENDENCY_DURATION.labels("cosmos", operation, target, outcome).observe(time.perf_counter() - start)
 
-db = client.get_database_client(
-    database=CONFIG.COSMOS_DB,
-)
 
-c_document = db.get_container_client(
-    container=CONFIG.COSMOS_DOCUMENT_CONTAINER,
-)
+class _RetryingQuery:
+    """
+    Query results iterated through the retry policy (pages are passed through, retried by the caller)
+    """
+    def __init__(self, factory: typing.Callable[[], typing.Any], operation: str = "query_items", target: str = "") -> None:
+        self.factory = factory
+        self.operation = operation
+        self.target = target
 
-c_subject = db.get_container_client(
-    container=CONFIG.COSMOS_SUBJECT_CONTAINER,
-)
+    async def __aiter__(self) -> typing.AsyncIterator[dict]:
+        # only the time spent fetching is measured (not the time spent by the consumer)
+        iterator, elapsed, outcome = retry.iterate(self.factory, name=self.operation), 0.0, "ok"
+        try:
+            while True:
+                # a page may be fetched by any item, so the budget is checked before each
+                _check_charge()
+                start = time.perf_counter()
+                try:
+                    item = await anext(iterator)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield item
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            metrics.DEPENDENCY_DURATION.labels("cosmos", self.operation, self.target, outcome).observe(elapsed)
 
+    def by_page(self, continuation_token: str = None) -> typing.AsyncIterator[typing.AsyncIterator[dict]]:
+        return self.factory().by_page(continuation_token=continuation_token)
+
+
+def _check_charge() -> None:
+    """
+    Check request charge budget of the current request (if any) before an operation is issued
+    :return: None or raise HTTPException if the route budget is exceeded
+    """
+    if (charge := request_charge.current()) is not None:
+        charge.check()
+
+
+def _with_charge(kwargs: dict) -> dict:
+    """
+    Add response hook accumulating request charge of the current request (if any) to operation kwargs
+    (called right before the operation is issued, so the budget is checked first)
+    :param kwargs: Operation kwargs
+    :return: Operation kwargs or raise HTTPException if the route budget is exceeded
+    """
+    _check_charge()
+
+    if (hook := request_charge.response_hook(kwargs.get("response_hook"))) is None:
+        return kwargs
+
+    return {**kwargs, "response_hook": hook}
+
+
+class RetryingContainer:
+    """
+    Container proxy routing point operations and queries through the retry policy and request charge accounting
+    (other attributes, i.e. the change feed, are passed through)
+    """
+    _CALLS = {
+        "read_item", "create_item", "upsert_item", "replace_item", "patch_item", "delete_item", "execute_item_batch",
+    }
+    _QUERIES = {"query_items", "read_all_items"}
+
+    def __init__(self, container: azure.cosmos.aio.ContainerProxy, name: str) -> None:
+        """
+        :param container: Container proxy
+        :param name: Container name (for metrics)
+        """
+        self.container = container
+        self.name = name
+
+    def __getattr__(self, name: str) -> typing.Any:
+        attr = getattr(self.container, name)
+
+        if name in self._CALLS:
+            return lambda *args, **kwargs: retry.call(
+                lambda: _timed(name, self.name, lambda: attr(*args, **_with_charge(kwargs))),
+                name=name,
+            )
+        if name in self._QUERIES:
+            return lambda *args, **kwargs: _RetryingQuery(lambda: attr(*args, **_with_charge(kwargs)), name, self.name)
+
+        return attr
+
+
+_CLIENT_ATTRS = ("client", "db", "c_document", "c_subject")
+_closed = False
+
+
+def open_client(database: azure.cosmos.aio.DatabaseProxy | None = None) -> None:
+    """
+    Create the Cosmos client and the container proxies (module attributes client, db, c_document and c_subject).
+    Nothing is created on import - the client is created in the lifespan or on the first use of the attributes.
+    :param database: Database to use instead of the configured one (i.e. in-memory database of the benchmark)
+    """
+    global _credential, client, db, c_document, c_subject, _closed
+
+    _closed = False
+    if "db" in globals():
+        return
+
+    if database is None:
+        _credential = azure.identity.aio.WorkloadIdentityCredential(
+            tenant_id=CONFIG.AZURE_TENANT_ID,
+            client_id=CONFIG.AZURE_CLIENT_ID,
+            token_file_path=CONFIG.AZURE_FEDERATED_TOKEN_FILE,
+        )
+        # throttling is retried by src.core.retry (within the retry budget of the request), not by the SDK
+        # (retry_total=0 is ignored by the SDK, so the throttling retry options are set on the connection policy)
+        connection_policy = azure.cosmos.documents.ConnectionPolicy()
+        connection_policy.RetryOptions = azure.cosmos.documents.RetryOptions(max_retry_attempt_count=0)
+        client = azure.cosmos.aio.CosmosClient(
+            url=CONFIG.COSMOS_URL,
+            credential=_credential,
+            connection_policy=connection_policy,
+        )
+        database = client.get_database_client(
+            database=CONFIG.COSMOS_DB,
+        )
+    else:
+        _credential, client = None, None
+
+    db = database
+
+    c_document = RetryingContainer(
+        db.get_container_client(
+            container=CONFIG.COSMOS_DOCUMENT_CONTAINER,
+        ),
+        name=CONFIG.COSMOS_DOCUMENT_CONTAINER,
+    )
+
+    c_subject = RetryingContainer(
+        db.get_container_client(
+            container=CONFIG.COSMOS_SUBJECT_CONTAINER,
+        ),
+        name=CONFIG.COSMOS_SUBJECT_CONTAINER,
+    )
+
+
+async def close_client() -> None:
+    """
+    Close the Cosmos client (if created), the attributes cannot be used until the client is opened again
+    """
+    global _closed
+
+    _closed = True
+    _client, credential = globals().get("client"), globals().pop("_credential", None)
+
+    for name in _CLIENT_ATTRS:
+        globals().pop(name, None)
+
+    if _client is not None:
+        await _client.close()
+    if credential is not None:
+        await credential.close()
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name in _CLIENT_ATTRS:
+        # late use during shutdown (i.e. by a background task) must not create a new client which is never closed
+        if _closed:
+            raise RuntimeError(f"Cosmos client is closed, {name!r} cannot be used")
+        open_client()
+        return globals()[name]
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,4 @@
+import typing
 import pydantic
 import datetime as dt
 
@@ -10,3 +11,16 @@ class ScoreSummary(pydantic.BaseModel):
     period: dt.date
     score: float
 
+
+class ScoreJob(pydantic.BaseModel):
+    """
+    Status of a background (re)scoring job
+    """
+    subject_id: str
+    status: typing.Literal["pending", "running", "done", "failed", "cancelled"]
+    requested: dt.datetime
+    finished: dt.datetime | None = None
+    coalesced: int = 0              # number of additional requests merged into this job
+    result: ScoreSummary | None = None
+    detail: str | None = None
+
@@ -1,3 +1,5 @@
+import math
+import array
 import pydantic
 
 
@@ -19,9 +21,164 @@ class Sheet(_SheetInfo):
     doc_id: str
     items: list[list[float | int | bool | str | None]]
 
+    @classmethod
+    def from_item(cls, item: dict) -> "Sheet":
+        """
+        Create sheet from a database item without validation (sheets are validated when written and checking each cell
+        against the cell type union is the main cost of reading large sheets, system properties are dropped)
+        :param item: Raw sheet item (JSON shape)
+        :return: Sheet
+        """
+        return cls.model_construct(**item)
+
 
 class SheetCell(pydantic.BaseModel):
     row_num: int
     col_num: int
     value: float | int | bool | str | None
 
+
+class CompactSheet:
+    """
+    Compact in-memory representation of sheet data (typed column arrays with sparse table for the other cells)
+    """
+    __slots__ = ("meta", "row_lengths", "columns", "sparse")
+
+    _PLACEHOLDER = {"q": 0, "d": math.nan}
+
+    def __init__(
+        self,
+        meta: dict,
+        row_lengths: array.array,
+        columns: list[array.array],
+        sparse: dict[tuple[int, int], float | int | bool | str | None],
+    ) -> None:
+        """
+        :param meta: Sheet item without items (id, name, number, ...)
+        :param row_lengths: Number of cells of each row
+        :param columns: Column arrays (int64 for integer columns, float64 otherwise)
+        :param sparse: Cells not stored in the column arrays (strings, None, bools, ...) keyed by (row, col)
+        """
+        self.meta = meta
+        self.row_lengths = row_lengths
+        self.columns = columns
+        self.sparse = sparse
+
+    @classmethod
+    def from_item(cls, item: dict) -> "CompactSheet":
+        """
+        Create compact sheet from a raw sheet item (JSON shape).
+        :param item: Raw sheet item
+        :return: Compact sheet
+        """
+        items = item.get("items") or []
+        row_lengths = array.array("I", [len(row) for row in items])
+        columns = list()
+        sparse = dict()
+
+        for col in range(max(row_lengths, default=0)):
+            cells = [(row_num, row[col]) for row_num, row in enumerate(items) if col < len(row)]
+
+            numeric = [type(value) for _, value in cells if type(value) in (int, float)]
+            typecode, kind = ("q", int) if numeric and float not in numeric else ("d", float)
+            placeholder = cls._PLACEHOLDER[typecode]
+
+            column = array.array(typecode, [placeholder]) * len(items)
+            for row_num, value in cells:
+                if type(value) is kind and (kind is float or -2 ** 63 <= value < 2 ** 63):
+                    column[row_num] = value
+                else:
+                    sparse[(row_num, col)] = value
+            columns.append(column)
+
+        return cls(
+            meta={key: value for key, value in item.items() if key != "items"},
+            row_lengths=row_lengths,
+            columns=columns,
+            sparse=sparse,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory size of the sheet data (in bytes).
+        :return: Size in bytes
+        """
+        return (
+            self.row_lengths.itemsize * len(self.row_lengths)
+            + sum(column.itemsize * len(column) for column in self.columns)
+            + 128 * len(self.sparse)
+            + 256
+        )
+
+    def cell(self, row_num: int, col_num: int) -> float | int | bool | str | None:
+        """
+        Get cell value (negative indices are supported, i.e. cell(-1, -1) is the last cell of the last row).
+        :param row_num: Row number
+        :param col_num: Column number
+        :return: Cell value or raise IndexError if out of range
+        """
+        if row_num < 0:
+            row_num += len(self.row_lengths)
+        if not 0 <= row_num < len(self.row_lengths):
+            raise IndexError("row index out of range")
+
+        if col_num < 0:
+            col_num += self.row_lengths[row_num]
+        if not 0 <= col_num < self.row_lengths[row_num]:
+            raise IndexError("column index out of range")
+
+        if (row_num, col_num) in self.sparse:
+            return self.sparse[(row_num, col_num)]
+
+        return self.columns[col_num][row_num]
+
+    def window(self, rows: slice, cols: slice) -> list[list[float | int | bool | str | None]]:
+        """
+        Get a window of the sheet data (python-like slices, columns are sliced per row).
+        :param rows: Row range
+        :param cols: Column range
+        :return: List of rows of the window
+        """
+        return [
+            [self.cell(row_num, col_num) for col_num in range(*cols.indices(self.row_lengths[row_num]))]
+            for row_num in range(*rows.indices(len(self.row_lengths)))
+        ]
+
+    def column_sum(self, col_num: int) -> float | int:
+        """
+        Sum numeric values of a column (non-numeric cells are skipped).
+        :param col_num: Column number
+        :return: Sum of the column
+        """
+        column = self.columns[col_num]
+        extra = [
+            value for (_, col), value in self.sparse.items()
+            if col == col_num and type(value) in (int, float)
+        ]
+
+        if column.typecode == "q" and all(type(value) is int for value in extra):
+            return sum(column) + sum(extra)
+
+        return math.fsum([*(value for value in column if value == value), *extra])
+
+    def to_items(self) -> list[list[float | int | bool | str | None]]:
+        """
+        Convert sheet data back to the JSON shape (list of rows).
+        :return: List of rows
+        """
+        columns = [column.tolist() for column in self.columns]
+        items = [[columns[col][row_num] for col in range(length)] for row_num, length in enumerate(self.row_lengths)]
+
+        for (row_num, col), value in self.sparse.items():
+            items[row_num][col] = value
+
+        return items
+
+    def to_item(self) -> dict:
+        """
+        Convert compact sheet back to a raw sheet item (JSON shape).
+        :return: Raw sheet item
+        """
+        return {**self.meta, "items": self.to_items()}
+
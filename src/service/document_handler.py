@@ -1,27 +1,115 @@
+import typing
 import asyncio
 import logging
 import datetime as dt
+import azure.core
 import azure.cosmos.exceptions
 
+from src.core import request_charge
+from src.core.cache import LRUCache
 from src.core.config import CONFIG
 from src.core.exception import HTTPException
 from src.model.document import Document
-from src.model.sheet import Sheet, SheetCell
-from src.db import cosmos
+from src.model.sheet import Sheet, SheetCell, CompactSheet
+from src.db import cosmos, change_feed
 from src.service import http_handler
 
 
+logger = logging.getLogger(__name__)
+
+
+# cached values are compact sheets keyed by (subject_id, doc_id, sheet_num), expired entries are revalidated via etag
+_sheet_cache = LRUCache(
+    name="sheet",
+    max_size=CONFIG.SHEET_CACHE_SIZE,
+    ttl=CONFIG.SHEET_CACHE_TTL,
+    sizeof=lambda sheet: sheet.nbytes,
+)
+
+
+def _on_changes(items: list[dict]) -> None:
+    """
+    Refresh cached sheets changed by any writer (from the change feed).
+    :param items: Changed document container items
+    :return: None
+    """
+    for item in items:
+        if item.get("_type") != "sheet":
+            continue
+
+        key = (item["subject_id"], item["doc_id"], item["number"])
+        cached = _sheet_cache.peek(key) is not None
+        _sheet_cache.update(key, CompactSheet.from_item(item) if cached else None)
+
+
+change_feed.subscribe(CONFIG.COSMOS_DOCUMENT_CONTAINER, _on_changes)
+
+
+async def read_compact_sheet(subject_id: str, document_id: str, sheet_num: int, sheet_id: str) -> CompactSheet:
+    """
+    Read sheet by ID as compact sheet (through the sheet cache)
+    :param subject_id: ID of the subject
+    :param document_id: ID of the document
+    :param sheet_num: Sheet number
+    :param sheet_id: ID of the sheet
+    :return: Compact sheet
+    """
+    key = (subject_id, document_id, sheet_num)
+
+    if cached := _sheet_cache.get(key):
+        return cached
+
+    stale, writes = _sheet_cache.peek(key), _sheet_cache.writes
+    etag = stale.meta.get("_etag") if stale else None
+
+    try:
+        sheet = await cosmos.c_document.read_item(
+            item=sheet_id,
+            partition_key=subject_id,
+            **({"etag": etag, "match_condition": azure.core.MatchConditions.IfModified} if etag else {}),
+        )
+    except azure.cosmos.exceptions.CosmosHttpResponseError:
+        _sheet_cache.invalidate(key)
+        raise
+
+    # empty response means the sheet was not modified (HTTP 304)
+    compact = stale if etag and not sheet else CompactSheet.from_item(sheet)
+    _sheet_cache.fill(key, compact, writes=writes)
+
+    return compact
+
+
+async def read_sheet_item(subject_id: str, document_id: str, sheet_num: int, sheet_id: str) -> dict:
+    """
+    Read raw sheet item by ID (through the sheet cache)
+    :param subject_id: ID of the subject
+    :param document_id: ID of the document
+    :param sheet_num: Sheet number
+    :param sheet_id: ID of the sheet
+    :return: Raw sheet item
+    """
+    compact = await read_compact_sheet(subject_id=subject_id, document_id=document_id, sheet_num=sheet_num, sheet_id=sheet_id)
+
+    return compact.to_item()
+
+
 async def get_documents(subject_id: str) -> list[Document]:
     """
     Get documents for a subject
     :param subject_id: ID of the subject
     :return: List of documents for the subject
     """
-    return [
-        Document(**doc)
-        async for doc
-        in cosmos.c_document.query_items(query="SELECT * FROM c WHERE c._type = 'doc'", partition_key=subject_id)
-    ]
+    return [doc async for doc in iter_documents(subject_id=subject_id)]
+
+
+async def iter_documents(subject_id: str) -> typing.AsyncIterator[Document]:
+    """
+    Iterate documents for a subject (streamed as they arrive from the database)
+    :param subject_id: ID of the subject
+    :return: Async iterator of documents for the subject
+    """
+    async for doc in cosmos.c_document.query_items(query="SELECT * FROM c WHERE c._type = 'doc'", partition_key=subject_id):
+        yield Document(**doc)
 
 
 async def get_document(subject_id: str, document_id: str) -> Document:
@@ -32,7 +120,7 @@ async def get_document(subject_id: str, document_id: str) -> Document:
     :return: Document object or raise HTTPException if not found
     """
     try:
-        return await cosmos.c_document.read_item(
+        doc = await cosmos.c_document.read_item(
             item=document_id,
             partition_key=subject_id,
         )
@@ -44,16 +132,19 @@ async def get_document(subject_id: str, document_id: str) -> Document:
             logger_msg=str(e.reason),
         )
 
+    return Document.model_validate(doc)
+
 
 async def get_document_sheets(subject_id: str, document_id: str) -> list[Sheet]:
     """
-    Get document sheets
+    Get document sheets (the read sheets are filled in the sheet cache)
     :param subject_id: ID of the subject
     :param document_id: ID of the document
-    :return: List of document sheets
+    :return: List of document sheets (empty if the document does not exist)
     """
-    return [
-        Sheet(**sheet)
+    writes = _sheet_cache.writes
+    sheets = [
+        sheet
         async for sheet
         in cosmos.c_document.query_items(
             query="SELECT * FROM c WHERE c._type = 'sheet' AND c.doc_id = @doc_id",
@@ -64,6 +155,28 @@ async def get_document_sheets(subject_id: str, document_id: str) -> list[Sheet]:
         )
     ]
 
+    for sheet in sheets:
+        _sheet_cache.fill((subject_id, document_id, sheet["number"]), CompactSheet.from_item(sheet), writes=writes)
+
+    return [Sheet.from_item(sheet) for sheet in sheets]
+
+
+async def iter_document_sheets(subject_id: str, document_id: str) -> typing.AsyncIterator[Sheet]:
+    """
+    Iterate document sheets (streamed as they arrive from the database, bypassing the sheet cache)
+    :param subject_id: ID of the subject
+    :param document_id: ID of the document
+    :return: Async iterator of document sheets
+    """
+    async for sheet in cosmos.c_document.query_items(
+        query="SELECT * FROM c WHERE c._type = 'sheet' AND c.doc_id = @doc_id",
+        parameters=[
+            {"name": "@doc_id", "value": document_id},
+        ],
+        partition_key=subject_id,
+    ):
+        yield Sheet.from_item(sheet)
+
 
 async def get_document_sheet(subject_id: str, document_id: str, sheet_num: int) -> Sheet:
     """
@@ -73,8 +186,22 @@ async def get_document_sheet(subject_id: str, document_id: str, sheet_num: int)
     :param sheet_num: Sheet number
     :return: Document sheet object or None if not found
     """
+    if stale := _sheet_cache.peek((subject_id, document_id, sheet_num)):
+        try:
+            return Sheet.from_item(
+                await read_sheet_item(
+                    subject_id=subject_id,
+                    document_id=document_id,
+                    sheet_num=sheet_num,
+                    sheet_id=stale.meta["id"],
+                )
+            )
+        except azure.cosmos.exceptions.CosmosResourceNotFoundError:
+            pass
+
+    writes = _sheet_cache.writes
     sheets = [
-        Sheet(**sheet)
+        sheet
         async for sheet
         in cosmos.c_document.query_items(
             query="SELECT * FROM c WHERE c._type = 'sheet' AND c.doc_id = @doc_id AND c.number = @sheet_num",
@@ -86,6 +213,66 @@ async def get_document_sheet(subject_id: str, document_id: str, sheet_num: int)
         )
     ]
 
+    if not sheets:
+        raise HTTPException(
+            status_code=404,
+            logger_name=__name__,
+            logger_lvl=logging.INFO
+        )
+
+    _sheet_cache.fill((subject_id, document_id, sheet_num), CompactSheet.from_item(sheets[0]), writes=writes)
+
+    return Sheet.from_item(sheets[0])
+
+
+_PATCH_OPERATIONS_LIMIT = 10  # operations per patch (Cosmos limit)
+_BATCH_OPERATIONS_LIMIT = 100  # operations per transactional batch (Cosmos limit)
+_SHEET_FIELDS = "c.id, c.name, c.number, c._type, c.subject_id, c.doc_id, c._etag"
+
+
+def _slice_expr(expr: str, bounds: slice) -> tuple[str, slice]:
+    """
+    Build Cosmos expression slicing an array expression (slices mixing negative and non-negative bounds
+    cannot be expressed without the array length, those are returned as residual slice applied on the result)
+    :param expr: Array expression
+    :param bounds: Python-like slice (without step)
+    :return: Sliced array expression and residual slice
+    """
+    start = bounds.start or 0
+
+    if bounds.start is None and bounds.stop is None:
+        return expr, slice(None)
+    if bounds.stop is None:
+        return f"ARRAY_SLICE({expr}, {start})", slice(None)
+    if (start < 0) == (bounds.stop < 0):
+        return f"ARRAY_SLICE({expr}, {start}, {max(bounds.stop - start, 0)})", slice(None)
+
+    return expr, bounds
+
+
+async def _query_sheet(subject_id: str, document_id: str, sheet_num: int, projection: str) -> dict:
+    """
+    Query sheet by number with projection of the sheet data
+    :param subject_id: ID of the subject
+    :param document_id: ID of the document
+    :param sheet_num: Sheet number
+    :param projection: Projection of the sheet data (appended to the sheet fields)
+    :return: Projected sheet item or raise HTTPException if not found
+    """
+    sheets = [
+        sheet
+        async for sheet
+        in cosmos.c_document.query_items(
+            query=f"SELECT {_SHEET_FIELDS}, {projection} FROM c "
+                  f"WHERE c._type = 'sheet' AND c.doc_id = @doc_id AND c.number = @sheet_num",
+            parameters=[
+                {"name": "@doc_id", "value": document_id},
+                {"name": "@sheet_num", "value": sheet_num},
+            ],
+            partition_key=subject_id,
+        )
+    ]
+
     if not sheets:
         raise HTTPException(
             status_code=404,
@@ -96,36 +283,230 @@ async def get_document_sheet(subject_id: str, document_id: str, sheet_num: int)
     return sheets[0]
 
 
-async def patch_sheet_data(
+_filling: dict[tuple, asyncio.Task] = dict()
+
+
+def _fill_sheet(subject_id: str, document_id: str, sheet_num: int, sheet_id: str) -> None:
+    """
+    Read the whole sheet into the sheet cache in background (after a projected read missed the cache, so the
+    following reads of the sheet are served from the cache), at most one read per sheet and SHEET_CACHE_FILLS reads
+    in total at a time (misses beyond that are not filled)
+    :param subject_id: ID of the subject
+    :param document_id: ID of the document
+    :param sheet_num: Sheet number
+    :param sheet_id: ID of the sheet
+    :return: None
+    """
+    key = (subject_id, document_id, sheet_num)
+    if key in _filling or len(_filling) >= CONFIG.SHEET_CACHE_FILLS:
+        return
+
+    # fresh context, the retry budget of the request which missed the cache is not inherited, the read is charged to it
+    task = asyncio.create_task(
+        read_compact_sheet(subject_id=subject_id, document_id=document_id, sheet_num=sheet_num, sheet_id=sheet_id),
+        context=request_charge.detached(request_charge.current()),
+    )
+    _filling[key] = task
+    task.add_done_callback(lambda _: _filled(key, task))
+
+
+def _filled(key: tuple, task: asyncio.Task) -> None:
+    """
+    Forget finished background read of the sheet (failures are only logged, the next miss tries again)
+    :param key: Sheet cache key
+    :param task: Finished read
+    :return: None
+    """
+    if _filling.get(key) is task:
+        del _filling[key]
+
+    if not task.cancelled() and (exc := task.exception()) is not None:
+        logger.warning(f"Background read of sheet {key} failed: {exc!r}")
+
+
+async def get_document_sheet_window(
     subject_id: str,
     document_id: str,
     sheet_num: int,
-    cell_data: list[SheetCell],
-) -> Sheet:
+    rows: slice = slice(None),
+    cols: slice = slice(None),
+    fill: bool = True,
+) -> tuple[Sheet, int]:
     """
-    Update sheet data
+    Get a row/column window of document sheet (served from the sheet cache if fresh, otherwise only the window
+    is projected by the database and the whole sheet is read into the cache in background)
     :param subject_id: ID of the subject
     :param document_id: ID of the document
     :param sheet_num: Sheet number
-    :param cell_data: List of cell data to update
-    :return: Updated sheet object
-    """
-    sheet = await get_document_sheet(subject_id=subject_id, document_id=document_id, sheet_num=sheet_num)
-    await asyncio.gather(
-        *[
-            cosmos.c_document.patch_item(
-                item=sheet.id,
-                partition_key=subject_id,
-                patch_operations=[
-                    {"op": "set", "path": f"/items/{cell.row_num}/{cell.col_num}", "value": cell.value}
-                    for cell in cell_data[i:i + 10]
-                ]
+    :param rows: Row range (python-like slice, negative bounds count from the end)
+    :param cols: Column range (python-like slice applied to each row)
+    :param fill: Whether to read the whole sheet into the cache on miss (off for sheets unlikely to be read again)
+    :return: Document sheet with windowed items and total number of rows or raise HTTPException if not found
+    """
+    if cached := _sheet_cache.get((subject_id, document_id, sheet_num)):
+        return Sheet.from_item({**cached.meta, "items": cached.window(rows=rows, cols=cols)}), len(cached.row_lengths)
+
+    # Cosmos accepts only a property path as the source of IN, the columns are projected first, then the rows sliced
+    cols_expr, cols_rest = _slice_expr("r", cols)
+    rows_source = "c.items" if cols_expr == "r" else f"ARRAY(SELECT VALUE {cols_expr} FROM r IN c.items)"
+    items_expr, rows_rest = _slice_expr(rows_source, rows)
+
+    sheet = await _query_sheet(
+        subject_id=subject_id,
+        document_id=document_id,
+        sheet_num=sheet_num,
+        projection=f"{items_expr} AS items, ARRAY_LENGTH(c.items) AS row_count",
+    )
+    items = [row[cols_rest] for row in sheet.pop("items")[rows_rest]]
+    if fill:
+        _fill_sheet(subject_id=subject_id, document_id=document_id, sheet_num=sheet_num, sheet_id=sheet["id"])
+
+    return Sheet.from_item({**sheet, "items": items}), sheet["row_count"]
+
+
+async def get_document_sheet_cells(
+    subject_id: str,
+    document_id: str,
+    sheet_num: int,
+    cells: list[tuple[int, int]],
+) -> list[SheetCell]:
+    """
+    Get selected cells of document sheet (served from the sheet cache if fresh, otherwise only the cells
+    are projected by the database and the whole sheet is read into the cache in background)
+    :param subject_id: ID of the subject
+    :param document_id: ID of the document
+    :param sheet_num: Sheet number
+    :param cells: List of (row_num, col_num) coordinates (non-negative)
+    :return: List of sheet cells (cells outside the sheet are omitted) or raise HTTPException if not found
+    """
+    if cached := _sheet_cache.get((subject_id, document_id, sheet_num)):
+        values = dict()
+        for i, (row_num, col_num) in enumerate(cells):
+            try:
+                values[f"c{i}"] = cached.cell(row_num, col_num)
+            except IndexError:
+                pass
+    else:
+        sheet = await _query_sheet(
+            subject_id=subject_id,
+            document_id=document_id,
+            sheet_num=sheet_num,
+            projection="{"
+                       + ", ".join(f'"c{i}": c.items[{row_num}][{col_num}]' for i, (row_num, col_num) in enumerate(cells))
+                       + "} AS cells",
+        )
+        values = sheet["cells"]
+        _fill_sheet(subject_id=subject_id, document_id=document_id, sheet_num=sheet_num, sheet_id=sheet["id"])
+
+    return [
+        SheetCell(row_num=row_num, col_num=col_num, value=values[f"c{i}"])
+        for i, (row_num, col_num) in enumerate(cells)
+        if f"c{i}" in values
+    ]
+
+
+async def _sheet_guard(subject_id: str, document_id: str, sheet_num: int) -> tuple[str, str]:
+    """
+    Get sheet ID and current _etag (from the sheet cache if fresh, otherwise without reading the sheet data)
+    :param subject_id: ID of the subject
+    :param document_id: ID of the document
+    :param sheet_num: Sheet number
+    :return: Sheet ID and _etag or raise HTTPException if not found
+    """
+    if cached := _sheet_cache.get((subject_id, document_id, sheet_num)):
+        return cached.meta["id"], cached.meta.get("_etag")
+
+    sheet = await _query_sheet(
+        subject_id=subject_id,
+        document_id=document_id,
+        sheet_num=sheet_num,
+        projection="ARRAY_LENGTH(c.items) AS row_count",
+    )
+
+    return sheet["id"], sheet["_etag"]
+
+
+async def _execute_patch(subject_id: str, sheet_id: str, etag: str, cell_data: list[SheetCell]) -> dict:
+    """
+    Apply cell updates as a single transactional batch of patch operations (guarded by the sheet _etag if provided)
+    :param subject_id: ID of the subject
+    :param sheet_id: ID of the sheet
+    :param etag: Expected sheet _etag (optional - if not provided, the last write wins)
+    :param cell_data: List of cell data to update (at most _BATCH_OPERATIONS_LIMIT * _PATCH_OPERATIONS_LIMIT cells)
+    :return: Post-image of the sheet after the write
+    """
+    results = await cosmos.c_document.execute_item_batch(
+        batch_operations=[
+            (
+                "patch",
+                (
+                    sheet_id,
+                    [
+                        {"op": "set", "path": f"/items/{cell.row_num}/{cell.col_num}", "value": cell.value}
+                        for cell in cell_data[i:i + _PATCH_OPERATIONS_LIMIT]
+                    ],
+                ),
+                {"if_match_etag": etag} if etag and i == 0 else {},
             )
-            for i in range(0, len(cell_data), 10)
-        ]
+            for i in range(0, len(cell_data), _PATCH_OPERATIONS_LIMIT)
+        ],
+        partition_key=subject_id,
     )
 
-    return await get_document_sheet(subject_id=subject_id, document_id=document_id, sheet_num=sheet_num)
+    return results[-1]["resourceBody"]
+
+
+async def patch_sheet_data(
+    subject_id: str,
+    document_id: str,
+    sheet_num: int,
+    cell_data: list[SheetCell],
+    etag: str = None,
+) -> tuple[Sheet, str]:
+    """
+    Update sheet data (a single transactional batch, so the update is applied entirely or not at all)
+    :param subject_id: ID of the subject
+    :param document_id: ID of the document
+    :param sheet_num: Sheet number
+    :param cell_data: List of cell data to update (up to 1000 cells)
+    :param etag: Expected sheet _etag (optional - if not provided, the last write wins)
+    :return: Updated sheet object and its _etag or raise HTTPException (412 if the sheet does not match the etag,
+        413 if there are more cells than fit into one transactional batch)
+    """
+    key = (subject_id, document_id, sheet_num)
+
+    if len(cell_data) > _BATCH_OPERATIONS_LIMIT * _PATCH_OPERATIONS_LIMIT:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many cells in one update ({len(cell_data)} > {_BATCH_OPERATIONS_LIMIT * _PATCH_OPERATIONS_LIMIT}), split the update",
+            logger_name=__name__,
+            logger_lvl=logging.INFO,
+        )
+
+    if not cell_data:
+        sheet = await get_document_sheet(subject_id=subject_id, document_id=document_id, sheet_num=sheet_num)
+        cached = _sheet_cache.peek(key)
+        return sheet, cached.meta.get("_etag") if cached else None
+
+    if etag and (stale := _sheet_cache.peek(key)):
+        sheet_id = stale.meta["id"]
+    else:
+        sheet_id, _ = await _sheet_guard(subject_id=subject_id, document_id=document_id, sheet_num=sheet_num)
+
+    try:
+        post_image = await _execute_patch(subject_id=subject_id, sheet_id=sheet_id, etag=etag, cell_data=cell_data)
+    except (azure.cosmos.exceptions.CosmosHttpResponseError, azure.cosmos.exceptions.CosmosBatchOperationError) as e:
+        _sheet_cache.update(key)
+        raise HTTPException(
+            status_code=e.status_code,
+            logger_name=__name__,
+            logger_lvl=logging.INFO,
+            logger_msg=str(e.message),
+        )
+
+    _sheet_cache.update(key, CompactSheet.from_item(post_image))
+
+    return Sheet.from_item(post_image), post_image["_etag"]
 
 
 async def refresh_documents(
@@ -1,25 +1,118 @@
+import time
 import aiohttp
 
+from src.core import retry, metrics
+from src.core.config import CONFIG
 from src.core.exception import HTTPException
 
 
-async def post_data(url: str, data: dict | list[dict], correlation_id: str | None = None) -> str | dict:
+_session: aiohttp.ClientSession | None = None
+
+
+def _resolve_timeout(url: str) -> aiohttp.ClientTimeout:
+    """
+    Resolve request timeout based on the target downstream service.
+    :param url: Target URL
+    :return: Timeout configuration for the target service
+    """
+    timeouts = {
+        CONFIG.MODEL_SERVICE_URL: CONFIG.MODEL_SERVICE_TIMEOUT,
+        CONFIG.ONLINE_DATA_SERVICE_URL: CONFIG.ONLINE_DATA_SERVICE_TIMEOUT,
+        CONFIG.EXPORT_SERVICE_URL: CONFIG.EXPORT_SERVICE_TIMEOUT,
+    }
+    total = next((timeout for prefix, timeout in timeouts.items() if url.startswith(prefix)), CONFIG.HTTP_TIMEOUT)
+
+    return aiohttp.ClientTimeout(total=total, connect=CONFIG.HTTP_CONNECT_TIMEOUT)
+
+
+def _resolve_service(url: str) -> str:
     """
-    Post data to the specified URL.
+    Resolve name of the target downstream service (for metrics).
+    :param url: Target URL
+    :return: Service name
+    """
+    services = {
+        CONFIG.MODEL_SERVICE_URL: "model",
+        CONFIG.ONLINE_DATA_SERVICE_URL: "online-data",
+        CONFIG.EXPORT_SERVICE_URL: "export",
+    }
+
+    return next((service for prefix, service in services.items() if url.startswith(prefix)), "other")
+
+
+async def open_session() -> aiohttp.ClientSession:
+    """
+    Open the shared (pooled) HTTP session, if not opened yet.
+    :return: Shared HTTP session
+    """
+    global _session
+
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=CONFIG.HTTP_POOL_LIMIT,
+                limit_per_host=CONFIG.HTTP_POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=CONFIG.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=CONFIG.HTTP_KEEPALIVE_TIMEOUT,
+            ),
+            timeout=aiohttp.ClientTimeout(total=CONFIG.HTTP_TIMEOUT, connect=CONFIG.HTTP_CONNECT_TIMEOUT),
+        )
+
+    return _session
+
+
+async def close_session() -> None:
+    """
+    Close the shared HTTP session (and all pooled connections).
+    :return: None
+    """
+    global _session
+
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+async def post_data(
+    url: str,
+    data: dict | list[dict],
+    correlation_id: str | None = None,
+    idempotent: bool = False,
+) -> str | dict:
+    """
+    Post data to the specified URL (transient failures are retried, see retry).
     :param url: Target URL
     :param data: JSON data to be posted
     :param correlation_id: Correlation ID for tracing the request
+    :param idempotent: Whether the request is safe to repeat (only then gateway errors 502/504 are retried,
+        otherwise only throttled / unavailable requests 429/503 and connection errors)
     :return: Response text from the API
     """
-    async with (
-        aiohttp.ClientSession() as async_session,
-        async_session.post(url=url, headers={"Correlation-Id": correlation_id}, json=data) as response,
-    ):
-        if response.status < 200 or response.status > 299:
-            raise HTTPException(
-                status_code=response.status,
-                detail=f"Request to {url} failed: {response.reason}",
-                logger_name=__name__,
-            )
-
-        return await response.json()
+    session = await open_session()
+    service = _resolve_service(url)
+
+    async def _post() -> str | dict:
+        start, outcome = time.perf_counter(), "error"
+        try:
+            async with session.post(
+                url=url,
+                headers={"Correlation-Id": correlation_id},
+                json=data,
+                timeout=_resolve_timeout(url),
+            ) as response:
+                if response.status < 200 or response.status > 299:
+                    raise HTTPException(
+                        status_code=response.status,
+                        detail=f"Request to {url} failed: {response.reason}",
+                        headers={"Retry-After": response.headers["Retry-After"]} if "Retry-After" in response.headers else None,
+                        logger_name=__name__,
+                    )
+
+                result = await response.json()
+                outcome = "ok"
+
+                return result
+        finally:
+            metrics.DEPENDENCY_DURATION.labels("http", "POST", service, outcome).observe(time.perf_counter() - start)
+
+    return await retry.call(_post, name=f"POST {url}", idempotent=idempotent)
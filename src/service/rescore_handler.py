@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import datetime as dt
+
+from src.model.score import ScoreJob
+from src.core import request_charge
+from src.core.config import CONFIG
+from src.core.exception import HTTPException
+from src.service import score_handler
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    """
+    Background rescoring job of a single subject (edits within debounce window are coalesced into one run)
+    """
+
+    def __init__(self, subject_id: str, correlation_id: str | None, previous: "_Job | None") -> None:
+        self.info = ScoreJob(subject_id=subject_id, status="pending", requested=dt.datetime.now(dt.timezone.utc))
+        self.correlation_id = correlation_id
+        self.previous = previous
+        self.created = asyncio.get_running_loop().time()
+        self.deadline = self.created + CONFIG.RESCORE_DEBOUNCE
+        self.done = asyncio.Event()
+        # fresh context, the request charge and retry budget of the scheduling request are not inherited
+        self.task = asyncio.create_task(self._run(), context=request_charge.detached())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        try:
+            while (delay := self.deadline - loop.time()) > 0:
+                await asyncio.sleep(delay)
+
+            # runs of the same subject never overlap, the next one starts after the previous has finished
+            if self.previous is not None:
+                await self.previous.done.wait()
+                self.previous = None
+
+            self.info.status = "running"
+            self.info.result = await score_handler.trigger_score(
+                subject_id=self.info.subject_id,
+                correlation_id=self.correlation_id,
+            )
+            self.info.status = "done"
+        except asyncio.CancelledError:
+            self.info.status = "cancelled"
+            raise
+        except Exception as e:
+            logger.warning(f"Rescoring of subject {self.info.subject_id} failed: {e!r}")
+            self.info.status = "failed"
+            self.info.detail = e.detail if isinstance(e, HTTPException) else str(e)
+        finally:
+            self.info.finished = dt.datetime.now(dt.timezone.utc)
+            self.done.set()
+            asyncio.get_running_loop().call_later(CONFIG.RESCORE_JOB_TTL, _forget, self)
+
+    def postpone(self) -> None:
+        """
+        Move the deadline by the debounce window (at most RESCORE_MAX_DELAY after the job was requested)
+        """
+        self.deadline = min(
+            asyncio.get_running_loop().time() + CONFIG.RESCORE_DEBOUNCE,
+            self.created + CONFIG.RESCORE_MAX_DELAY,
+        )
+        self.info.coalesced += 1
+
+
+_jobs: dict[str, _Job] = dict()
+
+
+def _forget(job: _Job) -> None:
+    """
+    Remove finished job (unless a newer job of the subject was scheduled since)
+    """
+    if _jobs.get(job.info.subject_id) is job:
+        del _jobs[job.info.subject_id]
+
+
+def schedule_rescore(subject_id: str, correlation_id: str | None = None) -> ScoreJob:
+    """
+    Schedule (debounced) background rescoring of a subject
+    :param subject_id: ID of the subject
+    :param correlation_id: Correlation ID for tracing
+    :return: Status of the scheduled job
+    """
+    job = _jobs.get(subject_id)
+
+    if job is not None and job.info.status == "pending":
+        job.postpone()
+        return job.info
+
+    job = _Job(subject_id=subject_id, correlation_id=correlation_id, previous=job)
+    _jobs[subject_id] = job
+
+    return job.info
+
+
+async def get_job(subject_id: str, wait: float | None = None) -> ScoreJob:
+    """
+    Get status of the latest rescoring job of a subject
+    :param subject_id: ID of the subject
+    :param wait: Time (in seconds) to wait for the job to finish (optional)
+    :return: Status of the job or raise HTTPException if there is no job
+    """
+    job = _jobs.get(subject_id)
+
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            logger_name=__name__,
+            logger_lvl=logging.INFO,
+        )
+
+    if wait:
+        try:
+            await asyncio.wait_for(asyncio.shield(job.done.wait()), timeout=wait)
+        except TimeoutError:
+            pass
+
+    return job.info
+
+
+async def shutdown() -> None:
+    """
+    Cancel all unfinished rescoring jobs.
+    :return: None
+    """
+    tasks = [job.task for job in _jobs.values() if not job.task.done()]
+    for task in tasks:
+        task.cancel()
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _jobs.clear()
@@ -1,25 +1,182 @@
+import json
+import typing
 import asyncio
+import hashlib
+import logging
 import datetime as dt
 
 from src.model.document import Document, FullDocument
-from src.model.sheet import Sheet
+from src.model.sheet import _SheetInfo
 from src.model.score import ScoreSummary
 
+from src.core import request_charge
+from src.core.cache import LRUCache
 from src.core.config import CONFIG
+from src.core.exception import HTTPException
 from src.db import cosmos
-from src.service import http_handler
+from src.service import document_handler, http_handler
+
+
+# cached values are score summaries keyed by (subject_id, fingerprint of the scoring inputs)
+_score_cache = LRUCache(name="score", max_size=CONFIG.SCORE_CACHE_SIZE, ttl=CONFIG.SCORE_CACHE_TTL)
+
+
+async def _read_item(subject_id: str, item_id: str, semaphore: asyncio.Semaphore) -> dict:
+    """
+    Read a single item from the document container (within shared concurrency limit)
+    :param subject_id: ID of the subject
+    :param item_id: ID of the item
+    :param semaphore: Semaphore limiting the number of reads in flight
+    :return: Raw item data
+    """
+    async with semaphore:
+        return await cosmos.c_document.read_item(item=item_id, partition_key=subject_id)
+
+
+async def _read_sheet(subject_id: str, document_id: str, sheet: _SheetInfo, semaphore: asyncio.Semaphore) -> dict:
+    """
+    Read a single sheet through the sheet cache (within shared concurrency limit)
+    :param subject_id: ID of the subject
+    :param document_id: ID of the document
+    :param sheet: Sheet information (ID and number)
+    :param semaphore: Semaphore limiting the number of reads in flight
+    :return: Raw sheet data
+    """
+    async with semaphore:
+        return await document_handler.read_sheet_item(
+            subject_id=subject_id,
+            document_id=document_id,
+            sheet_num=sheet.number,
+            sheet_id=sheet.id,
+        )
+
+
+async def _read_scores(subject_id: str, score_docs: list[Document], concurrency: int) -> list:
+    """
+    Read scores (last cell of the first sheet of each scoring document) concurrently (with bounded fan-out)
+    :param subject_id: ID of the subject
+    :param score_docs: Scoring documents
+    :param concurrency: Maximum number of reads in flight
+    :return: List of scores (in the same order as score_docs)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _read_score(doc: Document):
+        async with semaphore:
+            return await _read_score_cell(subject_id=subject_id, doc=doc)
+
+    return await asyncio.gather(*[_read_score(doc) for doc in score_docs])
+
+
+async def _read_score_cell(subject_id: str, doc: Document):
+    """
+    Read score (last cell of the first sheet) of a scoring document (only the cell window is read, the whole
+    sheet is not read into the cache, so the request charge scales with the number of documents only)
+    :param subject_id: ID of the subject
+    :param doc: Scoring document
+    :return: Score value
+    """
+    sheet, _ = await document_handler.get_document_sheet_window(
+        subject_id=subject_id,
+        document_id=doc.id,
+        sheet_num=doc.sheets[0].number,
+        rows=slice(-1, None),
+        cols=slice(-1, None),
+        fill=False,
+    )
+
+    return sheet.items[-1][-1]
+
+
+async def _select_documents(subject_id: str) -> typing.AsyncIterator[dict]:
+    """
+    Select documents required for scoring (latest version of the 3 newest periods per layer-1 document type)
+    :param subject_id: ID of the subject
+    :return: Async iterator of selected document candidates (id, type_key, period, version and sheets)
+    """
+    periods = dict()
+    candidates = dict()
+    current_period = None
+
+    def _flush() -> list[dict]:
+        selected = [
+            candidate for type_key, candidate in candidates.items()
+            if len(periods.setdefault(type_key, set())) < 3
+        ]
+        for candidate in selected:
+            periods[candidate["type_key"]].add(candidate["period"])
+        return selected
+
+    # only a small projection is queried, full documents are read just for the selected candidates
+    async for candidate in cosmos.c_document.query_items(
+        query="SELECT c.id, c.type.key AS type_key, c.period, c.version.version AS version, c.sheets FROM c "
+              "WHERE c._type = 'doc' "
+              "AND c.type.layer = 1 "
+              "AND c.period >= @min_period "
+              "ORDER BY c.period DESC",
+        parameters=[
+            {"name": "@min_period", "value": dt.date(dt.date.today().year - 4, 12, 31).isoformat()},
+        ],
+        partition_key=subject_id,
+    ):
+        # results are ordered by period, so candidates of the previous period are final once the period changes
+        if candidate["period"] != current_period:
+            for selected in _flush():
+                yield selected
+            candidates, current_period = dict(), candidate["period"]
+
+        best = candidates.get(candidate["type_key"])
+        if best is None or candidate["version"] > best["version"]:
+            candidates[candidate["type_key"]] = candidate
+
+    for selected in _flush():
+        yield selected
+
+
+async def _assemble_document(subject_id: str, candidate: dict, semaphore: asyncio.Semaphore) -> dict:
+    """
+    Assemble full document payload (document with all its sheets) for the model service
+    :param subject_id: ID of the subject
+    :param candidate: Selected document candidate (see _select_documents)
+    :param semaphore: Semaphore limiting the number of reads in flight
+    :return: Full document payload
+    """
+    doc, *sheets = await asyncio.gather(
+        _read_item(subject_id, candidate["id"], semaphore),
+        *[_read_sheet(subject_id, candidate["id"], _SheetInfo(**sheet), semaphore) for sheet in candidate["sheets"]],
+    )
+
+    return {**Document(**doc).model_dump(mode="json", by_alias=True), "sheets": sheets}
+
+
+def _fingerprint(required_docs: list[dict]) -> str:
+    """
+    Compute fingerprint of the scoring inputs (document IDs, versions and sheet etags)
+    :param required_docs: Full document payloads for the model service
+    :return: Fingerprint (hex digest)
+    """
+    return hashlib.sha256(
+        json.dumps(
+            [
+                [doc["id"], doc["version"]["version"], [sheet.get("_etag") for sheet in doc["sheets"]]]
+                for doc in required_docs
+            ]
+        ).encode()
+    ).hexdigest()
 
 
 async def get_score_history(
     subject_id: str,
     date_from: dt.datetime = None,
     date_to: dt.datetime = None,
+    concurrency: int = None,
 ) -> list[ScoreSummary]:
     """
     Get the score history for a subject
     :param subject_id: ID of the subject
     :param date_from: Start date for the score history
     :param date_to: End date for the score history
+    :param concurrency: Maximum number of sheet reads in flight (optional - defaults to COSMOS_READ_CONCURRENCY)
     :return: List of historical calculations
     """
     score_docs = [
@@ -40,53 +197,142 @@ async def get_score_history(
         )
     ]
 
-    score_sheets = [
-        Sheet(**await cosmos.c_document.read_item(item=doc.sheets[0].id, partition_key=subject_id))
-        for doc in score_docs
-    ]
+    scores = await _read_scores(
+        subject_id=subject_id,
+        score_docs=score_docs,
+        concurrency=concurrency or CONFIG.COSMOS_READ_CONCURRENCY,
+    )
 
     return [
         ScoreSummary(
             created=doc.version.created,
             period=doc.period,
-            score=sheet.items[-1][-1],
+            score=score,
+        )
+        for doc, score in zip(score_docs, scores)
+    ]
+
+
+async def get_latest_score(subject_id: str) -> ScoreSummary:
+    """
+    Get the most recent score for a subject (single document query + single score cell read)
+    :param subject_id: ID of the subject
+    :return: Most recent score summary or raise HTTPException if not found
+    """
+    score_docs = [
+        Document(**doc)
+        async for doc
+        in cosmos.c_document.query_items(
+            query="SELECT TOP 1 * FROM c "
+                  "WHERE c._type = 'doc' "
+                  "AND c.type.key = 'FC' "
+                  "ORDER BY c.version.created DESC",
+            partition_key=subject_id,
         )
-        for doc, sheet in zip(score_docs, score_sheets)
     ]
 
+    if not score_docs:
+        raise HTTPException(
+            status_code=404,
+            logger_name=__name__,
+            logger_lvl=logging.INFO,
+        )
+
+    doc = score_docs[0]
+
+    return ScoreSummary(
+        created=doc.version.created,
+        period=doc.period,
+        score=await _read_score_cell(subject_id=subject_id, doc=doc),
+    )
+
+
+class _Flight:
+    """
+    In-flight score calculation shared by all concurrent callers for the same subject
+    """
+
+    def __init__(self, task: asyncio.Task, charge: request_charge.RequestCharge) -> None:
+        self.task = task
+        self.charge = charge
+        self.waiters = 0
+
+
+_flights: dict[str, _Flight] = dict()
+
+
+def _forget_flight(subject_id: str, flight: _Flight) -> None:
+    """
+    Remove finished or cancelled flight (unless a newer flight of the subject was started since)
+    """
+    if _flights.get(subject_id) is flight:
+        del _flights[subject_id]
+
 
 async def trigger_score(subject_id: str, correlation_id: str | None = None) -> ScoreSummary:
     """
-    Trigger calculation of scoring document
+    Trigger calculation of scoring document (concurrent calls for the same subject share a single calculation)
     :param subject_id: ID of the subject
-    :param correlation_id: Correlation ID for tracing
+    :param correlation_id: Correlation ID for tracing (of the caller that started the calculation)
     :return: Score summary
     """
-    required_docs = list()
-    periods = dict()
+    flight = _flights.get(subject_id)
 
-    async for doc in cosmos.c_document.query_items(
-        query="SELECT * FROM c "
-              "WHERE c._type = 'doc' "
-              "AND c.type.layer = 1 "
-              "AND c.period >= @min_period "
-              "ORDER BY c.period DESC",
-        parameters=[
-            {"name": "@min_period", "value": dt.date(dt.date.today().year - 4, 12, 31).isoformat()},
-        ],
-        partition_key=subject_id,
-    ):
-        doc = Document(**doc)
+    if flight is None:
+        # fresh context, the retry budget of the first caller is not shared with the others and the request charge
+        # of the calculation is accumulated separately (added to each waiting caller once finished)
+        charge = request_charge.RequestCharge()
+        flight = _Flight(
+            task=asyncio.create_task(
+                _calculate_score(subject_id=subject_id, correlation_id=correlation_id),
+                context=request_charge.detached(charge),
+            ),
+            charge=charge,
+        )
+        flight.task.add_done_callback(lambda _, flight=flight: _forget_flight(subject_id, flight))
+        _flights[subject_id] = flight
 
-        if doc.type.key in periods and (doc.period in periods[doc.type.key] or len(periods[doc.type.key]) == 3):
-            continue
+    flight.waiters += 1
+    try:
+        return await asyncio.shield(flight.task)
+    except asyncio.CancelledError:
+        # the calculation is cancelled only when the last waiting caller is gone (e.g. client disconnected)
+        # (removed before cancelling, so callers arriving meanwhile start a new calculation instead of the dying one)
+        if flight.waiters == 1 and not flight.task.done():
+            _forget_flight(subject_id, flight)
+            flight.task.cancel()
+        raise
+    finally:
+        flight.waiters -= 1
+        if flight.task.done() and (charge := request_charge.current()) is not None:
+            charge.include(flight.charge)
 
-        sheets = await asyncio.gather(*[
-            cosmos.c_document.read_item(item=sheet.id, partition_key=subject_id) for sheet in doc.sheets
-        ])
 
-        required_docs.append({**doc.model_dump(mode="json", by_alias=True), "sheets": sheets})
-        periods[doc.type.key] = periods.get(doc.type.key, set()).union({doc.period})
+async def _calculate_score(subject_id: str, correlation_id: str | None = None) -> ScoreSummary:
+    """
+    Calculate scoring document
+    :param subject_id: ID of the subject
+    :param correlation_id: Correlation ID for tracing
+    :return: Score summary
+    """
+    semaphore = asyncio.Semaphore(CONFIG.COSMOS_READ_CONCURRENCY)
+    assembly_tasks = list()
+
+    # documents are being selected, while already selected documents (and their sheets) are being read
+    try:
+        async for candidate in _select_documents(subject_id):
+            assembly_tasks.append(asyncio.create_task(_assemble_document(subject_id, candidate, semaphore)))
+
+        required_docs = await asyncio.gather(*assembly_tasks)
+    except BaseException:
+        for task in assembly_tasks:
+            task.cancel()
+        raise
+
+    # unchanged inputs produce the same score, so the model service is skipped
+    fingerprint = _fingerprint(required_docs)
+    if cached := _score_cache.get((subject_id, fingerprint)):
+        return cached
 
     result = FullDocument(
         **await http_handler.post_data(
@@ -96,8 +342,11 @@ async def trigger_score(subject_id: str, correlation_id: str | None = None) -> S
         )
     )
 
-    return ScoreSummary(
+    score_summary = ScoreSummary(
         created=result.version.created,
         period=result.period,
         score=result.sheets[0].items[-1][-1],
     )
+    _score_cache.set((subject_id, fingerprint), score_summary)
+
+    return score_summary
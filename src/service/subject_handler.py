@@ -1,9 +1,53 @@
 import logging
+import azure.core
 import azure.cosmos.exceptions
 
+from src.core import retry
+from src.core.cache import LRUCache
+from src.core.config import CONFIG
 from src.core.exception import HTTPException
 from src.model.subject import Subject, Address
-from src.db import cosmos
+from src.db import cosmos, change_feed
+from src.service.subject_index_handler import index as _subject_index
+
+
+# cached values are (etag, subject) tuples, expired entries are revalidated via etag
+_subject_cache = LRUCache(name="subject", max_size=CONFIG.SUBJECT_CACHE_SIZE, ttl=CONFIG.SUBJECT_CACHE_TTL)
+
+
+def _on_changes(docs: list[dict]) -> None:
+    """
+    Refresh cached subjects changed by any writer (from the change feed).
+    :param docs: Changed subject items
+    :return: None
+    """
+    for doc in docs:
+        cached = _subject_cache.peek(doc["id"]) is not None
+        _subject_cache.update(doc["id"], (doc.get("_etag"), Subject(**doc)) if cached else None)
+
+
+change_feed.subscribe(CONFIG.COSMOS_SUBJECT_CONTAINER, _on_changes)
+
+
+def _search_query(ic: str = None, name: str = None, include_not_active: bool = False) -> dict:
+    """
+    Build subject search query.
+    :param ic: IC number of the subject
+    :param name: Name of the subject
+    :param include_not_active: Include not active subjects
+    :return: Query keyword arguments for query_items
+    """
+    return {
+        "query": f"SELECT * FROM c "
+                 f"WHERE RegexMatch(c.id, @ic, 'i')"
+                 f"AND RegexMatch(c.name, @name, 'i')"
+                 f"{'AND c.active = true' if not include_not_active else ''}",
+        "parameters": [
+            {"name": "@ic", "value": ic or ".*"},
+            {"name": "@name", "value": name or ".*"},
+        ],
+        "continuation_token_limit": 1,
+    }
 
 
 async def search_subject(ic: str = None, name: str = None, include_not_active: bool = False) -> list[Subject]:
@@ -14,35 +58,78 @@ async def search_subject(ic: str = None, name: str = None, include_not_active: b
     :param include_not_active: Include not active subjects
     :return: List of subjects matching the search criteria
     """
+    if (subjects := _subject_index.search(ic=ic, name=name, include_not_active=include_not_active)) is not None:
+        return subjects
+
     return [
         Subject(**doc)
         async for doc
-        in cosmos.c_subject.query_items(
-            query=f"SELECT * FROM c "
-                  f"WHERE RegexMatch(c.id, @ic, 'i')"
-                  f"AND RegexMatch(c.name, @name, 'i')"
-                  f"{'AND c.active = true' if not include_not_active else ''}",
-            parameters=[
-                {"name": "@ic", "value": ic or ".*"},
-                {"name": "@name", "value": name or ".*"},
-            ],
-            continuation_token_limit=1,
-        )
+        in cosmos.c_subject.query_items(**_search_query(ic=ic, name=name, include_not_active=include_not_active))
     ]
 
 
+async def search_subject_page(
+    ic: str = None,
+    name: str = None,
+    include_not_active: bool = False,
+    limit: int = None,
+    cursor: str = None,
+) -> tuple[list[Subject], str | None]:
+    """
+    Search for subjects (single page) in the database based on IC number, name, and active status.
+    :param ic: IC number of the subject
+    :param name: Name of the subject
+    :param include_not_active: Include not active subjects
+    :param limit: Maximum number of subjects in the page
+    :param cursor: Continuation token of the previous page (optional - if not provided first page is returned)
+    :return: List of subjects matching the search criteria and continuation token of the next page (None if last)
+    """
+    async def _read_page() -> tuple[list[Subject], str | None]:
+        pages = cosmos.c_subject.query_items(
+            **_search_query(ic=ic, name=name, include_not_active=include_not_active),
+            max_item_count=limit or CONFIG.SUBJECT_SEARCH_PAGE_SIZE,
+        ).by_page(continuation_token=cursor)
+
+        subjects = []
+
+        # cross-partition queries may yield empty pages, those are skipped
+        async for page in pages:
+            subjects = [Subject(**doc) async for doc in page]
+            if subjects or not pages.continuation_token:
+                break
+
+        return subjects, pages.continuation_token or None
+
+    try:
+        return await retry.call(_read_page, name="search_subject_page")
+    except azure.cosmos.exceptions.CosmosHttpResponseError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            logger_name=__name__,
+            logger_lvl=logging.INFO,
+            logger_msg=str(e.reason),
+        )
+
+
 async def get_subject(subject_id: str) -> Subject:
     """
     Get subject by ID.
     :param subject_id: ID of the subject
     :return: Subject object or None if not found
     """
+    if cached := _subject_cache.get(subject_id):
+        return cached[1]
+
+    stale, writes = _subject_cache.peek(subject_id), _subject_cache.writes
+
     try:
-        return await cosmos.c_subject.read_item(
+        doc = await cosmos.c_subject.read_item(
             item=subject_id,
             partition_key=subject_id,
+            **({"etag": stale[0], "match_condition": azure.core.MatchConditions.IfModified} if stale else {}),
         )
     except azure.cosmos.exceptions.CosmosHttpResponseError as e:
+        _subject_cache.invalidate(subject_id)
         raise HTTPException(
             status_code=e.status_code,
             logger_name=__name__,
@@ -50,6 +137,16 @@ async def get_subject(subject_id: str) -> Subject:
             logger_msg=str(e.reason),
         )
 
+    # empty response means the subject was not modified (HTTP 304)
+    if stale and not doc:
+        _subject_cache.fill(subject_id, stale, writes=writes)
+        return stale[1]
+
+    subject = Subject(**doc)
+    _subject_cache.fill(subject_id, (doc.get("_etag"), subject), writes=writes)
+
+    return subject
+
 
 async def update_subject(
     subject_id: str,
@@ -70,22 +167,21 @@ async def update_subject(
     :return: Updated subject information
     """
     try:
-        return Subject(
-            **await cosmos.c_subject.patch_item(
-                item=subject_id,
-                partition_key=subject_id,
-                patch_operations=[
-                    *([{"op": "set", "path": "/name", "value": name}] if name else []),
-                    *([{"op": "set", "path": "/address/region", "value": address.region}] if address else []),
-                    *([{"op": "set", "path": "/address/street", "value": address.street}] if address else []),
-                    *([{"op": "set", "path": "/address/zip", "value": address.zip}] if address else []),
-                    *([{"op": "set", "path": "/currency", "value": currency}] if currency else []),
-                    *([{"op": "set", "path": "/active", "value": active}] if active else []),
-                    *([{"op": "set", "path": "/extra", "value": extra}] if extra else []),
-                ],
-            )
+        doc = await cosmos.c_subject.patch_item(
+            item=subject_id,
+            partition_key=subject_id,
+            patch_operations=[
+                *([{"op": "set", "path": "/name", "value": name}] if name else []),
+                *([{"op": "set", "path": "/address/region", "value": address.region}] if address else []),
+                *([{"op": "set", "path": "/address/street", "value": address.street}] if address else []),
+                *([{"op": "set", "path": "/address/zip", "value": address.zip}] if address else []),
+                *([{"op": "set", "path": "/currency", "value": currency}] if currency else []),
+                *([{"op": "set", "path": "/active", "value": active}] if active else []),
+                *([{"op": "set", "path": "/extra", "value": extra}] if extra else []),
+            ],
         )
     except azure.cosmos.exceptions.CosmosHttpResponseError as e:
+        _subject_cache.update(subject_id)
         raise HTTPException(
             status_code=e.status_code,
             logger_name=__name__,
@@ -93,6 +189,12 @@ async def update_subject(
             logger_msg=str(e.reason),
         )
 
+    subject = Subject(**doc)
+    _subject_cache.update(subject_id, (doc.get("_etag"), subject))
+    _subject_index.upsert(subject, timestamp=doc.get("_ts"), etag=doc.get("_etag"))
+
+    return subject
+
 
 async def create_subject(subject: Subject) -> Subject:
     """
@@ -101,12 +203,11 @@ async def create_subject(subject: Subject) -> Subject:
     :return: Created subject information
     """
     try:
-        return Subject(
-            **await cosmos.c_subject.create_item(
-                body=subject.model_dump(mode="json", by_alias=True),
-            )
+        doc = await cosmos.c_subject.create_item(
+            body=subject.model_dump(mode="json", by_alias=True),
         )
     except azure.cosmos.exceptions.CosmosHttpResponseError as e:
+        _subject_cache.update(subject.id)
         raise HTTPException(
             status_code=e.status_code,
             logger_name=__name__,
@@ -114,6 +215,12 @@ async def create_subject(subject: Subject) -> Subject:
             logger_msg=str(e.reason),
         )
 
+    subject = Subject(**doc)
+    _subject_cache.update(subject.id, (doc.get("_etag"), subject))
+    _subject_index.upsert(subject, timestamp=doc.get("_ts"), etag=doc.get("_etag"))
+
+    return subject
+
 
 async def delete_subject(subject_id: str) -> None:
     """
@@ -121,6 +228,8 @@ async def delete_subject(subject_id: str) -> None:
     :param subject_id: ID of the subject to be deleted
     :return: None
     """
+    cached = _subject_cache.peek(subject_id)
+
     try:
         await cosmos.c_subject.delete_item(
             item=subject_id,
@@ -133,5 +242,9 @@ async def delete_subject(subject_id: str) -> None:
             logger_lvl=logging.INFO,
             logger_msg=str(e.reason),
         )
+    finally:
+        _subject_cache.update(subject_id)
+
+    _subject_index.remove(subject_id, etag=cached[0] if cached else None)
 
 
@@ -0,0 +1,268 @@
+import re
+import asyncio
+import bisect
+import logging
+
+from src.model.subject import Subject
+from src.core.config import CONFIG
+from src.db import cosmos, change_feed
+
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = ("id", "name")
+_REGEX_META = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+def _trigrams(value: str) -> set[str]:
+    """
+    Get trigrams of a (lowercase) value.
+    :param value: Value to split
+    :return: Set of trigrams
+    """
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+class SubjectIndex:
+    """
+    In-memory subject search index (prefix and trigram matching over subject ID and name)
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+        self._subjects: dict[str, Subject] = dict()
+        self._timestamps: dict[str, int] = dict()
+        self._etags: dict[str, str] = dict()
+        self._deleted: dict[str, tuple[int | None, str | None]] = dict()
+        self._next: SubjectIndex | None = None
+        self._values: dict[str, dict[str, str]] = {field: dict() for field in _FIELDS}
+        self._trigrams: dict[str, dict[str, set[str]]] = {field: dict() for field in _FIELDS}
+        self._sorted: dict[str, list[tuple[str, str]]] = {field: list() for field in _FIELDS}
+
+    def __len__(self) -> int:
+        return len(self._subjects)
+
+    def upsert(self, subject: Subject, timestamp: int | None = None, etag: str | None = None) -> None:
+        """
+        Add or replace subject in the index (unless the indexed subject is newer or the change is not newer than
+        the deletion of the subject).
+        :param subject: Subject to index
+        :param timestamp: Modification timestamp of the subject (i.e. _ts, optional)
+        :param etag: Version of the subject (i.e. _etag, optional)
+        :return: None
+        """
+        if self._next is not None:
+            self._next.upsert(subject, timestamp=timestamp, etag=etag)
+
+        if timestamp is not None and timestamp < self._timestamps.get(subject.id, timestamp):
+            return
+
+        # the deleted version itself (i.e. delivered late by the change feed) and older versions are ignored, any
+        # other version (i.e. re-created within the same second, _ts has a resolution of seconds) is newer
+        deleted_timestamp, deleted_etag = self._deleted.get(subject.id, (None, None))
+        if (etag is not None and etag == deleted_etag) or (
+            timestamp is not None and deleted_timestamp is not None and timestamp < deleted_timestamp
+        ):
+            return
+
+        self._remove(subject.id)
+        self._deleted.pop(subject.id, None)
+        self._subjects[subject.id] = subject
+        if timestamp is not None:
+            self._timestamps[subject.id] = timestamp
+        if etag is not None:
+            self._etags[subject.id] = etag
+
+        for field in _FIELDS:
+            value = getattr(subject, field).lower()
+            self._values[field][subject.id] = value
+            bisect.insort(self._sorted[field], (value, subject.id))
+            for trigram in _trigrams(value):
+                self._trigrams[field].setdefault(trigram, set()).add(subject.id)
+
+    def remove(self, subject_id: str, etag: str | None = None) -> None:
+        """
+        Remove subject from the index (the deleted version and older changes of the subject are ignored afterwards).
+        :param subject_id: ID of the subject
+        :param etag: Version of the deleted subject (optional - the indexed version is used if not provided)
+        :return: None
+        """
+        self._delete(subject_id, (self._timestamps.get(subject_id), etag or self._etags.get(subject_id)))
+
+    def _delete(self, subject_id: str, version: tuple[int | None, str | None]) -> None:
+        if self._next is not None:
+            self._next._delete(subject_id, version)
+
+        if version != (None, None):
+            self._deleted[subject_id] = version
+
+        self._remove(subject_id)
+
+    def _remove(self, subject_id: str) -> None:
+        self._timestamps.pop(subject_id, None)
+        self._etags.pop(subject_id, None)
+        if self._subjects.pop(subject_id, None) is None:
+            return
+
+        for field in _FIELDS:
+            value = self._values[field].pop(subject_id)
+            entries = self._sorted[field]
+            del entries[bisect.bisect_left(entries, (value, subject_id))]
+            for trigram in _trigrams(value):
+                postings = self._trigrams[field][trigram]
+                postings.discard(subject_id)
+                if not postings:
+                    del self._trigrams[field][trigram]
+
+    def clear(self) -> None:
+        """
+        Remove all subjects from the index.
+        :return: None
+        """
+        self.__init__()
+
+    def rebuild(self) -> "SubjectIndex":
+        """
+        Start rebuilding the index, changes are applied to both indexes until the rebuild is finished.
+        :return: New index to be filled from the database
+        """
+        self._next = SubjectIndex()
+        return self._next
+
+    def finish_rebuild(self, ok: bool = True) -> None:
+        """
+        Replace the index by the rebuilt one (subjects deleted by other writers, which the change feed
+        does not report, are dropped) or discard the rebuilt index.
+        :param ok: Whether the rebuild succeeded
+        :return: None
+        """
+        rebuilt, self._next = self._next, None
+
+        if ok and rebuilt is not None:
+            self.__dict__.update(rebuilt.__dict__)
+            self.ready = True
+
+    def _match(self, field: str, pattern: str | None) -> set[str] | None:
+        """
+        Match subject IDs by a search pattern (case-insensitive substring, or prefix if anchored with ^).
+        :param field: Indexed field
+        :param pattern: Search pattern (same semantics as RegexMatch, but only literals are supported)
+        :return: Set of matching subject IDs, all IDs (if pattern is empty) or None if pattern is not supported
+        """
+        if not pattern or pattern == ".*":
+            return set(self._subjects)
+
+        prefix = pattern.startswith("^")
+        needle = pattern[1:] if prefix else pattern
+
+        if _REGEX_META.search(needle):
+            return None
+
+        needle = needle.lower()
+
+        if prefix:
+            entries = self._sorted[field]
+            matches = set()
+            for value, subject_id in entries[bisect.bisect_left(entries, (needle, "")):]:
+                if not value.startswith(needle):
+                    break
+                matches.add(subject_id)
+            return matches
+
+        if len(needle) < 3:
+            candidates = self._subjects.keys()
+        else:
+            postings = sorted((self._trigrams[field].get(trigram, set()) for trigram in _trigrams(needle)), key=len)
+            candidates = set.intersection(*postings)
+
+        return {subject_id for subject_id in candidates if needle in self._values[field][subject_id]}
+
+    def search(self, ic: str = None, name: str = None, include_not_active: bool = False) -> list[Subject] | None:
+        """
+        Search for subjects in the index.
+        :param ic: IC number (pattern) of the subject
+        :param name: Name (pattern) of the subject
+        :param include_not_active: Include not active subjects
+        :return: List of subjects matching the search criteria or None if the index cannot answer the search
+        """
+        if not self.ready:
+            return None
+
+        ic_matches = self._match("id", ic)
+        name_matches = self._match("name", name)
+
+        if ic_matches is None or name_matches is None:
+            return None
+
+        return [
+            self._subjects[subject_id]
+            for subject_id in sorted(ic_matches & name_matches)
+            if include_not_active or self._subjects[subject_id].active
+        ]
+
+
+index = SubjectIndex()
+_task: asyncio.Task | None = None
+
+
+def _on_changes(docs: list[dict]) -> None:
+    """
+    Apply changed subjects (from the change feed) to the index.
+    :param docs: Changed subject items
+    :return: None
+    """
+    for doc in docs:
+        index.upsert(Subject(**doc), timestamp=doc.get("_ts"), etag=doc.get("_etag"))
+
+
+async def _build() -> None:
+    """
+    Build the index from the subject container (changes are applied from the change feed meanwhile), then rebuild
+    it periodically (deletes by other writers are not in the change feed, those are dropped by the rebuild).
+    :return: None
+    """
+    while True:
+        rebuilt = index.rebuild()
+        try:
+            async for doc in cosmos.c_subject.query_items(query="SELECT * FROM c"):
+                rebuilt.upsert(Subject(**doc), timestamp=doc.get("_ts"), etag=doc.get("_etag"))
+        except Exception as e:
+            index.finish_rebuild(ok=False)
+            logger.error(f"Subject index build failed, {'the current index is kept' if index.ready else 'searching falls back to the database'}: {e!r}")
+        else:
+            index.finish_rebuild()
+            logger.info(f"Subject index ready ({len(index)} subjects)")
+
+        if not CONFIG.SUBJECT_INDEX_REBUILD_INTERVAL:
+            return
+
+        await asyncio.sleep(CONFIG.SUBJECT_INDEX_REBUILD_INTERVAL)
+
+
+async def start() -> None:
+    """
+    Start building the subject index in the background (requires change feed to be kept current).
+    :return: None
+    """
+    global _task
+
+    if CONFIG.SUBJECT_INDEX_ENABLED and CONFIG.COSMOS_CHANGE_FEED_ENABLED and _task is None:
+        _task = asyncio.create_task(_build())
+
+
+async def stop() -> None:
+    """
+    Stop building the subject index.
+    :return: None
+    """
+    global _task
+
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
+
+    index.clear()
+
+
+change_feed.subscribe(CONFIG.COSMOS_SUBJECT_CONTAINER, _on_changes)
@@ -0,0 +1,852 @@
+import re
+import json
+import types
+import base64
+import uuid
+import time
+import random
+import typing
+import asyncio
+import functools
+import collections
+import azure.cosmos.exceptions
+
+
+CHARGE_HEADER = "x-ms-request-charge"
+
+# request charge (RU) per started KB of the transferred item(s), the minimum charge is 1 KB
+DEFAULT_CHARGES = {"read": 1.0, "query": 2.5, "write": 5.5}
+
+
+class _Undefined:
+    """
+    Undefined value (missing property, out of range index, ...) - omitted from projections and filtered by comparisons
+    """
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "undefined"
+
+
+UNDEFINED = _Undefined()
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<string>'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")"
+    r"|(?P<number>\d+(?:\.\d+)?)"
+    r"|(?P<param>@\w+)"
+    r"|(?P<name>[A-Za-z_]\w*)"
+    r"|(?P<op>>=|<=|!=|<>|[=<>()\[\]{},.:*\-+])"
+    r")"
+)
+
+_KEYWORDS = {
+    "SELECT", "TOP", "VALUE", "FROM", "IN", "WHERE", "AND", "OR", "NOT", "ORDER", "BY", "ASC", "DESC", "AS",
+    "TRUE", "FALSE", "NULL", "ARRAY",
+}
+
+
+def _tokenize(query: str) -> list[tuple[str, typing.Any, str]]:
+    """
+    Split query into (kind, value, text) tokens (values of keywords are upper-cased)
+    :param query: Query text
+    :return: List of tokens
+    """
+    tokens, position, query = [], 0, query.rstrip()
+
+    while position < len(query):
+        if (match := _TOKEN_RE.match(query, position)) is None:
+            raise ValueError(f"Unexpected character at {position}: {query[position:position + 20]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        value = text = match.group(kind)
+
+        if kind == "string":
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        elif kind == "number":
+            value = float(value) if "." in value else int(value)
+        elif kind == "name" and value.upper() in _KEYWORDS:
+            kind, value = "keyword", value.upper()
+
+        tokens.append((kind, value, text))
+
+    return tokens
+
+
+def _type_order(value: typing.Any) -> int:
+    # undefined < null < booleans < numbers < strings < arrays < objects (as ordered by Cosmos)
+    if value is UNDEFINED:
+        return 0
+    if value is None:
+        return 1
+    if isinstance(value, bool):
+        return 2
+    if isinstance(value, (int, float)):
+        return 3
+    if isinstance(value, str):
+        return 4
+
+    return 5 if isinstance(value, list) else 6
+
+
+def _compare(op: str, left: typing.Any, right: typing.Any) -> bool | _Undefined:
+    """
+    Compare values with Cosmos semantics (comparison of values of different types is undefined)
+    """
+    if left is UNDEFINED or right is UNDEFINED or _type_order(left) != _type_order(right):
+        return UNDEFINED
+    if op == "=":
+        return left == right
+    if op in ("!=", "<>"):
+        return left != right
+    if left is None or isinstance(left, (list, dict)):
+        return UNDEFINED
+
+    return {"<": left < right, ">": left > right, "<=": left <= right, ">=": left >= right}[op]
+
+
+def _array_slice(array: typing.Any, start: int, length: int = None) -> list | _Undefined:
+    if not isinstance(array, list):
+        return UNDEFINED
+
+    start = max(len(array) + start, 0) if start < 0 else start
+
+    return array[start:] if length is None else array[start:start + max(length, 0)]
+
+
+_FUNCTIONS = {
+    "ARRAY_SLICE": _array_slice,
+    "ARRAY_LENGTH": lambda array: len(array) if isinstance(array, list) else UNDEFINED,
+    "IS_DEFINED": lambda value: value is not UNDEFINED,
+    "LOWER": lambda value: value.lower() if isinstance(value, str) else UNDEFINED,
+    "UPPER": lambda value: value.upper() if isinstance(value, str) else UNDEFINED,
+    "CONTAINS": lambda value, part: part in value if isinstance(value, str) else UNDEFINED,
+    "STARTSWITH": lambda value, part: value.startswith(part) if isinstance(value, str) else UNDEFINED,
+    "REGEXMATCH": lambda value, pattern, flags="": (
+        _regex(pattern, flags).search(value) is not None if isinstance(value, str) else UNDEFINED
+    ),
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _regex(pattern: str, flags: str) -> re.Pattern:
+    return re.compile(pattern, re.IGNORECASE if "i" in flags else 0)
+
+
+# compiled expression: function of (bindings, parameters) returning the value
+Expr = typing.Callable[[dict, dict], typing.Any]
+
+
+class _Query(typing.NamedTuple):
+    top: int | None
+    value: bool
+    projection: list[tuple[str, Expr]] | None     # None for SELECT *
+    alias: str
+    source: Expr | None                           # source array for FROM alias IN expr (subqueries)
+    where: Expr | None
+    order: tuple[Expr, bool] | None               # (key, descending)
+
+
+class _Parser:
+    """
+    Recursive descent parser of the Cosmos SQL subset used by the handlers (SELECT [TOP n] [VALUE] ... FROM c
+    [WHERE ...] [ORDER BY ...], comparisons, AND/OR/NOT, paths with indexes, parameters, object literals,
+    ARRAY subqueries and the functions in _FUNCTIONS)
+    """
+    def __init__(self, query: str) -> None:
+        self.tokens = _tokenize(query)
+        self.position = 0
+
+    def peek(self, *values: str) -> bool:
+        if self.position >= len(self.tokens):
+            return False
+        return not values or self.tokens[self.position][1] in values
+
+    def take(self, *values: str) -> tuple[str, typing.Any, str]:
+        if not self.peek(*values):
+            found = self.tokens[self.position] if self.position < len(self.tokens) else "end of query"
+            raise ValueError(f"Expected {' or '.join(values) or 'token'}, found {found}")
+        self.position += 1
+        return self.tokens[self.position - 1]
+
+    def parse(self) -> _Query:
+        query = self.query()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected token {self.tokens[self.position]}")
+        return query
+
+    def query(self) -> _Query:
+        self.take("SELECT")
+        top = self.take()[1] if self.peek("TOP") and self.take("TOP") else None
+        value = bool(self.peek("VALUE") and self.take("VALUE"))
+
+        projection = None
+        if self.peek("*"):
+            self.take("*")
+        else:
+            projection = [self.projection_item(i) for i in self._comma_separated()]
+
+        self.take("FROM")
+        alias, source = self.take()[2], None
+        if self.peek("IN"):
+            self.take("IN")
+            # like in Cosmos, the source must be a property path (i.e. c.items), not an expression or a function call
+            following = self.tokens[self.position + 1:self.position + 2]
+            if not self.peek() or self.tokens[self.position][0] != "name" or (following and following[0][1] == "("):
+                raise ValueError(f"Expected property path after IN, found {self.tokens[self.position] if self.peek() else 'end of query'}")
+            source = self.path()
+
+        where = None
+        if self.peek("WHERE"):
+            self.take("WHERE")
+            where = self.expression()
+
+        order = None
+        if self.peek("ORDER"):
+            self.take("ORDER")
+            self.take("BY")
+            key = self.expression()
+            descending = bool(self.peek("DESC") and self.take("DESC"))
+            if self.peek("ASC"):
+                self.take("ASC")
+            order = (key, descending)
+
+        return _Query(top=top, value=value, projection=projection, alias=alias, source=source, where=where, order=order)
+
+    def _comma_separated(self) -> typing.Iterator[int]:
+        i = 0
+        while True:
+            yield i
+            if not self.peek(","):
+                return
+            self.take(",")
+            i += 1
+
+    def projection_item(self, index: int) -> tuple[str, Expr]:
+        start = self.position
+        expr = self.expression()
+        if self.peek("AS"):
+            self.take("AS")
+            return self.take()[2], expr
+
+        # implicit name is the last property of a path (otherwise $1, $2, ...)
+        if self.position - start > 1 and self.tokens[self.position - 2][1] == ".":
+            return self.tokens[self.position - 1][2], expr
+
+        return f"${index + 1}", expr
+
+    def expression(self) -> Expr:
+        left = self.conjunction()
+        while self.peek("OR"):
+            self.take("OR")
+            left = (lambda a, b: lambda env, params: bool(a(env, params) is True or b(env, params) is True))(left, self.conjunction())
+        return left
+
+    def conjunction(self) -> Expr:
+        left = self.negation()
+        while self.peek("AND"):
+            self.take("AND")
+            left = (lambda a, b: lambda env, params: a(env, params) is True and b(env, params) is True)(left, self.negation())
+        return left
+
+    def negation(self) -> Expr:
+        if self.peek("NOT"):
+            self.take("NOT")
+            operand = self.negation()
+            return lambda env, params: (not value) if isinstance(value := operand(env, params), bool) else UNDEFINED
+        return self.comparison()
+
+    def comparison(self) -> Expr:
+        left = self.additive()
+        if self.peek("=", "!=", "<>", "<", ">", "<=", ">="):
+            op = self.take()[1]
+            right = self.additive()
+            return lambda env, params: _compare(op, left(env, params), right(env, params))
+        return left
+
+    def additive(self) -> Expr:
+        left = self.unary()
+        while self.peek("+", "-"):
+            sign = 1 if self.take()[1] == "+" else -1
+            right = self.unary()
+            left = (lambda a, b, s: lambda env, params: a(env, params) + s * b(env, params))(left, right, sign)
+        return left
+
+    def unary(self) -> Expr:
+        if self.peek("-"):
+            self.take("-")
+            operand = self.unary()
+            return lambda env, params: -operand(env, params)
+        return self.path()
+
+    def path(self) -> Expr:
+        expr = self.primary()
+        while self.peek(".", "["):
+            if self.take()[1] == ".":
+                name = self.take()[2]
+                expr = (lambda e, n: lambda env, params: _get(e(env, params), n))(expr, name)
+            else:
+                index = self.expression()
+                self.take("]")
+                expr = (lambda e, i: lambda env, params: _get(e(env, params), i(env, params)))(expr, index)
+        return expr
+
+    def primary(self) -> Expr:
+        kind, value, _ = self.take()
+
+        if kind in ("string", "number"):
+            return lambda env, params: value
+        if kind == "param":
+            return lambda env, params: params.get(value, UNDEFINED)
+        if kind == "keyword" and value in ("TRUE", "FALSE", "NULL"):
+            constant = {"TRUE": True, "FALSE": False, "NULL": None}[value]
+            return lambda env, params: constant
+        if kind == "keyword" and value == "ARRAY":
+            self.take("(")
+            subquery = self.query()
+            self.take(")")
+            return lambda env, params: _execute_subquery(subquery, env, params)
+        if value == "(":
+            expr = self.expression()
+            self.take(")")
+            return expr
+        if value == "{":
+            fields = []
+            while not self.peek("}"):
+                name = self.take()[1]
+                self.take(":")
+                fields.append((name, self.expression()))
+                if self.peek(","):
+                    self.take(",")
+            self.take("}")
+            return lambda env, params: {
+                name: result for name, expr in fields if (result := expr(env, params)) is not UNDEFINED
+            }
+        if kind == "name" and self.peek("("):
+            return self.call(value.upper())
+        if kind == "name":
+            return lambda env, params: env.get(value, UNDEFINED)
+
+        raise ValueError(f"Unexpected token {(kind, value)}")
+
+    def call(self, name: str) -> Expr:
+        function = _FUNCTIONS[name]
+        self.take("(")
+        args = [] if self.peek(")") else [self.expression() for _ in self._comma_separated()]
+        self.take(")")
+
+        def _call(env: dict, params: dict) -> typing.Any:
+            values = [arg(env, params) for arg in args]
+            # functions of undefined arguments are undefined (except of the IS_DEFINED check)
+            if name != "IS_DEFINED" and any(value is UNDEFINED for value in values):
+                return UNDEFINED
+            return function(*values)
+
+        return _call
+
+
+def _get(value: typing.Any, key: typing.Any) -> typing.Any:
+    if isinstance(value, dict) and isinstance(key, str):
+        return value.get(key, UNDEFINED)
+    if isinstance(value, list) and isinstance(key, int) and not isinstance(key, bool) and 0 <= key < len(value):
+        return value[key]
+    return UNDEFINED
+
+
+def _sort_key(value: typing.Any) -> tuple:
+    order = _type_order(value)
+
+    return (order, value) if order in (2, 3, 4) else (order, 0)
+
+
+def _project(query: _Query, env: dict, params: dict, item: typing.Any) -> typing.Any:
+    if query.projection is None:
+        return item
+    if query.value:
+        return query.projection[0][1](env, params)
+
+    return {name: result for name, expr in query.projection if (result := expr(env, params)) is not UNDEFINED}
+
+
+def _execute_subquery(query: _Query, env: dict, params: dict) -> list | _Undefined:
+    source = query.source(env, params)
+    if not isinstance(source, list):
+        return UNDEFINED
+
+    results = []
+    for item in source:
+        scope = {**env, query.alias: item}
+        if query.where is None or query.where(scope, params) is True:
+            if (result := _project(query, scope, params, item)) is not UNDEFINED:
+                results.append(result)
+
+    return results
+
+
+@functools.lru_cache(maxsize=256)
+def compile_query(query: str) -> _Query:
+    """
+    Compile query text (compiled queries are cached, the handlers use a handful of query shapes)
+    :param query: Query text
+    :return: Compiled query
+    """
+    return _Parser(query).parse()
+
+
+def execute_query(query: str, items: typing.Iterable[dict], parameters: list[dict] = None) -> list:
+    """
+    Execute query over items
+    :param query: Query text
+    :param items: Items to query
+    :param parameters: Query parameters (list of {"name": ..., "value": ...})
+    :return: Projected results
+    """
+    compiled = compile_query(query)
+    params = {parameter["name"]: parameter["value"] for parameter in parameters or []}
+
+    matched = [
+        item for item in items
+        if compiled.where is None or compiled.where({compiled.alias: item}, params) is True
+    ]
+
+    if compiled.order is not None:
+        key, descending = compiled.order
+        matched.sort(key=lambda item: _sort_key(key({compiled.alias: item}, params)), reverse=descending)
+
+    if compiled.top is not None:
+        matched = matched[:compiled.top]
+
+    return [
+        result for item in matched
+        if (result := _project(compiled, {compiled.alias: item}, params, item)) is not UNDEFINED
+    ]
+
+
+def _apply_patch(item: dict, operations: list[dict]) -> None:
+    """
+    Apply patch operations (set, add, replace, remove, incr) to the item in place
+    :param item: Item
+    :param operations: Patch operations with JSON pointer paths
+    :return: None or raise CosmosHttpResponseError (400) if a path does not exist
+    """
+    for operation in operations:
+        *parents, last = [
+            int(part) if part.lstrip("-").isdigit() else part
+            for part in operation["path"].lstrip("/").split("/")
+        ]
+        target = item
+        try:
+            for part in parents:
+                target = target[part]
+
+            op = operation["op"]
+            if op == "remove":
+                del target[last]
+            elif op == "incr":
+                target[last] += operation["value"]
+            elif op == "add" and isinstance(target, list):
+                target.insert(last, operation["value"])
+            elif op == "replace" and (isinstance(target, dict) and last not in target):
+                raise KeyError(last)
+            else:
+                target[last] = operation["value"]
+        except (KeyError, IndexError, TypeError):
+            raise azure.cosmos.exceptions.CosmosHttpResponseError(
+                status_code=400,
+                message=f"Patch path {operation['path']} does not exist",
+            )
+
+
+class _Page:
+    """
+    Single page of query results
+    """
+    def __init__(self, items: list) -> None:
+        self.items = items
+
+    def __aiter__(self) -> typing.AsyncIterator:
+        return self._iterate()
+
+    async def _iterate(self) -> typing.AsyncIterator:
+        for item in self.items:
+            yield item
+
+
+class _Pages:
+    """
+    Async iterator of query result pages (continuation token is updated after each page, like AsyncPageIterator)
+    """
+    def __init__(self, results: "_QueryResults", continuation_token: str = None) -> None:
+        self.results = results
+        self.offset = int(continuation_token or 0)
+        self.continuation_token = continuation_token
+        self.done = False
+
+    def __aiter__(self) -> "_Pages":
+        return self
+
+    async def __anext__(self) -> _Page:
+        if self.done:
+            raise StopAsyncIteration
+
+        items, self.offset = await self.results.fetch(self.offset)
+        self.done = self.offset is None
+        self.continuation_token = None if self.done else str(self.offset)
+
+        return _Page(items)
+
+
+class _QueryResults:
+    """
+    Query results (pages are fetched lazily, each page is a round trip with latency and request charge)
+    """
+    def __init__(self, container: "InMemoryContainer", run: typing.Callable[[], list], max_item_count: int = None, response_hook=None) -> None:
+        self.container = container
+        self.run = run
+        self.max_item_count = max_item_count or 100
+        self.response_hook = response_hook
+        self.results: list | None = None
+
+    async def fetch(self, offset: int) -> tuple[list, int | None]:
+        """
+        Fetch page of results
+        :param offset: Offset of the page
+        :return: Page items and offset of the next page (None if last)
+        """
+        await self.container._round_trip()
+
+        if self.results is None:
+            self.results = self.run()
+
+        page = self.results[offset:offset + self.max_item_count]
+        raw = json.dumps(page).encode()
+        self.container._charge("query", raw, self.response_hook, page)
+        following = offset + self.max_item_count
+
+        return json.loads(raw), following if following < len(self.results) else None
+
+    def by_page(self, continuation_token: str = None) -> _Pages:
+        return _Pages(self, continuation_token)
+
+    def __aiter__(self) -> typing.AsyncIterator:
+        return self._iterate()
+
+    async def _iterate(self) -> typing.AsyncIterator:
+        async for page in self.by_page():
+            for item in page.items:
+                yield item
+
+
+def _feed_token(lsn: int) -> str:
+    return base64.b64encode(json.dumps({"lsn": lsn}).encode()).decode()
+
+
+class _ChangeFeedPages:
+    """
+    Async iterator of change feed pages, like ChangeFeedIterable of azure-cosmos 4.9: the composite continuation
+    token is written to the last response headers of the client after each fetch (including the final empty one,
+    which ends the iteration without updating the pager token) and the response hook only gets the raw LSN
+    """
+    def __init__(self, container: "InMemoryContainer", since: int, max_item_count: int = None, response_hook=None) -> None:
+        self.container = container
+        self.since = since
+        self.max_item_count = max_item_count or 100
+        self.response_hook = response_hook
+        self.continuation_token = None
+
+    def __aiter__(self) -> "_ChangeFeedPages":
+        return self
+
+    async def __anext__(self) -> _Page:
+        await self.container._round_trip()
+
+        changes = [(lsn, item) for lsn, item in self.container.feed.values() if lsn > self.since][:self.max_item_count]
+        if changes:
+            self.since = changes[-1][0]
+
+        token = _feed_token(self.since)
+        self.container.client_connection.last_response_headers = {"etag": token}
+        if self.response_hook:
+            self.response_hook({"etag": str(self.container.lsn)}, changes)
+
+        if not changes:
+            raise StopAsyncIteration
+
+        self.continuation_token = token
+        return _Page(json.loads(json.dumps([item for _, item in changes])))
+
+
+class _ChangeFeed:
+    """
+    Change feed results (iterated by items or by pages)
+    """
+    def __init__(self, container: "InMemoryContainer", since: int, max_item_count: int = None, response_hook=None) -> None:
+        self.pages = _ChangeFeedPages(container, since, max_item_count=max_item_count, response_hook=response_hook)
+
+    def by_page(self, continuation_token: str = None) -> _ChangeFeedPages:
+        return self.pages
+
+    def __aiter__(self) -> typing.AsyncIterator:
+        return self._iterate()
+
+    async def _iterate(self) -> typing.AsyncIterator:
+        async for page in self.pages:
+            for item in page.items:
+                yield item
+
+
+class InMemoryContainer:
+    """
+    In-memory stand-in of the azure.cosmos.aio.ContainerProxy subset used by the service (point operations,
+    patch, transactional batch, queries of the SQL subset of _Parser and the latest-version change feed)
+    with injected latency, request charge and throttling
+    """
+    def __init__(
+        self,
+        partition_key: str,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        charges: dict[str, float] = None,
+        throttle_rate: float = 0.0,
+        throttle_retry_after: float = 0.01,
+        client_connection: types.SimpleNamespace = None,
+    ) -> None:
+        """
+        :param partition_key: Partition key path (i.e. /subject_id)
+        :param latency: Latency (in seconds) of each round trip (point operation or query page)
+        :param jitter: Maximum random latency (in seconds) added to each round trip
+        :param charges: Request charge (RU) per KB by operation kind (read, query, write), see DEFAULT_CHARGES
+        :param throttle_rate: Probability of a round trip being throttled (429)
+        :param throttle_retry_after: Retry-after hint (in seconds) of throttled round trips
+        :param client_connection: Client connection shared by the containers of a database (last response headers)
+        """
+        self.partition_key = partition_key.lstrip("/")
+        self.latency = latency
+        self.jitter = jitter
+        self.charges = {**DEFAULT_CHARGES, **(charges or {})}
+        self.throttle_rate = throttle_rate
+        self.throttle_retry_after = throttle_retry_after
+        self.client_connection = client_connection or types.SimpleNamespace(last_response_headers={})
+
+        self.partitions: dict[typing.Any, dict[str, dict]] = collections.defaultdict(dict)
+        self.feed: collections.OrderedDict[tuple, tuple[int, dict]] = collections.OrderedDict()
+        self.lsn = 0
+        self.total_charge = 0.0
+        self.operations = collections.Counter()
+
+    async def _round_trip(self) -> None:
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        if self.throttle_rate and random.random() < self.throttle_rate:
+            error = azure.cosmos.exceptions.CosmosHttpResponseError(status_code=429, message="Request rate is large")
+            error.headers = {"x-ms-retry-after-ms": str(int(self.throttle_retry_after * 1000))}
+            raise error
+
+    def _charge(self, kind: str, raw: bytes, response_hook: typing.Callable | None, result: typing.Any) -> None:
+        charge = round(max(len(raw) / 1024, 1.0) * self.charges[kind], 2)
+        self.total_charge += charge
+        self.operations[kind] += 1
+
+        if response_hook:
+            response_hook({CHARGE_HEADER: str(charge)}, result)
+
+    def _locate(self, item: str, partition_key: typing.Any) -> dict:
+        if (stored := self.partitions.get(partition_key, {}).get(item)) is None:
+            raise azure.cosmos.exceptions.CosmosResourceNotFoundError(
+                status_code=404,
+                message=f"Entity with the specified id {item} does not exist in the system.",
+            )
+        return stored
+
+    def _write(self, body: dict, etag: str = None) -> dict:
+        """
+        Store item with new system properties and record it in the change feed
+        :param body: Item
+        :param etag: Item _etag (optional - a new one is generated if not provided)
+        :return: Stored item
+        """
+        self.lsn += 1
+        item = {**body, "_etag": etag or f'"{uuid.uuid4()}"', "_ts": int(time.time())}
+        key = (item.get(self.partition_key), item["id"])
+
+        self.partitions[key[0]][key[1]] = item
+        self.feed.pop(key, None)
+        self.feed[key] = (self.lsn, item)
+
+        return item
+
+    def seed(self, items: typing.Iterable[dict]) -> None:
+        """
+        Store items without latency and request charge (initial data of the benchmark)
+        :param items: Items
+        :return: None
+        """
+        for item in items:
+            self._write(json.loads(json.dumps(item)))
+
+    def _result(self, kind: str, item: dict, response_hook: typing.Callable | None) -> dict:
+        # the client gets its own copy of the item decoded from the response body
+        raw = json.dumps(item).encode()
+        self._charge(kind, raw, response_hook, item)
+        return json.loads(raw)
+
+    async def read_item(self, item: str, partition_key: typing.Any, etag: str = None, match_condition=None, response_hook=None, **kwargs) -> dict:
+        await self._round_trip()
+        stored = self._locate(item, partition_key)
+
+        # not modified (HTTP 304) has an empty body
+        if etag and match_condition is not None and stored["_etag"] == etag:
+            self._charge("read", b"", response_hook, {})
+            return {}
+
+        return self._result("read", stored, response_hook)
+
+    async def create_item(self, body: dict, response_hook=None, **kwargs) -> dict:
+        await self._round_trip()
+        if body["id"] in self.partitions.get(body.get(self.partition_key), {}):
+            raise azure.cosmos.exceptions.CosmosResourceExistsError(
+                status_code=409,
+                message="Entity with the specified id already exists in the system.",
+            )
+
+        return self._result("write", self._write(json.loads(json.dumps(body))), response_hook)
+
+    async def upsert_item(self, body: dict, response_hook=None, **kwargs) -> dict:
+        await self._round_trip()
+        return self._result("write", self._write(json.loads(json.dumps(body))), response_hook)
+
+    async def replace_item(self, item: str, body: dict, response_hook=None, **kwargs) -> dict:
+        await self._round_trip()
+        self._locate(item, body.get(self.partition_key))
+        return self._result("write", self._write(json.loads(json.dumps(body))), response_hook)
+
+    async def patch_item(self, item: str, partition_key: typing.Any, patch_operations: list[dict], response_hook=None, **kwargs) -> dict:
+        await self._round_trip()
+        patched = json.loads(json.dumps(self._locate(item, partition_key)))
+        _apply_patch(patched, patch_operations)
+
+        return self._result("write", self._write(patched), response_hook)
+
+    async def delete_item(self, item: str, partition_key: typing.Any, response_hook=None, **kwargs) -> None:
+        await self._round_trip()
+        self._locate(item, partition_key)
+        del self.partitions[partition_key][item]
+        self.feed.pop((partition_key, item), None)
+        self._charge("write", b"", response_hook, None)
+
+    async def execute_item_batch(self, batch_operations: list[tuple], partition_key: typing.Any, response_hook=None, **kwargs) -> list[dict]:
+        await self._round_trip()
+
+        # operations are applied to copies, nothing is stored unless all of them succeed
+        staged: dict[str, dict | None] = dict()
+        results = []
+        for index, (operation, args, options) in enumerate(batch_operations):
+            item_id = args[0]["id"] if isinstance(args[0], dict) else args[0]
+            current = staged[item_id] if item_id in staged else self.partitions.get(partition_key, {}).get(item_id)
+            status = 200
+
+            if options.get("if_match_etag") and (current is None or current["_etag"] != options["if_match_etag"]):
+                status = 412
+            elif operation == "create" and current is not None:
+                status = 409
+            elif operation in ("read", "replace", "patch", "delete") and current is None:
+                status = 404
+
+            if status == 200:
+                try:
+                    if operation == "patch":
+                        current = json.loads(json.dumps(current))
+                        _apply_patch(current, args[1])
+                    elif operation in ("create", "upsert", "replace"):
+                        current = json.loads(json.dumps(args[-1]))
+                    elif operation == "delete":
+                        current = None
+                except azure.cosmos.exceptions.CosmosHttpResponseError as e:
+                    status = e.status_code
+
+            if status != 200:
+                raise azure.cosmos.exceptions.CosmosBatchOperationError(
+                    error_index=index,
+                    headers={},
+                    status_code=status,
+                    message=f"Batch operation {index} ({operation}) failed with status {status}",
+                    operation_responses=[{"statusCode": 424}] * index + [{"statusCode": status}],
+                )
+
+            if operation != "read":
+                staged[item_id] = None if current is None else {**current, "_etag": f'"{uuid.uuid4()}"'}
+                current = staged[item_id]
+            results.append({"statusCode": 200, "eTag": current["_etag"] if current else None, "resourceBody": current})
+
+        for item_id, item in staged.items():
+            if item is None:
+                self.partitions[partition_key].pop(item_id, None)
+                self.feed.pop((partition_key, item_id), None)
+            else:
+                self._write(item, etag=item["_etag"])
+
+        raw = json.dumps(results).encode()
+        self._charge("write", raw, response_hook, results)
+
+        return json.loads(raw)
+
+    def query_items(
+        self,
+        query: str,
+        parameters: list[dict] = None,
+        partition_key: typing.Any = None,
+        max_item_count: int = None,
+        response_hook=None,
+        **kwargs,
+    ) -> _QueryResults:
+        def _run() -> list:
+            partitions = [self.partitions.get(partition_key, {})] if partition_key is not None else self.partitions.values()
+            return execute_query(query, [item for partition in partitions for item in partition.values()], parameters)
+
+        return _QueryResults(self, _run, max_item_count=max_item_count, response_hook=response_hook)
+
+    def read_all_items(self, partition_key: typing.Any = None, max_item_count: int = None, response_hook=None, **kwargs) -> _QueryResults:
+        return self.query_items("SELECT * FROM c", partition_key=partition_key, max_item_count=max_item_count, response_hook=response_hook)
+
+    def query_items_change_feed(
+        self,
+        start_time: str = None,
+        continuation: str = None,
+        max_item_count: int = None,
+        response_hook=None,
+        **kwargs,
+    ) -> _ChangeFeed:
+        # digit-only tokens are V1 continuations (LSN of a single partition key range) the SDK cannot resume
+        # a container-wide change feed from
+        if continuation is not None and continuation.strip('"').isdigit():
+            raise ValueError(f"Continuation token {continuation} is not a change feed continuation of the container")
+
+        since = json.loads(base64.b64decode(continuation))["lsn"] if continuation else (self.lsn if start_time == "Now" else 0)
+
+        return _ChangeFeed(self, since, max_item_count=max_item_count, response_hook=response_hook)
+
+
+class InMemoryDatabase:
+    """
+    In-memory stand-in of the azure.cosmos.aio.DatabaseProxy subset used by the service (readiness check, containers)
+    """
+    def __init__(self, id: str, partition_keys: dict[str, str], **options) -> None:
+        """
+        :param id: Database ID
+        :param partition_keys: Partition key path by container name
+        :param options: Options of the containers (latency, charges, ..., see InMemoryContainer)
+        """
+        self.id = id
+        self.client_connection = types.SimpleNamespace(last_response_headers={})
+        self.containers = {
+            name: InMemoryContainer(partition_key=path, client_connection=self.client_connection, **options)
+            for name, path in partition_keys.items()
+        }
+
+    async def read(self, **kwargs) -> dict:
+        return {"id": self.id}
+
+    def get_container_client(self, container: str) -> InMemoryContainer:
+        return self.containers[container]
@@ -0,0 +1,131 @@
+import random
+import datetime as dt
+
+
+DOCUMENT_TYPES = [
+    {"key": "001", "name": "Balance sheet", "layer": 1, "order": 1},
+    {"key": "002", "name": "Profit and loss statement", "layer": 1, "order": 2},
+    {"key": "003", "name": "Cash flow statement", "layer": 1, "order": 3},
+    {"key": "080", "name": "Notes to the financial statements", "layer": 1, "order": 4},
+]
+SCORE_TYPE = {"key": "FC", "name": "Financial score", "layer": 2, "order": 1}
+
+NAMES = ["Alfa", "Beta", "Delta", "Omega", "Nova", "Prima", "Terra", "Astra", "Vega", "Orion", "Atlas", "Polar"]
+_SUFFIXES = ["Holding", "Trade", "Invest", "Logistics", "Engineering", "Energy", "Foods", "Textil", "Digital"]
+_FORMS = ["a.s.", "s.r.o.", "k.s.", "v.o.s."]
+_REGIONS = ["Praha", "Jihomoravsky", "Moravskoslezsky", "Stredocesky", "Plzensky", "Olomoucky", "Zlinsky"]
+_STREETS = ["Hlavni", "Nadrazni", "Skolni", "Husova", "Palackeho", "Masarykova", "Zahradni", "Komenskeho"]
+_AUTHORS = ["online-data-service", "analyst.novak", "analyst.svoboda", "analyst.dvorak"]
+
+
+def _subject(rng: random.Random, index: int) -> dict:
+    created = dt.date(2015, 1, 1) + dt.timedelta(days=rng.randrange(3000))
+
+    return {
+        "id": f"{10000000 + index * 7919 % 89999999:08d}",
+        "name": f"{rng.choice(NAMES)} {rng.choice(_SUFFIXES)} {rng.choice(_FORMS)}",
+        "address": {
+            "region": rng.choice(_REGIONS),
+            "street": f"{rng.choice(_STREETS)} {rng.randrange(1, 3000)}",
+            "zip": f"{rng.randrange(10000, 79999):05d}",
+        },
+        "currency": rng.choice(["CZK", "CZK", "CZK", "EUR"]),
+        "created": created.isoformat(),
+        "updated": (created + dt.timedelta(days=rng.randrange(365))).isoformat(),
+        "active": rng.random() < 0.9,
+        "extra": None,
+    }
+
+
+def _sheet_items(rng: random.Random, rows: int, cols: int) -> list[list]:
+    """
+    Generate items of a financial statement sheet (row code and label followed by numeric columns, sparse nulls)
+    """
+    header = ["code", "label", *[f"col{i}" for i in range(cols - 2)]]
+    items = [header]
+
+    for row in range(1, rows):
+        values = [
+            None if rng.random() < 0.05 else (rng.randrange(-10 ** 6, 10 ** 7) if rng.random() < 0.7 else round(rng.uniform(-1e6, 1e7), 2))
+            for _ in range(cols - 2)
+        ]
+        items.append([f"{row:03d}", f"Line {row}", *values])
+
+    return items
+
+
+def _document(
+    rng: random.Random,
+    subject_id: str,
+    doc_type: dict,
+    period: dt.date,
+    version: int,
+    sheets: list[tuple[int, int]],
+    score: bool = False,
+) -> list[dict]:
+    """
+    Generate document item and its sheet items
+    :return: Document item followed by its sheet items
+    """
+    doc_id = f"{subject_id}-{doc_type['key']}-{period.year}-v{version}"
+    created = dt.datetime(period.year + 1, 3, 31) + dt.timedelta(days=version * 7, seconds=rng.randrange(86400))
+
+    sheet_items = [
+        {
+            "id": f"{doc_id}-s{number}",
+            "_type": "sheet",
+            "subject_id": subject_id,
+            "doc_id": doc_id,
+            "name": f"{doc_type['name']} ({number})",
+            "number": number,
+            "items": [["score", round(rng.uniform(0, 1), 4)]] if score else _sheet_items(rng, rows, cols),
+        }
+        for number, (rows, cols) in enumerate(sheets, 1)
+    ]
+
+    doc = {
+        "id": doc_id,
+        "_type": "doc",
+        "subject_id": subject_id,
+        "type": doc_type,
+        "period": period.isoformat(),
+        "version": {"version": version, "author": rng.choice(_AUTHORS), "created": created.isoformat()},
+        "sheets": [{"id": sheet["id"], "name": sheet["name"], "number": sheet["number"]} for sheet in sheet_items],
+    }
+
+    return [doc, *sheet_items]
+
+
+def generate(
+    subjects: int = 100,
+    periods: int = 4,
+    rows: int = 200,
+    cols: int = 8,
+    seed: int = 0,
+) -> tuple[list[dict], list[dict]]:
+    """
+    Generate benchmark data set (the same seed gives the same data)
+    :param subjects: Number of subjects
+    :param periods: Number of yearly periods of documents per subject
+    :param rows: Number of rows of the statement sheets
+    :param cols: Number of columns of the statement sheets
+    :param seed: Random seed
+    :return: Subject items and document items (documents and sheets)
+    """
+    rng = random.Random(seed)
+    last_period = dt.date(dt.date.today().year - 1, 12, 31)
+
+    subject_items = [_subject(rng, i) for i in range(subjects)]
+    document_items = []
+
+    for subject in subject_items:
+        for p in range(periods):
+            period = dt.date(last_period.year - p, 12, 31)
+            for doc_type in DOCUMENT_TYPES:
+                # some statements were corrected, both versions are stored
+                for version in range(1, 3 if rng.random() < 0.2 else 2):
+                    sheets = [(rows, cols)] if doc_type["key"] != "080" else [(rows // 4, 4), (rows // 4, 4)]
+                    document_items += _document(rng, subject["id"], doc_type, period, version, sheets)
+            document_items += _document(rng, subject["id"], SCORE_TYPE, period, 1, [(1, 2)], score=True)
+
+    return subject_items, document_items
@@ -0,0 +1,368 @@
+"""
+Benchmark of the /api/v1 routes (requests/s, p50 and p99 latency and request charge per route) against the in-memory
+Cosmos stand-in and stub downstream services, results can be stored and compared with a baseline:
+
+    python -m test.benchmark.run --duration 5 --concurrency 16 --output benchmark.json --baseline previous.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import typing
+import asyncio
+import logging
+import argparse
+import datetime as dt
+import subprocess
+import collections
+
+import httpx
+
+from test.benchmark import data, services
+from test.benchmark.cosmos import InMemoryDatabase
+
+
+logger = logging.getLogger(__name__)
+
+
+class Scenario(typing.NamedTuple):
+    route: str                                                   # method and route template (report key)
+    request: typing.Callable[[random.Random], tuple[str, str, dict]]  # builds (method, url, httpx kwargs)
+
+
+class Dataset:
+    """
+    Generated data set with lookups for building requests
+    """
+    def __init__(self, subjects: list[dict], documents: list[dict]) -> None:
+        self.subjects = subjects
+        self.documents = [item for item in documents if item["_type"] == "doc"]
+        self.statements = [doc for doc in self.documents if doc["type"]["layer"] == 1]
+        self.sheets = {item["id"]: item for item in documents if item["_type"] == "sheet"}
+        self.created: list[str] = []      # subjects created by the benchmark (deleted by the delete scenario)
+        self.patched: list[str] = []      # subjects with patched sheets (having a rescore job)
+
+    def subject(self, rng: random.Random) -> str:
+        return rng.choice(self.subjects)["id"]
+
+    def statement(self, rng: random.Random) -> tuple[dict, dict]:
+        doc = rng.choice(self.statements)
+        sheet = rng.choice(doc["sheets"])
+        return doc, self.sheets[sheet["id"]]
+
+
+def _sheet_url(doc: dict, sheet: dict) -> str:
+    return f"/api/v1/subject/{doc['subject_id']}/document/{doc['id']}/sheet/{sheet['number']}"
+
+
+def _patch_sheet(ds: Dataset, rng: random.Random) -> tuple[str, str, dict]:
+    doc, sheet = ds.statement(rng)
+    rows, cols = len(sheet["items"]), len(sheet["items"][0])
+    ds.patched.append(doc["subject_id"])
+
+    return "PATCH", _sheet_url(doc, sheet), {
+        "json": [
+            {"row_num": rng.randrange(1, rows), "col_num": rng.randrange(2, cols), "value": rng.randrange(10 ** 6)}
+            for _ in range(10)
+        ],
+    }
+
+
+def _create_subject(ds: Dataset, rng: random.Random) -> tuple[str, str, dict]:
+    subject = {**rng.choice(ds.subjects), "id": f"B{len(ds.created):07d}-{rng.randrange(10 ** 6)}"}
+    ds.created.append(subject["id"])
+
+    return "POST", "/api/v1/subject", {"json": subject}
+
+
+def _delete_subject(ds: Dataset, rng: random.Random) -> tuple[str, str, dict]:
+    return "DELETE", f"/api/v1/subject/{ds.created.pop() if ds.created else 'missing'}", {}
+
+
+def scenarios(ds: Dataset) -> list[Scenario]:
+    """
+    Scenarios of all /api/v1 routes (except the profile route, which needs profiling enabled)
+    :param ds: Data set
+    :return: List of scenarios
+    """
+    subject, statement = ds.subject, ds.statement
+    doc_url = lambda doc: f"/api/v1/subject/{doc['subject_id']}/document/{doc['id']}"
+
+    return [
+        Scenario("GET /api/v1/probe/alive", lambda rng: ("GET", "/api/v1/probe/alive", {})),
+        Scenario("GET /api/v1/probe/ready", lambda rng: ("GET", "/api/v1/probe/ready", {})),
+        Scenario("GET /api/v1/probe/cache", lambda rng: ("GET", "/api/v1/probe/cache", {})),
+        Scenario("GET /api/v1/probe/metrics", lambda rng: ("GET", "/api/v1/probe/metrics", {})),
+        Scenario("GET /api/v1/subject", lambda rng: (
+            "GET", "/api/v1/subject", {"params": {"name": rng.choice(data.NAMES)}}
+        )),
+        Scenario("GET /api/v1/subject?limit", lambda rng: (
+            "GET", "/api/v1/subject", {"params": {"name": rng.choice(data.NAMES), "limit": 20}}
+        )),
+        Scenario("GET /api/v1/subject/{subject_id}", lambda rng: ("GET", f"/api/v1/subject/{subject(rng)}", {})),
+        Scenario("PATCH /api/v1/subject/{subject_id}", lambda rng: (
+            "PATCH", f"/api/v1/subject/{subject(rng)}", {"json": {"extra": f"benchmark {rng.randrange(1000)}"}}
+        )),
+        Scenario("POST /api/v1/subject", lambda rng: _create_subject(ds, rng)),
+        Scenario("DELETE /api/v1/subject/{subject_id}", lambda rng: _delete_subject(ds, rng)),
+        Scenario("GET /api/v1/subject/{subject_id}/document", lambda rng: (
+            "GET", f"/api/v1/subject/{subject(rng)}/document", {}
+        )),
+        Scenario("GET /api/v1/subject/{subject_id}/document (ndjson)", lambda rng: (
+            "GET", f"/api/v1/subject/{subject(rng)}/document", {"headers": {"accept": "application/x-ndjson"}}
+        )),
+        Scenario("GET /api/v1/subject/{subject_id}/document/{document_id}", lambda rng: (
+            "GET", doc_url(statement(rng)[0]), {}
+        )),
+        Scenario("GET /api/v1/subject/{subject_id}/document/{document_id}/sheet", lambda rng: (
+            "GET", f"{doc_url(statement(rng)[0])}/sheet", {}
+        )),
+        Scenario("GET /api/v1/subject/{subject_id}/document/{document_id}/sheet/{sheet_num}", lambda rng: (
+            "GET", _sheet_url(*statement(rng)), {}
+        )),
+        Scenario("GET /api/v1/subject/{subject_id}/document/{document_id}/sheet/{sheet_num}?rows", lambda rng: (
+            "GET", _sheet_url(*statement(rng)), {"params": {"rows": "-10:", "cols": "2:"}}
+        )),
+        Scenario("GET /api/v1/subject/{subject_id}/document/{document_id}/sheet/{sheet_num}/cell", lambda rng: (
+            "GET", f"{_sheet_url(*statement(rng))}/cell", {"params": [("cell", f"{rng.randrange(1, 10)}:{rng.randrange(2, 4)}") for _ in range(5)]}
+        )),
+        Scenario("PATCH /api/v1/subject/{subject_id}/document/{document_id}/sheet/{sheet_num}", lambda rng: _patch_sheet(ds, rng)),
+        Scenario("POST /api/v1/subject/{subject_id}/document/refresh", lambda rng: (
+            "POST", f"/api/v1/subject/{subject(rng)}/document/refresh", {"json": {"doc_type": "001", "period": "1990-12-31"}}
+        )),
+        Scenario("GET /api/v1/subject/{subject_id}/score", lambda rng: ("GET", f"/api/v1/subject/{subject(rng)}/score", {})),
+        Scenario("GET /api/v1/subject/{subject_id}/score/history", lambda rng: (
+            "GET", f"/api/v1/subject/{subject(rng)}/score/history", {}
+        )),
+        Scenario("POST /api/v1/subject/{subject_id}/score", lambda rng: ("POST", f"/api/v1/subject/{subject(rng)}/score", {})),
+        Scenario("GET /api/v1/subject/{subject_id}/score/job", lambda rng: (
+            "GET", f"/api/v1/subject/{rng.choice(ds.patched) if ds.patched else subject(rng)}/score/job", {}
+        )),
+        Scenario("POST /api/v1/export/{export_id}", lambda rng: (
+            "POST", f"/api/v1/export/bench-{rng.randrange(100)}", {"json": {}}
+        )),
+    ]
+
+
+def _percentile(values: list[float], q: float) -> float:
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+async def measure(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    database: InMemoryDatabase,
+    duration: float,
+    concurrency: int,
+    seed: int,
+) -> dict:
+    """
+    Run scenario with concurrent closed-loop workers for the given duration
+    :param client: HTTP client of the application
+    :param scenario: Scenario
+    :param database: In-memory database (for request charge)
+    :param duration: Duration (in seconds)
+    :param concurrency: Number of concurrent workers
+    :param seed: Random seed of the workers
+    :return: Result of the scenario (requests/s, latency percentiles in milliseconds, request charge, statuses)
+    """
+    latencies, statuses = [], collections.Counter()
+    charge = sum(container.total_charge for container in database.containers.values())
+    deadline = time.perf_counter() + duration
+
+    async def _worker(rng: random.Random) -> None:
+        while time.perf_counter() < deadline:
+            method, url, kwargs = scenario.request(rng)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[_worker(random.Random(seed * 1000 + i)) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    charge = sum(container.total_charge for container in database.containers.values()) - charge
+
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "ru_per_request": round(charge / len(latencies), 2) if latencies else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+async def drain(timeout: float = 30.0) -> None:
+    """
+    Wait for the background work started by the previous requests (rescoring jobs, sheet cache fills), so its
+    duration and request charge are not measured with the following scenario (work unfinished in time is cancelled)
+    :param timeout: Maximum time (in seconds) to wait
+    :return: None
+    """
+    from src.service import document_handler, rescore_handler
+
+    tasks = [job.task for job in rescore_handler._jobs.values() if not job.task.done()] + list(document_handler._filling.values())
+    if not tasks:
+        return
+
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results: dict, baseline: dict | None = None) -> str:
+    """
+    Format results as a table (with relative change of requests/s and p99 against the baseline)
+    :param results: Benchmark results
+    :param baseline: Baseline results (optional)
+    :return: Formatted table
+    """
+    lines = [f"{'route':<90} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'RU/req':>8}  statuses"]
+
+    for route, result in results["routes"].items():
+        line = (
+            f"{route:<90} {result['rps']:>9.1f} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+            f"{result['ru_per_request']:>8.2f}  {result['statuses']}"
+        )
+        if baseline and (previous := baseline.get("routes", {}).get(route)) and previous["rps"] and previous["p99_ms"]:
+            line += (
+                f"  req/s {(result['rps'] / previous['rps'] - 1) * 100:+.1f}%"
+                f"  p99 {(result['p99_ms'] / previous['p99_ms'] - 1) * 100:+.1f}%"
+            )
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def _configure_environment(urls: dict[str, str]) -> None:
+    """
+    Configure the service (before its modules are imported) to use the stub services and no external dependencies
+    :param urls: Base URLs of the stub services by configuration name
+    :return: None
+    """
+    os.environ.update(urls)
+    for key, value in {
+        "AZURE_CLIENT_ID": "00000000-0000-0000-0000-000000000000",
+        "AZURE_TENANT_ID": "00000000-0000-0000-0000-000000000000",
+        "COSMOS_URL": "https://localhost:8081/",
+        "COSMOS_DB": "benchmark",
+    }.items():
+        os.environ.setdefault(key, value)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """
+    Run the benchmark
+    :param args: Command line arguments
+    :return: Benchmark results
+    """
+    runner, urls = await services.start(latency={"model": args.model_latency, "online-data": args.service_latency, "export": args.service_latency})
+    _configure_environment(urls)
+
+    from src.core.config import CONFIG
+    from src.db import cosmos, change_feed
+    from src.service import http_handler, rescore_handler, subject_index_handler
+    import main
+
+    database = InMemoryDatabase(
+        id=CONFIG.COSMOS_DB,
+        partition_keys={CONFIG.COSMOS_SUBJECT_CONTAINER: "/id", CONFIG.COSMOS_DOCUMENT_CONTAINER: "/subject_id"},
+        latency=args.latency,
+        jitter=args.jitter,
+        throttle_rate=args.throttle_rate,
+    )
+    subjects, documents = data.generate(subjects=args.subjects, periods=args.periods, rows=args.rows, cols=args.cols, seed=args.seed)
+    database.containers[CONFIG.COSMOS_SUBJECT_CONTAINER].seed(subjects)
+    database.containers[CONFIG.COSMOS_DOCUMENT_CONTAINER].seed(documents)
+
+    # the lifespan is not run (telemetry is not set up), the client and the background services are started the same way
+    cosmos.open_client(database=database)
+    await http_handler.open_session()
+    await change_feed.start()
+    await subject_index_handler.start()
+
+    ds = Dataset(subjects=subjects, documents=documents)
+    results = {
+        "commit": _commit(),
+        "created": dt.datetime.now().isoformat(),
+        "options": vars(args),
+        "routes": {},
+    }
+
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app, raise_app_exceptions=False), base_url="http://benchmark", timeout=60) as client:
+            for scenario in scenarios(ds):
+                if args.route and not any(pattern in scenario.route for pattern in args.route):
+                    continue
+                # each scenario starts without the background work of the previous ones (and of its own warm-up)
+                await drain()
+                if args.warmup:
+                    await measure(client, scenario, database, duration=args.warmup, concurrency=args.concurrency, seed=args.seed + 1)
+                    await drain()
+                results["routes"][scenario.route] = await measure(
+                    client, scenario, database, duration=args.duration, concurrency=args.concurrency, seed=args.seed,
+                )
+                logger.info(f"{scenario.route}: {results['routes'][scenario.route]}")
+    finally:
+        await subject_index_handler.stop()
+        await change_feed.stop()
+        await rescore_handler.shutdown()
+        await http_handler.close_session()
+        await cosmos.close_client()
+        await runner.cleanup()
+
+    return results
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark of the /api/v1 routes against in-memory Cosmos and stub services")
+    parser.add_argument("--duration", type=float, default=5.0, help="measured duration of each route (seconds)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="warm-up duration of each route (seconds)")
+    parser.add_argument("--concurrency", type=int, default=16, help="number of concurrent clients")
+    parser.add_argument("--route", action="append", help="run only routes containing the text (repeatable)")
+    parser.add_argument("--subjects", type=int, default=100, help="number of generated subjects")
+    parser.add_argument("--periods", type=int, default=4, help="number of yearly periods of documents per subject")
+    parser.add_argument("--rows", type=int, default=200, help="number of rows of generated statement sheets")
+    parser.add_argument("--cols", type=int, default=8, help="number of columns of generated statement sheets")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the data and the clients")
+    parser.add_argument("--latency", type=float, default=0.002, help="latency of Cosmos round trips (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.001, help="maximum random latency added to Cosmos round trips (seconds)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="probability of throttled (429) Cosmos round trips")
+    parser.add_argument("--model-latency", type=float, default=0.05, help="latency of the model service (seconds)")
+    parser.add_argument("--service-latency", type=float, default=0.01, help="latency of the online-data and export services (seconds)")
+    parser.add_argument("--output", help="file to store the results (JSON)")
+    parser.add_argument("--baseline", help="results (JSON) of a previous run to compare with")
+    parser.add_argument("--log-level", default="WARNING", help="log level of the service")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    logger.setLevel(logging.INFO)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    print(report(results, baseline=baseline), file=sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
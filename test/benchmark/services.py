@@ -0,0 +1,88 @@
+import asyncio
+import datetime as dt
+import aiohttp.web
+
+
+def _score_document(docs: list[dict]) -> dict:
+    """
+    Build scoring document of the model service (score is derived from the number of input cells)
+    :param docs: Full documents posted for scoring
+    :return: Full scoring document
+    """
+    subject_id = docs[0]["subject_id"] if docs else "unknown"
+    period = max((doc["period"] for doc in docs), default=dt.date.today().isoformat())
+    cells = sum(len(row) for doc in docs for sheet in doc["sheets"] for row in sheet["items"])
+    doc_id = f"{subject_id}-FC-{period[:4]}-model"
+
+    return {
+        "id": doc_id,
+        "_type": "doc",
+        "subject_id": subject_id,
+        "type": {"key": "FC", "name": "Financial score", "layer": 2, "order": 1},
+        "period": period,
+        "version": {"version": 1, "author": "model-service", "created": dt.datetime.now().isoformat()},
+        "sheets": [
+            {
+                "id": f"{doc_id}-s1",
+                "_type": "sheet",
+                "subject_id": subject_id,
+                "doc_id": doc_id,
+                "name": "Financial score (1)",
+                "number": 1,
+                "items": [["score", cells % 1000 / 1000]],
+            }
+        ],
+    }
+
+
+def create_app(latency: dict[str, float] = None) -> aiohttp.web.Application:
+    """
+    Create stub of the model, online-data and export services (mounted under /model, /online-data and /export)
+    :param latency: Response latency (in seconds) by service name
+    :return: Application
+    """
+    latency = latency or {}
+
+    async def _score(request: aiohttp.web.Request) -> aiohttp.web.Response:
+        docs = await request.json()
+        await asyncio.sleep(latency.get("model", 0))
+        return aiohttp.web.json_response(_score_document(docs))
+
+    async def _refresh(request: aiohttp.web.Request) -> aiohttp.web.Response:
+        await asyncio.sleep(latency.get("online-data", 0))
+        return aiohttp.web.json_response(
+            {"doc_type": request.match_info["doc_type"], "subject_id": request.query.get("subject_id"), "status": "accepted"}
+        )
+
+    async def _export(request: aiohttp.web.Request) -> aiohttp.web.Response:
+        await asyncio.sleep(latency.get("export", 0))
+        return aiohttp.web.json_response({"export_id": request.match_info["export_id"], "status": "started"})
+
+    app = aiohttp.web.Application(client_max_size=256 * 1024 * 1024)
+    app.router.add_post("/model/api/v1/score", _score)
+    app.router.add_post("/online-data/api/v1/mfcr/{doc_type}", _refresh)
+    app.router.add_post("/export/api/v1/export/{export_id}", _export)
+
+    return app
+
+
+async def start(latency: dict[str, float] = None, host: str = "127.0.0.1") -> tuple[aiohttp.web.AppRunner, dict[str, str]]:
+    """
+    Start stub services on a free local port
+    :param latency: Response latency (in seconds) by service name
+    :param host: Host to bind
+    :return: Runner (to be cleaned up) and base URLs by service configuration name (i.e. MODEL_SERVICE_URL)
+    """
+    runner = aiohttp.web.AppRunner(create_app(latency=latency), access_log=None)
+    await runner.setup()
+    site = aiohttp.web.TCPSite(runner, host=host, port=0)
+    await site.start()
+
+    port = site._server.sockets[0].getsockname()[1]
+    base = f"http://{host}:{port}"
+
+    return runner, {
+        "MODEL_SERVICE_URL": f"{base}/model/api/v1",
+        "ONLINE_DATA_SERVICE_URL": f"{base}/online-data/api/v1",
+        "EXPORT_SERVICE_URL": f"{base}/export/api/v1",
+    }
@@ -20,8 +20,14 @@ def mock_document_service() -> unittest.mock.Mock:
 
 
 @pytest.fixture
-def mock_score_service_in_document() -> unittest.mock.Mock:
-    with unittest.mock.patch("src.api.v1.document.score_handler") as mock:
+def mock_rescore_service_in_document() -> unittest.mock.Mock:
+    with unittest.mock.patch("src.api.v1.document.rescore_handler") as mock:
+        yield mock
+
+
+@pytest.fixture
+def mock_rescore_service_in_score() -> unittest.mock.Mock:
+    with unittest.mock.patch("src.api.v1.score.rescore_handler") as mock:
         yield mock
 
 
@@ -0,0 +1,28 @@
+import json
+import pytest
+import unittest.mock
+
+
+@pytest.mark.asyncio
+async def test_model_response(mock_sheets) -> None:
+    from src.api.response import ModelResponse
+
+    response = ModelResponse(mock_sheets, headers={"etag": "etag"})
+
+    assert response.media_type == "application/json"
+    assert response.headers["etag"] == "etag"
+    assert json.loads(response.body) == [sheet.model_dump(mode="json", by_alias=True) for sheet in mock_sheets]
+
+
+@pytest.mark.asyncio
+async def test_model_response__not_revalidated(async_client, mock_document_service, mock_sheets) -> None:
+    from src.model.sheet import Sheet
+
+    # constructed without validation, so it would not pass the response model validation
+    sheet = Sheet.model_construct(**{**mock_sheets[0].model_dump(), "number": "one"})
+    mock_document_service.get_document_sheet = unittest.mock.AsyncMock(return_value=sheet)
+
+    response = await async_client.get("/api/v1/subject/subject-id/document/document-id/sheet/1")
+
+    assert response.status_code == 200
+    assert response.json()["number"] == "one"
@@ -1,3 +1,4 @@
+import json
 import pytest
 import unittest.mock
 import httpx
@@ -87,6 +88,57 @@ async def test_get_document_sheet(async_client: httpx.AsyncClient, mock_document
     )
 
 
+@pytest.mark.asyncio
+async def test_get_document_sheet__window(async_client: httpx.AsyncClient, mock_document_service, mock_sheets) -> None:
+    window = mock_sheets[0].model_copy(update={"items": [["c", "d"]]})
+    mock_document_service.get_document_sheet_window = unittest.mock.AsyncMock(return_value=(window, 2))
+
+    response = await async_client.get("/api/v1/subject/subject-id/document/doc-id/sheet/1?rows=-1:&cols=:2")
+
+    assert response.status_code == 200
+    assert response.json()["items"] == [["c", "d"]]
+    assert response.headers["sheet-row-count"] == "2"
+    assert response.headers["sheet-row-offset"] == "1"
+    mock_document_service.get_document_sheet_window.assert_awaited_once_with(
+        subject_id="subject-id",
+        document_id="doc-id",
+        sheet_num=1,
+        rows=slice(-1, None),
+        cols=slice(None, 2),
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheet__invalid_range(async_client: httpx.AsyncClient, mock_document_service) -> None:
+    response = await async_client.get("/api/v1/subject/subject-id/document/doc-id/sheet/1?rows=1-2")
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheet_cells(async_client: httpx.AsyncClient, mock_document_service) -> None:
+    cells = [SheetCell(row_num=0, col_num=1, value="b"), SheetCell(row_num=1, col_num=5, value=8.0)]
+    mock_document_service.get_document_sheet_cells = unittest.mock.AsyncMock(return_value=cells)
+
+    response = await async_client.get("/api/v1/subject/subject-id/document/doc-id/sheet/1/cell?cell=0:1&cell=1:5")
+
+    assert response.status_code == 200
+    assert response.json() == [cell.model_dump(mode="json") for cell in cells]
+    mock_document_service.get_document_sheet_cells.assert_awaited_once_with(
+        subject_id="subject-id",
+        document_id="doc-id",
+        sheet_num=1,
+        cells=[(0, 1), (1, 5)],
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheet_cells__invalid(async_client: httpx.AsyncClient, mock_document_service) -> None:
+    response = await async_client.get("/api/v1/subject/subject-id/document/doc-id/sheet/1/cell?cell=0:1&cell=-1:0")
+
+    assert response.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_get_document_sheet__no_data(async_client: httpx.AsyncClient, mock_document_service) -> None:
     mock_document_service.get_document_sheet.side_effect = HTTPException(404)
@@ -101,54 +153,40 @@ async def test_get_document_sheet__no_data(async_client: httpx.AsyncClient, mock
 async def test_patch_document(
     async_client: httpx.AsyncClient,
     mock_document_service,
-    mock_score_service_in_document,
+    mock_rescore_service_in_document,
     mock_sheets,
 ) -> None:
-    mock_document_service.patch_sheet_data = unittest.mock.AsyncMock(return_value=mock_sheets[0])
-    mock_score_service_in_document.trigger_score = unittest.mock.AsyncMock()
+    mock_document_service.patch_sheet_data = unittest.mock.AsyncMock(return_value=(mock_sheets[0], "new-etag"))
 
     response = await async_client.patch(
         "/api/v1/subject/subject-id/document/doc-id/sheet/1",
         json=[{"row_num": 1, "col_num": 1, "value": "new_value"}, {"row_num": 2, "col_num": 2, "value": 2.0}],
-        headers={"Correlation-Id": "correlation-id"},
+        headers={"Correlation-Id": "correlation-id", "If-Match": "etag"},
     )
 
     assert response.status_code == 200
     assert response.json() == mock_sheets[0].model_dump(mode="json", by_alias=True)
+    assert response.headers["etag"] == "new-etag"
     mock_document_service.patch_sheet_data.assert_awaited_once_with(
         subject_id="subject-id",
         document_id="doc-id",
         sheet_num=1,
         cell_data=[SheetCell(row_num=1, col_num=1, value="new_value"), SheetCell(row_num=2, col_num=2, value=2.0)],
+        etag="etag",
     )
-    mock_score_service_in_document.trigger_score.assert_awaited_once_with(
+    mock_rescore_service_in_document.schedule_rescore.assert_called_once_with(
         subject_id="subject-id",
         correlation_id="correlation-id",
     )
 
 
 @pytest.mark.asyncio
-async def test_patch_document__no_data(async_client: httpx.AsyncClient, mock_document_service) -> None:
-    mock_document_service.patch_sheet_data.side_effect = HTTPException(404)
-
-    response = await async_client.patch(
-        "/api/v1/subject/subject-id/document/doc-id/sheet/1",
-        json=[{"row_num": 1, "col_num": 1, "value": "new_value"}, {"row_num": 2, "col_num": 2, "value": 2.0}],
-        headers={"Correlation-Id": "correlation-id"},
-    )
-
-    assert response.status_code == 404
-    assert response.json() == {"detail": "Not Found"}
-
-
-@pytest.mark.asyncio
-async def test_patch_document__scoring_error(
+async def test_patch_document__no_data(
     async_client: httpx.AsyncClient,
     mock_document_service,
-    mock_score_service_in_document,
+    mock_rescore_service_in_document,
 ) -> None:
-    mock_document_service.patch_sheet_data = unittest.mock.AsyncMock()
-    mock_score_service_in_document.trigger_score.side_effect = HTTPException(500)
+    mock_document_service.patch_sheet_data.side_effect = HTTPException(404)
 
     response = await async_client.patch(
         "/api/v1/subject/subject-id/document/doc-id/sheet/1",
@@ -156,8 +194,9 @@ async def test_patch_document__scoring_error(
         headers={"Correlation-Id": "correlation-id"},
     )
 
-    assert response.status_code == 500
-    assert response.json() == {"detail": "Internal Server Error"}
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Not Found"}
+    mock_rescore_service_in_document.schedule_rescore.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -195,3 +234,41 @@ async def test_refresh_documents__error(async_client: httpx.AsyncClient, mock_do
     assert response.status_code == 500
     assert response.json() == {"detail": "Internal Server Error"}
 
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+@pytest.mark.asyncio
+async def test_get_documents__ndjson(async_client: httpx.AsyncClient, mock_document_service, mock_docs) -> None:
+    mock_document_service.iter_documents = unittest.mock.Mock(return_value=_aiter(mock_docs))
+
+    response = await async_client.get(
+        "/api/v1/subject/subject-id/document",
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        doc.model_dump(mode="json", by_alias=True) for doc in mock_docs
+    ]
+    mock_document_service.iter_documents.assert_called_once_with(subject_id="subject-id")
+    mock_document_service.get_documents.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheets__ndjson(async_client: httpx.AsyncClient, mock_document_service, mock_sheets) -> None:
+    mock_document_service.iter_document_sheets = unittest.mock.Mock(return_value=_aiter(mock_sheets))
+
+    response = await async_client.get(
+        "/api/v1/subject/subject-id/document/doc-id/sheet",
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        sheet.model_dump(mode="json", by_alias=True) for sheet in mock_sheets
+    ]
+    mock_document_service.iter_document_sheets.assert_called_once_with(subject_id="subject-id", document_id="doc-id")
@@ -28,3 +28,55 @@ async def test_ready__failure(async_client: httpx.AsyncClient, mock_cosmos) -> N
     assert response.status_code == 503
     assert response.json() == {"detail": "Service Unavailable"}
 
+
+
+@pytest.mark.asyncio
+async def test_cache(async_client: httpx.AsyncClient) -> None:
+    response = await async_client.get("/api/v1/probe/cache")
+
+    assert response.status_code == 200
+    assert "subject" in response.json()
+
+
+@pytest.mark.asyncio
+async def test_startup(async_client: httpx.AsyncClient) -> None:
+    response = await async_client.get("/api/v1/probe/startup")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"total", "imports_total", "imports", "steps"}
+
+
+@pytest.mark.asyncio
+async def test_metrics(async_client: httpx.AsyncClient) -> None:
+    await async_client.get("/api/v1/probe/alive")
+
+    response = await async_client.get("/api/v1/probe/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/probe/alive",status="200"}' in response.text
+    assert "# TYPE dependency_duration_seconds histogram" in response.text
+
+
+@pytest.mark.asyncio
+async def test_profile__disabled(async_client: httpx.AsyncClient) -> None:
+    response = await async_client.get("/api/v1/probe/profile/correlation-id")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_profile(async_client: httpx.AsyncClient) -> None:
+    import unittest.mock
+    import pyinstrument
+    from src.core import profiling
+
+    profiler = pyinstrument.Profiler()
+    profiler.start()
+    profiling._profiles.set("correlation-id", profiler.stop())
+
+    with unittest.mock.patch.object(profiling.CONFIG, "PROFILING_ENABLED", True):
+        response = await async_client.get("/api/v1/probe/profile/correlation-id?output=speedscope")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
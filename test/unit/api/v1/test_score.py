@@ -4,7 +4,7 @@ import httpx
 import datetime as dt
 
 from src.core.exception import HTTPException
-from src.model.score import ScoreSummary
+from src.model.score import ScoreSummary, ScoreJob
 
 
 @pytest.mark.asyncio
@@ -13,18 +13,18 @@ async def test_get_most_recent_score(
     mock_score_service_in_score,
     mock_score_summary,
 ) -> None:
-    mock_score_service_in_score.get_score_history = unittest.mock.AsyncMock(return_value=mock_score_summary)
+    mock_score_service_in_score.get_latest_score = unittest.mock.AsyncMock(return_value=mock_score_summary[0])
 
     response = await async_client.get("/api/v1/subject/subject-id/score")
 
     assert response.status_code == 200
     assert response.json() == mock_score_summary[0].model_dump(mode="json", by_alias=True)
-    mock_score_service_in_score.get_score_history.assert_awaited_once_with(subject_id="subject-id")
+    mock_score_service_in_score.get_latest_score.assert_awaited_once_with(subject_id="subject-id")
 
 
 @pytest.mark.asyncio
 async def test_get_most_recent_score__no_data(async_client: httpx.AsyncClient, mock_score_service_in_score) -> None:
-    mock_score_service_in_score.get_score_history = unittest.mock.AsyncMock(return_value=[])
+    mock_score_service_in_score.get_latest_score.side_effect = HTTPException(404)
 
     response = await async_client.get("/api/v1/subject/subject-id/score")
 
@@ -97,3 +97,25 @@ async def test_trigger_score__error(async_client: httpx.AsyncClient, mock_score_
 
     assert response.status_code == 500
     assert response.json() == {"detail": "Internal Server Error"}
+
+
+@pytest.mark.asyncio
+async def test_get_score_job(async_client: httpx.AsyncClient, mock_rescore_service_in_score) -> None:
+    job = ScoreJob(subject_id="subject-id", status="pending", requested="1970-01-01T00:00:00")
+    mock_rescore_service_in_score.get_job = unittest.mock.AsyncMock(return_value=job)
+
+    response = await async_client.get("/api/v1/subject/subject-id/score/job?wait=1")
+
+    assert response.status_code == 200
+    assert response.json() == job.model_dump(mode="json")
+    mock_rescore_service_in_score.get_job.assert_awaited_once_with(subject_id="subject-id", wait=1.0)
+
+
+@pytest.mark.asyncio
+async def test_get_score_job__no_data(async_client: httpx.AsyncClient, mock_rescore_service_in_score) -> None:
+    mock_rescore_service_in_score.get_job.side_effect = HTTPException(404)
+
+    response = await async_client.get("/api/v1/subject/subject-id/score/job")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Not Found"}
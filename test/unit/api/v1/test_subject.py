@@ -103,3 +103,63 @@ async def test_update_subject__error(async_client: httpx.AsyncClient, mock_subje
     assert response.json() == {"detail": "Bad Request"}
 
 
+@pytest.mark.asyncio
+async def test_search_subject__paginated(async_client: httpx.AsyncClient, mock_subject_service, mock_subject) -> None:
+    mock_subject_service.search_subject_page = unittest.mock.AsyncMock(return_value=(mock_subject[:1], "token"))
+
+    response = await async_client.get("/api/v1/subject?name=name&limit=1&cursor=previous")
+
+    assert response.status_code == 200
+    assert response.json() == [mock_subject[0].model_dump(mode="json", by_alias=True)]
+    assert response.headers["continuation-token"] == "token"
+    mock_subject_service.search_subject_page.assert_awaited_once_with(
+        ic=None,
+        name="name",
+        include_not_active=False,
+        limit=1,
+        cursor="previous",
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_subject__last_page(async_client: httpx.AsyncClient, mock_subject_service, mock_subject) -> None:
+    mock_subject_service.search_subject_page = unittest.mock.AsyncMock(return_value=(mock_subject, None))
+
+    response = await async_client.get("/api/v1/subject?limit=10")
+
+    assert response.status_code == 200
+    assert "continuation-token" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_search_subject__request_charge(async_client: httpx.AsyncClient, mock_subject_service, mock_subject) -> None:
+    from src.core import request_charge
+
+    async def _search_subject(**kwargs):
+        request_charge.current().add(3.5)
+        return mock_subject
+
+    mock_subject_service.search_subject = unittest.mock.AsyncMock(side_effect=_search_subject)
+
+    response = await async_client.get("/api/v1/subject?name=name")
+
+    assert response.status_code == 200
+    assert response.headers["x-request-charge"] == "3.50"
+
+
+@pytest.mark.asyncio
+async def test_search_subject__request_charge_budget(async_client: httpx.AsyncClient, mock_subject_service) -> None:
+    from src.core import request_charge
+
+    async def _search_subject(**kwargs):
+        for _ in range(10):
+            request_charge.current().check()
+            request_charge.current().add(100.0)
+
+    mock_subject_service.search_subject = unittest.mock.AsyncMock(side_effect=_search_subject)
+
+    with unittest.mock.patch.dict(request_charge.CONFIG.REQUEST_CHARGE_BUDGETS, {"/api/v1/subject": 250.0}):
+        response = await async_client.get("/api/v1/subject?name=name")
+
+    assert response.status_code == 400
+    assert response.headers["x-request-charge"] == "300.00"
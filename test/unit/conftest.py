@@ -2,6 +2,7 @@ import pytest
 import unittest.mock
 
 import os
+import sys
 import azure.cosmos.aio
 import azure.cosmos.exceptions
 
@@ -11,7 +12,27 @@ from src.model.sheet import Sheet
 from src.model.score import ScoreSummary
 
 
+# set before collection, so test modules can import CONFIG-dependent modules at the top
+_ENVIRON = {
+    "AZURE_CLIENT_ID": "00000000-0000-0000-0000-000000000000",
+    "AZURE_TENANT_ID": "00000000-0000-0000-0000-000000000000",
+    "AZURE_SUBSCRIPTION_ID": "00000000-0000-0000-0000-000000000000",
+    "COSMOS_URL": "https://test.documents.azure.com:443/",
+    "COSMOS_DB": "test",
+    "COSMOS_DOCUMENT_CONTAINER": "document",
+    "COSMOS_SUBJECT_CONTAINER": "subject",
+    "ONLINE_DATA_SERVICE_URL": "http://faspo-online-data-service/api/v1",
+    "MODEL_SERVICE_URL": "http://faspo-model-service/api/v1",
+    "EXPORT_SERVICE_URL": "http://faspo-export-service/api/v1",
+}
+
+for _key, _value in _ENVIRON.items():
+    os.environ.setdefault(_key, _value)
+
+
 class _AsyncIterator:
+    continuation_token = None
+
     def __init__(self, seq):
         self._seq = seq
         self.iter = iter(seq)
@@ -19,6 +40,9 @@ class _AsyncIterator:
     def __aiter__(self):
         return self
 
+    def by_page(self, continuation_token=None):
+        return _AsyncIterator([_AsyncIterator(self._seq)])
+
     async def __anext__(self):
         try:
             return next(self.iter)
@@ -30,23 +54,26 @@ class _AsyncIterator:
 @pytest.fixture(autouse=True)
 def mock_environ(monkeypatch) -> None:
     with unittest.mock.patch.dict(os.environ, clear=True):
-        env = {
-            "AZURE_CLIENT_ID": "00000000-0000-0000-0000-000000000000",
-            "AZURE_TENANT_ID": "00000000-0000-0000-0000-000000000000",
-            "AZURE_SUBSCRIPTION_ID": "00000000-0000-0000-0000-000000000000",
-            "COSMOS_URL": "https://test.documents.azure.com:443/",
-            "COSMOS_DB": "test",
-            "COSMOS_DOCUMENT_CONTAINER": "document",
-            "COSMOS_SUBJECT_CONTAINER": "subject",
-            "ONLINE_DATA_SERVICE_URL": "http://faspo-online-data-service/api/v1",
-            "MODEL_SERVICE_URL": "http://faspo-model-service/api/v1",
-            "EXPORT_SERVICE_URL": "http://faspo-export-service/api/v1",
-        }
-        for key, value in env.items():
+        for key, value in _ENVIRON.items():
             monkeypatch.setenv(key, value)
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_caches() -> None:
+    from src.core.cache import CACHES
+
+    yield
+    for cache in CACHES.values():
+        cache.clear()
+
+    # background reads into the sheet cache started by the test are not awaited by it
+    if (document_handler := sys.modules.get("src.service.document_handler")) is not None:
+        for task in document_handler._filling.values():
+            task.cancel()
+        document_handler._filling.clear()
+
+
 @pytest.fixture(autouse=True, scope="session")
 def mock_cosmos() -> azure.cosmos.aio.DatabaseProxy:
     with (
@@ -0,0 +1,84 @@
+import pytest
+import unittest.mock
+
+from src.core.cache import LRUCache, CACHES
+
+
+@pytest.mark.asyncio
+async def test_cache_get_set() -> None:
+    cache = LRUCache(name="test", max_size=2, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert CACHES["test"] is cache
+
+
+@pytest.mark.asyncio
+async def test_cache_eviction() -> None:
+    cache = LRUCache(name="test", max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_sizeof() -> None:
+    cache = LRUCache(name="test", max_size=10, ttl=60, sizeof=len)
+    cache.set("a", "x" * 6)
+    cache.set("b", "x" * 6)
+    cache.set("c", "x" * 11)
+
+    assert cache.peek("a") is None
+    assert cache.peek("b") == "x" * 6
+    assert cache.peek("c") is None
+    assert cache.stats()["size"] == 6
+
+
+@pytest.mark.asyncio
+async def test_cache_expiration() -> None:
+    cache = LRUCache(name="test", max_size=2, ttl=60)
+
+    with unittest.mock.patch("time.monotonic", return_value=0):
+        cache.set("a", 1)
+
+    with unittest.mock.patch("time.monotonic", return_value=61):
+        assert cache.get("a") is None
+        assert cache.peek("a") == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidate() -> None:
+    cache = LRUCache(name="test", max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.invalidate("a")
+
+    assert cache.peek("a") is None
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_fill_after_update() -> None:
+    cache = LRUCache(name="test", max_size=2, ttl=60)
+    writes = cache.writes
+    cache.update("a", "post-image")
+    cache.fill("a", "pre-image", writes=writes)
+
+    assert cache.peek("a") == "post-image"
+
+    cache.update("a")
+    cache.fill("a", "pre-image", writes=writes)
+
+    assert cache.peek("a") is None
+
+    cache.fill("a", "read", writes=cache.writes)
+
+    assert cache.peek("a") == "read"
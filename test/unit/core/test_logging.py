@@ -6,9 +6,8 @@ import datetime as dt
 
 @pytest.mark.asyncio
 async def test_setup_logging(capsys) -> None:
-    with unittest.mock.patch("azure.monitor.opentelemetry"):
-        from src.core.logging import setup_logging
-        setup_logging()
+    from src.core.logging import setup_logging
+    setup_logging()
 
     logging.info("Test message")
     captured = capsys.readouterr()
@@ -19,3 +18,39 @@ async def test_setup_logging(capsys) -> None:
     assert "test_setup_logging" in captured.err
     assert "0000000000000000" in captured.err
     assert "Test message" in captured.err
+
+
+@pytest.mark.asyncio
+async def test_setup_telemetry() -> None:
+    with unittest.mock.patch("azure.monitor.opentelemetry.configure_azure_monitor") as mock_configure:
+        from src.core.logging import setup_telemetry
+        setup_telemetry()
+
+    assert mock_configure.call_args.kwargs["logger_name"] == "src"
+
+
+@pytest.mark.asyncio
+async def test_start_telemetry__background(caplog) -> None:
+    from src.core import logging as core_logging, startup
+
+    with unittest.mock.patch.object(core_logging, "setup_telemetry", side_effect=ValueError("no connection string")):
+        await core_logging.start_telemetry()
+        await core_logging.stop_telemetry()
+
+    assert "Telemetry setup failed" in caplog.text
+    assert "telemetry" in startup.STEPS
+
+
+@pytest.mark.asyncio
+async def test_start_telemetry__blocking(monkeypatch) -> None:
+    from src.core import logging as core_logging
+    from src.core.config import CONFIG
+
+    monkeypatch.setattr(CONFIG, "TELEMETRY_BACKGROUND", False)
+    with (
+        unittest.mock.patch.object(core_logging, "setup_telemetry", side_effect=ValueError("no connection string")),
+        pytest.raises(ValueError),
+    ):
+        await core_logging.start_telemetry()
+
+    await core_logging.stop_telemetry()
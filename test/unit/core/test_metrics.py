@@ -0,0 +1,64 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_counter() -> None:
+    from src.core import metrics
+
+    counter = metrics.Counter(name="test_counter_total", help="Test counter", labels=("kind",))
+    counter.labels("a").inc()
+    counter.labels("a").inc(2)
+    counter.labels("b\"").inc()
+
+    assert counter.labels("a").value == 3
+    assert counter.render().splitlines() == [
+        "# HELP test_counter_total Test counter",
+        "# TYPE test_counter_total counter",
+        'test_counter_total{kind="a"} 3.0',
+        'test_counter_total{kind="b\\""} 1.0',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_histogram() -> None:
+    from src.core import metrics
+
+    histogram = metrics.Histogram(name="test_duration_seconds", help="Test histogram", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.labels().observe(value)
+
+    assert histogram.render().splitlines()[2:] == [
+        'test_duration_seconds_bucket{le="0.1"} 2',
+        'test_duration_seconds_bucket{le="1.0"} 3',
+        'test_duration_seconds_bucket{le="+Inf"} 4',
+        "test_duration_seconds_sum 5.65",
+        "test_duration_seconds_count 4",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_collected_cache_stats() -> None:
+    from src.core import metrics
+    from src.core.cache import LRUCache
+
+    cache = LRUCache(name="metrics-test", max_size=1, ttl=60)
+    cache.get("a")
+
+    assert 'cache_misses_total{cache="metrics-test"} 1' in metrics.render()
+
+
+@pytest.mark.asyncio
+async def test_middleware() -> None:
+    from src.core import metrics
+
+    async def _app(scope, receive, send):
+        assert metrics.HTTP_IN_FLIGHT.labels().value == 1
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+
+    async def _send(message):
+        pass
+
+    await metrics.MetricsMiddleware(_app)({"type": "http", "method": "GET"}, None, _send)
+
+    assert metrics.HTTP_IN_FLIGHT.labels().value == 0
+    assert metrics.HTTP_DURATION.labels("GET", "", 204).count == 1
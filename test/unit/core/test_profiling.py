@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+import asgi_correlation_id
+
+
+async def _app(scope, receive, send):
+    await asyncio.sleep(0.01)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+
+
+@pytest.mark.asyncio
+async def test_middleware__triggered() -> None:
+    from src.core import profiling
+
+    messages = []
+
+    async def _send(message):
+        messages.append(message)
+
+    token = asgi_correlation_id.correlation_id.set("profiled-request")
+    try:
+        await profiling.ProfilerMiddleware(_app)({"type": "http", "path": "/", "headers": [(b"x-profile", b"1")]}, None, _send)
+    finally:
+        asgi_correlation_id.correlation_id.reset(token)
+
+    assert (b"x-profile-id", b"profiled-request") in messages[0]["headers"]
+    assert "_app" in profiling.get_profile("profiled-request")
+    assert profiling.get_profile("profiled-request", output="html").startswith("<!DOCTYPE html>")
+
+
+@pytest.mark.asyncio
+async def test_middleware__not_triggered() -> None:
+    from src.core import profiling
+
+    messages = []
+
+    async def _send(message):
+        messages.append(message)
+
+    token = asgi_correlation_id.correlation_id.set("other-request")
+    try:
+        await profiling.ProfilerMiddleware(_app)({"type": "http", "path": "/", "headers": []}, None, _send)
+    finally:
+        asgi_correlation_id.correlation_id.reset(token)
+
+    assert messages[0]["headers"] == []
+    assert profiling.get_profile("other-request") is None
+
+
+@pytest.mark.asyncio
+async def test_middleware__sampled() -> None:
+    from src.core import profiling
+
+    middleware = profiling.ProfilerMiddleware(_app)
+    profiling.CONFIG.PROFILING_SAMPLE_RATE = 1.0
+    try:
+        assert middleware._should_profile({"headers": []})
+    finally:
+        profiling.CONFIG.PROFILING_SAMPLE_RATE = 0.0
+
+    assert not middleware._should_profile({"headers": []})
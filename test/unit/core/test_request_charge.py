@@ -0,0 +1,122 @@
+import pytest
+import logging
+import unittest.mock
+
+from src.core.exception import HTTPException
+
+
+@pytest.mark.asyncio
+async def test_response_hook() -> None:
+    from src.core import request_charge
+
+    charge = request_charge.RequestCharge()
+    chained = unittest.mock.Mock()
+    token = request_charge._charge.set(charge)
+    try:
+        hook = request_charge.response_hook(chained)
+        hook({"x-ms-request-charge": "2.5"}, {"id": "1"})
+        hook({"x-ms-request-charge": "1"}, [{"id": "1"}])
+        hook({}, None)
+    finally:
+        request_charge._charge.reset(token)
+
+    assert charge.total == 3.5
+    assert charge.operations == 3
+    assert chained.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_response_hook__pager_ignored() -> None:
+    import azure.core.async_paging
+    from src.core import request_charge
+
+    charge = request_charge.RequestCharge()
+    token = request_charge._charge.set(charge)
+    try:
+        request_charge.response_hook()({"x-ms-request-charge": "5"}, azure.core.async_paging.AsyncItemPaged())
+    finally:
+        request_charge._charge.reset(token)
+
+    assert charge.total == 0.0
+
+
+@pytest.mark.asyncio
+async def test_response_hook__outside_request() -> None:
+    from src.core import request_charge
+
+    hook = unittest.mock.Mock()
+
+    assert request_charge.response_hook() is None
+    assert request_charge.response_hook(hook) is hook
+
+
+@pytest.mark.asyncio
+async def test_budget() -> None:
+    from src.core import request_charge
+
+    charge = request_charge.RequestCharge({"route": unittest.mock.Mock(path="/api/v1/subject")})
+
+    with unittest.mock.patch.dict(request_charge.CONFIG.REQUEST_CHARGE_BUDGETS, {"/api/v1/subject": 10.0}):
+        charge.add(6.0)
+        charge.check()
+        charge.add(6.0)
+        with pytest.raises(HTTPException) as exc_info:
+            charge.check()
+
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_middleware(caplog) -> None:
+    from src.core import request_charge
+
+    messages = []
+
+    async def _app(scope, receive, send):
+        request_charge.current().add(4.25)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _send(message):
+        messages.append(message)
+
+    with caplog.at_level(logging.INFO, logger="src.core.request_charge"):
+        await request_charge.RequestChargeMiddleware(_app)({"type": "http"}, None, _send)
+
+    assert (b"x-request-charge", b"4.25") in messages[0]["headers"]
+    assert caplog.records[-1].request_charge == 4.25
+    assert request_charge.current() is None
+
+
+@pytest.mark.asyncio
+async def test_filter() -> None:
+    from src.core import request_charge
+
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "message", None, None)
+    charge = request_charge.RequestCharge()
+    charge.add(1.234)
+    token = request_charge._charge.set(charge)
+    try:
+        assert request_charge.RequestChargeFilter().filter(record)
+    finally:
+        request_charge._charge.reset(token)
+
+    assert record.request_charge == 1.23
+
+
+@pytest.mark.asyncio
+async def test_detached() -> None:
+    from src.core import request_charge
+
+    charge, shared = request_charge.RequestCharge(), request_charge.RequestCharge()
+    token = request_charge._charge.set(charge)
+    try:
+        assert request_charge.detached().run(request_charge.current) is None
+        assert request_charge.detached(shared).run(request_charge.current) is shared
+    finally:
+        request_charge._charge.reset(token)
+
+    shared.add(2.5)
+    charge.include(shared)
+
+    assert (charge.total, charge.operations) == (2.5, 1)
@@ -0,0 +1,165 @@
+import pytest
+import unittest.mock
+import azure.cosmos.exceptions
+
+from src.core.exception import HTTPException
+
+
+def _cosmos_error(status_code: int, retry_after_ms: str = None) -> azure.cosmos.exceptions.CosmosHttpResponseError:
+    error = azure.cosmos.exceptions.CosmosHttpResponseError(status_code=status_code, message="error")
+    error.headers = {"x-ms-retry-after-ms": retry_after_ms} if retry_after_ms else {}
+    return error
+
+
+@pytest.fixture
+def mock_sleep():
+    with unittest.mock.patch("src.core.retry.asyncio.sleep", new_callable=unittest.mock.AsyncMock) as mock_sleep:
+        yield mock_sleep
+
+
+@pytest.mark.asyncio
+async def test_call__throttled(mock_sleep) -> None:
+    from src.core import retry
+
+    operation = unittest.mock.AsyncMock(side_effect=[_cosmos_error(429, "250"), "ok"])
+    retries = retry.metrics.RETRIES.labels("cosmos", 429).value
+    throttles = retry.metrics.THROTTLES.labels("cosmos").value
+
+    assert await retry.call(operation) == "ok"
+    assert operation.await_count == 2
+    assert mock_sleep.await_args.args[0] >= 0.25
+    assert retry.metrics.RETRIES.labels("cosmos", 429).value == retries + 1
+    assert retry.metrics.THROTTLES.labels("cosmos").value == throttles + 1
+
+
+@pytest.mark.asyncio
+async def test_call__not_retryable(mock_sleep) -> None:
+    from src.core import retry
+
+    operation = unittest.mock.AsyncMock(side_effect=_cosmos_error(404))
+
+    with pytest.raises(azure.cosmos.exceptions.CosmosHttpResponseError):
+        await retry.call(operation)
+
+    assert operation.await_count == 1
+    mock_sleep.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_call__max_attempts(mock_sleep) -> None:
+    from src.core import retry
+
+    operation = unittest.mock.AsyncMock(side_effect=_cosmos_error(503))
+
+    with pytest.raises(azure.cosmos.exceptions.CosmosHttpResponseError):
+        await retry.call(operation)
+
+    assert operation.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_call__budget(mock_sleep) -> None:
+    from src.core import retry
+
+    budget = retry.RetryBudget(retries=1)
+    token = retry._budget.set(budget)
+    try:
+        operation = unittest.mock.AsyncMock(side_effect=_cosmos_error(449))
+        with pytest.raises(azure.cosmos.exceptions.CosmosHttpResponseError):
+            await retry.call(operation)
+        with pytest.raises(azure.cosmos.exceptions.CosmosHttpResponseError):
+            await retry.call(operation)
+    finally:
+        retry._budget.reset(token)
+
+    assert operation.await_count == 3
+    assert budget.remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_call__deadline(mock_sleep) -> None:
+    from src.core import retry
+
+    operation = unittest.mock.AsyncMock(side_effect=_cosmos_error(429, "60000"))
+
+    with pytest.raises(azure.cosmos.exceptions.CosmosHttpResponseError):
+        await retry.call(operation)
+
+    assert operation.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_iterate__resume(mock_sleep) -> None:
+    from src.core import retry
+    from test.benchmark.cosmos import InMemoryContainer
+
+    container = InMemoryContainer(partition_key="/id")
+    for i in range(5):
+        await container.upsert_item({"id": str(i)})
+    offsets = []
+
+    def _query():
+        results = container.query_items(query="SELECT VALUE c.id FROM c", max_item_count=2)
+        fetch = results.fetch
+
+        async def _fetch(offset):
+            offsets.append(offset)
+            if offsets == [0, 2]:
+                raise _cosmos_error(429)
+            return await fetch(offset)
+
+        results.fetch = _fetch
+        return results
+
+    assert [item async for item in retry.iterate(_query)] == ["0", "1", "2", "3", "4"]
+    assert offsets == [0, 2, 2, 4]
+
+
+@pytest.mark.asyncio
+async def test_retry_hint() -> None:
+    from src.core import retry
+
+    assert retry.retry_hint(_cosmos_error(429, "100")) == (True, 0.1)
+    assert retry.retry_hint(_cosmos_error(409)) == (False, None)
+    assert retry.retry_hint(HTTPException(503, headers={"Retry-After": "2"})) == (True, 2.0)
+    assert retry.retry_hint(HTTPException(502)) == (True, None)
+    assert retry.retry_hint(HTTPException(502), idempotent=False) == (False, None)
+    assert retry.retry_hint(HTTPException(429), idempotent=False) == (True, None)
+    assert retry.retry_hint(HTTPException(500)) == (False, None)
+    assert retry.retry_hint(ValueError()) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_parse_retry_after() -> None:
+    from src.core import retry
+
+    assert retry._parse_retry_after("3") == 3.0
+    assert retry._parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert retry._parse_retry_after("soon") is None
+    assert retry._parse_retry_after(None) is None
+
+
+@pytest.mark.asyncio
+async def test_backoff() -> None:
+    from src.core import retry
+
+    assert all(0 <= retry.backoff(attempt) <= 0.1 * 2 ** attempt for attempt in range(5))
+    assert all(retry.backoff(attempt) <= 5.0 for attempt in range(20))
+
+
+@pytest.mark.asyncio
+async def test_middleware() -> None:
+    from src.core import retry
+
+    budgets = []
+
+    async def _app(scope, receive, send):
+        budgets.append(retry._budget.get())
+
+    middleware = retry.RetryBudgetMiddleware(_app)
+    await middleware({"type": "http"}, None, None)
+    await middleware({"type": "http"}, None, None)
+
+    assert all(isinstance(budget, retry.RetryBudget) for budget in budgets)
+    assert budgets[0] is not budgets[1]
+    assert retry._budget.get() is None
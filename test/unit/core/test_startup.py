@@ -0,0 +1,52 @@
+import pytest
+import sys
+
+
+@pytest.fixture
+def startup():
+    from src.core import startup
+
+    yield startup
+    startup.untrack_imports()
+
+
+@pytest.mark.asyncio
+async def test_track_imports(startup, tmp_path, monkeypatch) -> None:
+    (tmp_path / "startup_test_package").mkdir()
+    (tmp_path / "startup_test_package" / "__init__.py").write_text("from . import module\n")
+    (tmp_path / "startup_test_package" / "module.py").write_text("import time\ntime.sleep(0.01)\nVALUE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    startup.track_imports()
+    try:
+        import startup_test_package
+    finally:
+        startup.untrack_imports()
+        sys.modules.pop("startup_test_package.module", None)
+        sys.modules.pop("startup_test_package", None)
+
+    assert startup_test_package.module.VALUE == 1
+    assert startup.IMPORTS["startup_test_package.module"] >= 0.01
+    assert startup.IMPORTS["startup_test_package"] < startup.IMPORTS["startup_test_package.module"]
+    assert startup.report()["imports"]["startup_test_package"] >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_step(startup) -> None:
+    with startup.step("test"):
+        pass
+
+    assert 0 <= startup.report()["steps"]["test"] < 1
+
+
+@pytest.mark.asyncio
+async def test_finish(startup, caplog, monkeypatch) -> None:
+    monkeypatch.setattr(startup, "TOTAL", None)
+    startup.track_imports()
+
+    with caplog.at_level("INFO"):
+        startup.finish()
+
+    assert startup.TOTAL > 0
+    assert startup._timer not in sys.meta_path
+    assert "Started in" in caplog.text
@@ -0,0 +1,157 @@
+import pytest
+import unittest.mock
+
+
+async def _read_all(container, continuation=None) -> tuple[list[dict], str | None]:
+    from src.db.change_feed import read_changes
+
+    items = []
+    async for page, continuation in read_changes(container=container, continuation=continuation):
+        items.extend(page)
+
+    return items, continuation
+
+
+@pytest.mark.asyncio
+async def test_read_changes():
+    from test.benchmark.cosmos import InMemoryContainer
+
+    container = InMemoryContainer(partition_key="/id")
+    container.seed([{"id": "1"}])
+
+    items, continuation = await _read_all(container=container)
+
+    assert items == []
+    assert continuation is not None and not continuation.isdigit()
+
+    container.seed([{"id": "2"}, {"id": "3"}])
+    items, continuation = await _read_all(container=container, continuation=continuation)
+
+    assert [item["id"] for item in items] == ["2", "3"]
+
+    container.seed([{"id": "2", "name": "changed"}])
+    items, continuation = await _read_all(container=container, continuation=continuation)
+
+    assert items[0]["name"] == "changed"
+    assert await _read_all(container=container, continuation=continuation) == ([], continuation)
+
+
+@pytest.mark.asyncio
+async def test_read_changes__pages():
+    from src.db.change_feed import read_changes
+    from test.benchmark.cosmos import InMemoryContainer
+
+    container = InMemoryContainer(partition_key="/id")
+    _, continuation = await _read_all(container=container)
+    container.seed([{"id": str(i)} for i in range(250)])
+
+    pages = [(len(items), token) async for items, token in read_changes(container=container, continuation=continuation)]
+    continuation = pages[-1][1]
+
+    # each page comes with the token to resume after it
+    assert [size for size, _ in pages] == [100, 100, 50, 0]
+    assert len({token for _, token in pages}) == 3
+    assert len((await _read_all(container=container, continuation=pages[0][1]))[0]) == 150
+    assert await _read_all(container=container, continuation=continuation) == ([], continuation)
+
+
+@pytest.mark.asyncio
+async def test_dispatch():
+    from src.db import change_feed
+
+    received = []
+    failing = unittest.mock.Mock(side_effect=ValueError, __qualname__="failing")
+
+    async def _async_callback(items):
+        received.extend(items)
+
+    with unittest.mock.patch.dict(change_feed._subscribers, {"test": [failing, _async_callback]}):
+        await change_feed._dispatch(container_name="test", items=[{"id": "1"}])
+
+    assert received == [{"id": "1"}]
+    failing.assert_called_once_with([{"id": "1"}])
+
+
+@pytest.mark.asyncio
+async def test_checkpoint(tmp_path, monkeypatch):
+    from src.db import change_feed
+
+    monkeypatch.setattr(change_feed.CONFIG, "COSMOS_CHANGE_FEED_CHECKPOINT_FILE", str(tmp_path / "checkpoints.json"))
+
+    with unittest.mock.patch.dict(change_feed._checkpoints, clear=True):
+        change_feed._checkpoint(container_name="test", continuation="token")
+        change_feed._checkpoints.clear()
+        change_feed._load_checkpoints()
+
+        assert change_feed._checkpoints == {"test": "token"}
+
+
+async def _pages(pages):
+    for page in pages:
+        yield page
+
+
+@pytest.mark.asyncio
+async def test_start(mock_cosmos):
+    from src.db import change_feed
+
+    with (
+        unittest.mock.patch.object(
+            change_feed, "read_changes", side_effect=lambda **_: _pages([([], "token")])
+        ) as mock_read_changes,
+        unittest.mock.patch.dict(change_feed._checkpoints, clear=True),
+    ):
+        await change_feed.start()
+
+        assert change_feed._checkpoints == {"subject": "token", "document": "token"}
+        assert len(change_feed._tasks) == 2
+        assert mock_read_changes.call_count == 2
+
+        await change_feed.stop()
+
+    assert change_feed._tasks == []
+
+
+@pytest.mark.asyncio
+async def test_follow__failure(monkeypatch):
+    import asyncio
+    from src.core import metrics
+    from src.db import change_feed
+    from test.benchmark.cosmos import InMemoryContainer
+
+    monkeypatch.setattr(change_feed.CONFIG, "COSMOS_CHANGE_FEED_POLL_INTERVAL", 0.01)
+    failures = metrics.CHANGE_FEED_FAILURES.labels("test").value
+
+    with unittest.mock.patch.dict(change_feed._checkpoints, {"test": "123"}, clear=True):
+        task = asyncio.create_task(change_feed.follow(container_name="test", container=InMemoryContainer(partition_key="/id")))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert metrics.CHANGE_FEED_FAILURES.labels("test").value > failures
+
+
+@pytest.mark.asyncio
+async def test_follow__checkpoint_per_page(monkeypatch):
+    import asyncio
+    from src.db import change_feed
+    from test.benchmark.cosmos import InMemoryContainer
+
+    monkeypatch.setattr(change_feed.CONFIG, "COSMOS_CHANGE_FEED_POLL_INTERVAL", 0.01)
+    container = InMemoryContainer(partition_key="/id")
+    _, continuation = await _read_all(container=container)
+    container.seed([{"id": str(i)} for i in range(250)])
+    checkpoints = []
+
+    with (
+        unittest.mock.patch.dict(change_feed._checkpoints, {"test": continuation}, clear=True),
+        unittest.mock.patch.dict(change_feed._subscribers, {"test": [lambda items: checkpoints.append(change_feed._checkpoints["test"])]}),
+    ):
+        task = asyncio.create_task(change_feed.follow(container_name="test", container=container))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    # the checkpoint advances after each dispatched page, not only after the whole backlog
+    assert len(checkpoints) == 3
+    assert len(set(checkpoints)) == 3
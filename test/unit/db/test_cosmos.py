@@ -1 +1,122 @@
 import pytest
+import unittest.mock
+import azure.cosmos.exceptions
+
+from ..conftest import _AsyncIterator
+
+
+@pytest.mark.asyncio
+async def test_retrying_container__call(mock_cosmos):
+    from src.db import cosmos
+
+    with (
+        unittest.mock.patch("src.core.retry.asyncio.sleep", new_callable=unittest.mock.AsyncMock),
+        unittest.mock.patch.object(
+            mock_cosmos.get_container_client(),
+            "read_item",
+            unittest.mock.AsyncMock(side_effect=[azure.cosmos.exceptions.CosmosHttpResponseError(status_code=429), {"id": "1"}]),
+        ) as mock_read_item,
+    ):
+        assert await cosmos.c_document.read_item(item="1", partition_key="x") == {"id": "1"}
+
+    assert mock_read_item.await_count == 2
+    mock_read_item.assert_awaited_with(item="1", partition_key="x")
+
+
+def test_open_client__no_sdk_throttling_retry(mock_cosmos):
+    import azure.cosmos.aio
+    from src.db import cosmos
+
+    assert cosmos.c_document is not None
+    connection_policy = azure.cosmos.aio.CosmosClient.call_args.kwargs["connection_policy"]
+
+    assert connection_policy.RetryOptions.MaxRetryAttemptCount == 0
+
+
+@pytest.mark.asyncio
+async def test_retrying_container__query(mock_cosmos):
+    from src.db import cosmos
+
+    with unittest.mock.patch.object(
+        mock_cosmos.get_container_client(), "query_items", unittest.mock.Mock(return_value=_AsyncIterator([{"id": "1"}]))
+    ):
+        assert [item async for item in cosmos.c_subject.query_items(query="SELECT * FROM c")] == [{"id": "1"}]
+
+    with unittest.mock.patch.object(mock_cosmos.get_container_client(), "query_items") as mock_query_items:
+        cosmos.c_subject.query_items(query="SELECT * FROM c").by_page(continuation_token="token")
+
+    mock_query_items.return_value.by_page.assert_called_once_with(continuation_token="token")
+
+
+@pytest.mark.asyncio
+async def test_retrying_container__passthrough(mock_cosmos):
+    from src.db import cosmos
+
+    assert cosmos.c_document.query_items_change_feed is mock_cosmos.get_container_client().query_items_change_feed
+
+
+@pytest.mark.asyncio
+async def test_retrying_container__request_charge(mock_cosmos):
+    from src.core import request_charge
+    from src.db import cosmos
+
+    async def _read_item(**kwargs):
+        kwargs["response_hook"]({"x-ms-request-charge": "1.5"}, {"id": "1"})
+        return {"id": "1"}
+
+    charge = request_charge.RequestCharge()
+    token = request_charge._charge.set(charge)
+    try:
+        with unittest.mock.patch.object(
+            mock_cosmos.get_container_client(), "read_item", unittest.mock.AsyncMock(side_effect=_read_item)
+        ):
+            await cosmos.c_document.read_item(item="1", partition_key="x")
+    finally:
+        request_charge._charge.reset(token)
+
+    assert charge.total == 1.5
+
+
+@pytest.mark.asyncio
+async def test_retrying_container__metrics(mock_cosmos):
+    from src.core import metrics
+    from src.db import cosmos
+
+    read_items = metrics.DEPENDENCY_DURATION.labels("cosmos", "read_item", "document", "ok").count
+    queries = metrics.DEPENDENCY_DURATION.labels("cosmos", "query_items", "subject", "ok").count
+
+    with unittest.mock.patch.object(
+        mock_cosmos.get_container_client(), "query_items", unittest.mock.Mock(return_value=_AsyncIterator([{"id": "1"}]))
+    ):
+        await cosmos.c_document.read_item(item="1", partition_key="x")
+        [item async for item in cosmos.c_subject.query_items(query="SELECT * FROM c")]
+
+    assert metrics.DEPENDENCY_DURATION.labels("cosmos", "read_item", "document", "ok").count == read_items + 1
+    assert metrics.DEPENDENCY_DURATION.labels("cosmos", "query_items", "subject", "ok").count == queries + 1
+
+
+@pytest.mark.asyncio
+async def test_open_client__database(mock_cosmos):
+    from src.db import cosmos
+
+    database = unittest.mock.MagicMock()
+    with unittest.mock.patch.dict(cosmos.__dict__):
+        for name in cosmos._CLIENT_ATTRS:
+            cosmos.__dict__.pop(name, None)
+
+        cosmos.open_client(database=database)
+
+        assert cosmos.client is None
+        assert cosmos.db is database
+        assert cosmos.c_document.container is database.get_container_client.return_value
+        assert cosmos.c_subject.name == "subject"
+
+        await cosmos.close_client()
+
+        assert "db" not in cosmos.__dict__
+        with pytest.raises(RuntimeError):
+            _ = cosmos.c_document
+
+        cosmos.open_client()
+
+        assert cosmos.db is mock_cosmos
@@ -1,6 +1,6 @@
 import pytest
 
-from src.model.sheet import _SheetInfo, Sheet
+from src.model.sheet import _SheetInfo, Sheet, CompactSheet
 
 
 @pytest.mark.asyncio
@@ -35,3 +35,73 @@ async def test_sheet():
     assert sheet.doc_id == "789"
     assert sheet.items == [[1, 2, 3], ["a", "b", "c"], [None, None, None]]
 
+
+@pytest.mark.asyncio
+async def test_sheet_from_item(mock_sheets):
+    item = {**mock_sheets[0].model_dump(mode="json", by_alias=True), "_etag": "etag", "_ts": 1}
+    sheet = Sheet.from_item(item)
+
+    assert sheet == mock_sheets[0]
+    assert sheet.model_dump_json(by_alias=True) == mock_sheets[0].model_dump_json(by_alias=True)
+    assert sheet.model_fields_set == mock_sheets[0].model_fields_set | {"inner_type"}
+
+
+@pytest.mark.asyncio
+async def test_compact_sheet__round_trip():
+    item = {
+        "id": "123",
+        "name": "Test name",
+        "number": 1,
+        "_type": "sheet",
+        "subject_id": "456",
+        "doc_id": "789",
+        "items": [[1, 2.5, "a", True], [2, 3.0, None], [3], [2 ** 70, 1.5, "b", False]],
+    }
+    sheet = CompactSheet.from_item(item)
+
+    assert sheet.to_item() == item
+    assert [type(value) for value in sheet.to_items()[0]] == [int, float, str, bool]
+    assert [column.typecode for column in sheet.columns] == ["q", "d", "d", "d"]
+
+
+@pytest.mark.asyncio
+async def test_compact_sheet__cell():
+    sheet = CompactSheet.from_item({"id": "123", "items": [[1, 2, 3], ["a", None], [4.5, 5, 6]]})
+
+    assert sheet.cell(0, 0) == 1
+    assert sheet.cell(1, 0) == "a"
+    assert sheet.cell(1, -1) is None
+    assert sheet.cell(-1, -1) == 6
+    assert sheet.cell(2, 0) == 4.5
+
+    with pytest.raises(IndexError):
+        sheet.cell(1, 2)
+    with pytest.raises(IndexError):
+        sheet.cell(3, 0)
+
+
+@pytest.mark.asyncio
+async def test_compact_sheet__column_sum():
+    sheet = CompactSheet.from_item({"id": "123", "items": [[1, 0.5], [2, "x"], ["y", 1], [3, None]]})
+
+    assert sheet.column_sum(0) == 6
+    assert type(sheet.column_sum(0)) is int
+    assert sheet.column_sum(1) == 1.5
+
+
+@pytest.mark.asyncio
+async def test_compact_sheet__nbytes():
+    small = CompactSheet.from_item({"id": "123", "items": [[1.0] * 10] * 10})
+    large = CompactSheet.from_item({"id": "123", "items": [[1.0] * 10] * 1000})
+
+    assert 0 < small.nbytes < large.nbytes
+    assert large.nbytes < 1000 * 10 * 16
+
+
+@pytest.mark.asyncio
+async def test_compact_sheet__window():
+    sheet = CompactSheet.from_item({"id": "123", "items": [[1, 2, 3], ["a", None], [4.5, 5, 6]]})
+
+    assert sheet.window(rows=slice(-1, None), cols=slice(-1, None)) == [[6]]
+    assert sheet.window(rows=slice(0, 2), cols=slice(1, None)) == [[2, 3], [None]]
+    assert sheet.window(rows=slice(5, None), cols=slice(None)) == []
@@ -1,3 +1,4 @@
+import asyncio
 import unittest.mock
 
 import pytest
@@ -50,22 +51,29 @@ async def test_get_document__not_found(mock_cosmos):
 
 @pytest.mark.asyncio
 async def test_get_document_sheets(mock_cosmos, mock_sheets):
-    from src.service.document_handler import get_document_sheets
+    from src.service.document_handler import get_document_sheets, _sheet_cache
 
-    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator([s.model_dump() for s in mock_sheets])
-    sheets = await get_document_sheets(subject_id="x", document_id="y")
+    items = [sheet.model_dump(mode="json", by_alias=True) for sheet in mock_sheets]
+    with unittest.mock.patch.object(
+        mock_cosmos.get_container_client(), "query_items", unittest.mock.Mock(return_value=_AsyncIterator(items))
+    ) as mock_query_items:
+        result = await get_document_sheets(subject_id="x", document_id="y")
 
-    assert len(sheets) == len(mock_sheets)
+    assert result == mock_sheets
+    assert mock_query_items.call_args.kwargs["parameters"] == [{"name": "@doc_id", "value": "y"}]
+    assert _sheet_cache.peek(("x", "y", mock_sheets[0].number)).to_item() == items[0]
 
 
 @pytest.mark.asyncio
 async def test_get_document_sheets__no_data(mock_cosmos):
     from src.service.document_handler import get_document_sheets
 
-    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator([])
-    sheets = await get_document_sheets(subject_id="x", document_id="y")
+    with unittest.mock.patch.object(
+        mock_cosmos.get_container_client(), "query_items", unittest.mock.Mock(return_value=_AsyncIterator([]))
+    ):
+        sheets = await get_document_sheets(subject_id="x", document_id="unknown")
 
-    assert len(sheets) == 0
+    assert sheets == []
 
 
 @pytest.mark.asyncio
@@ -78,6 +86,207 @@ async def test_get_document_sheet(mock_cosmos, mock_sheets):
     assert sheet.id == mock_sheets[0].id
 
 
+@pytest.mark.asyncio
+async def test_get_document_sheet__cached(mock_cosmos, mock_sheets):
+    from src.model.sheet import CompactSheet
+    from src.service.document_handler import get_document_sheet, _sheet_cache
+
+    _sheet_cache.set(("x", "y", 1), CompactSheet.from_item(mock_sheets[1].model_dump(mode="json", by_alias=True)))
+    mock_cosmos.get_container_client().query_items.reset_mock()
+    sheet = await get_document_sheet(subject_id="x", document_id="y", sheet_num=1)
+
+    assert sheet.id == mock_sheets[1].id
+    mock_cosmos.get_container_client().query_items.assert_not_called()
+
+
+def _batch_error(status_code: int) -> azure.cosmos.exceptions.CosmosBatchOperationError:
+    return azure.cosmos.exceptions.CosmosBatchOperationError(
+        error_index=0, headers={}, status_code=status_code, message="error", operation_responses=[]
+    )
+
+
+@pytest.mark.asyncio
+async def test_patch_data__batch(mock_cosmos, mock_sheets):
+    from src.model.sheet import CompactSheet, SheetCell
+    from src.service.document_handler import patch_sheet_data, _sheet_cache
+
+    item = {**mock_sheets[1].model_dump(mode="json", by_alias=True), "_etag": "etag"}
+    post_image = {**item, "items": [["x", "b", 1.0, 2.0], ["c", "d", 3.0, 4.0]], "_etag": "etag-2"}
+    _sheet_cache.set(("x", "y", 2), CompactSheet.from_item(item))
+    mock_cosmos.get_container_client().query_items.reset_mock()
+
+    with unittest.mock.patch.object(
+        mock_cosmos.get_container_client(),
+        "execute_item_batch",
+        unittest.mock.AsyncMock(return_value=[{"eTag": "etag-2", "resourceBody": post_image}]),
+    ) as mock_batch:
+        sheet, etag = await patch_sheet_data(
+            subject_id="x",
+            document_id="y",
+            sheet_num=2,
+            cell_data=[SheetCell(row_num=0, col_num=0, value="x")] * 25,
+        )
+
+    operations = mock_batch.call_args.kwargs["batch_operations"]
+
+    assert sheet.items == post_image["items"]
+    assert etag == "etag-2"
+    assert mock_batch.await_count == 1
+    assert [len(op[1][1]) for op in operations] == [10, 10, 5]
+    assert [op[2] for op in operations] == [{}, {}, {}]
+    assert _sheet_cache.peek(("x", "y", 2)).to_item() == post_image
+    mock_cosmos.get_container_client().query_items.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_patch_data__read_in_flight(mock_cosmos, mock_sheets):
+    from src.model.sheet import SheetCell
+    from src.service.document_handler import patch_sheet_data, read_compact_sheet, _sheet_cache
+
+    item = {**mock_sheets[1].model_dump(mode="json", by_alias=True), "_etag": "etag"}
+    post_image = {**item, "items": [["x", "b", 1.0, 2.0], ["c", "d", 3.0, 4.0]], "_etag": "etag-2"}
+    read, write = asyncio.Event(), asyncio.Event()
+
+    async def _read_item(**kwargs):
+        read.set()
+        await write.wait()
+        return item
+
+    with (
+        unittest.mock.patch.object(mock_cosmos.get_container_client(), "read_item", unittest.mock.AsyncMock(side_effect=_read_item)),
+        unittest.mock.patch.object(
+            mock_cosmos.get_container_client(), "query_items", unittest.mock.Mock(return_value=_AsyncIterator([item]))
+        ),
+        unittest.mock.patch.object(
+            mock_cosmos.get_container_client(),
+            "execute_item_batch",
+            unittest.mock.AsyncMock(return_value=[{"eTag": "etag-2", "resourceBody": post_image}]),
+        ),
+    ):
+        reading = asyncio.create_task(read_compact_sheet(subject_id="x", document_id="y", sheet_num=2, sheet_id=item["id"]))
+        await read.wait()
+        await patch_sheet_data(subject_id="x", document_id="y", sheet_num=2, cell_data=[SheetCell(row_num=0, col_num=0, value="x")], etag="etag")
+        write.set()
+        await reading
+
+    assert _sheet_cache.peek(("x", "y", 2)).to_item() == post_image
+
+
+@pytest.mark.asyncio
+async def test_patch_data__charge_budget(mock_cosmos, mock_sheets):
+    from src.core import request_charge
+    from src.model.sheet import CompactSheet, SheetCell
+    from src.service.document_handler import patch_sheet_data, _sheet_cache
+
+    item = {**mock_sheets[1].model_dump(mode="json", by_alias=True), "_etag": "etag"}
+    post_image = {**item, "items": [["x", "b", 1.0, 2.0], ["c", "d", 3.0, 4.0]], "_etag": "etag-2"}
+    _sheet_cache.set(("x", "y", 2), CompactSheet.from_item(item))
+
+    async def _execute_item_batch(**kwargs):
+        kwargs["response_hook"]({"x-ms-request-charge": "50"}, None)
+        return [{"eTag": "etag-2", "resourceBody": post_image}]
+
+    charge = request_charge.RequestCharge({"route": unittest.mock.Mock(path="/sheet")})
+    token = request_charge._charge.set(charge)
+    try:
+        with (
+            unittest.mock.patch.dict(request_charge.CONFIG.REQUEST_CHARGE_BUDGETS, {"/sheet": 10.0}),
+            unittest.mock.patch.object(
+                mock_cosmos.get_container_client(), "execute_item_batch", side_effect=_execute_item_batch
+            ),
+        ):
+            _, etag = await patch_sheet_data(
+                subject_id="x", document_id="y", sheet_num=2, cell_data=[SheetCell(row_num=0, col_num=0, value="x")]
+            )
+    finally:
+        request_charge._charge.reset(token)
+
+    # the committed write is reported and cached even though it exceeded the budget
+    assert etag == "etag-2"
+    assert charge.total == 50.0
+    assert _sheet_cache.peek(("x", "y", 2)).to_item() == post_image
+
+
+@pytest.mark.asyncio
+async def test_patch_data__too_large(mock_cosmos, mock_sheets):
+    from src.model.sheet import CompactSheet, SheetCell
+    from src.service.document_handler import patch_sheet_data, _sheet_cache
+
+    item = {**mock_sheets[1].model_dump(mode="json", by_alias=True), "_etag": "etag"}
+    _sheet_cache.set(("x", "y", 2), CompactSheet.from_item(item))
+
+    with (
+        unittest.mock.patch.object(mock_cosmos.get_container_client(), "execute_item_batch") as mock_batch,
+        pytest.raises(HTTPException) as exc_info,
+    ):
+        await patch_sheet_data(
+            subject_id="x",
+            document_id="y",
+            sheet_num=2,
+            cell_data=[SheetCell(row_num=0, col_num=0, value="x")] * 1001,
+        )
+
+    assert exc_info.value.status_code == 413
+    mock_batch.assert_not_called()
+    assert _sheet_cache.peek(("x", "y", 2)).to_item() == item
+
+
+@pytest.mark.asyncio
+async def test_patch_data__conflict(mock_cosmos, mock_sheets):
+    from src.model.sheet import CompactSheet, SheetCell
+    from src.service.document_handler import patch_sheet_data, _sheet_cache
+
+    _sheet_cache.set(("x", "y", 2), CompactSheet.from_item(mock_sheets[1].model_dump(mode="json", by_alias=True)))
+
+    with unittest.mock.patch.object(
+        mock_cosmos.get_container_client(),
+        "execute_item_batch",
+        unittest.mock.AsyncMock(side_effect=_batch_error(412)),
+    ) as mock_batch:
+        with pytest.raises(HTTPException) as exc_info:
+            await patch_sheet_data(
+                subject_id="x",
+                document_id="y",
+                sheet_num=2,
+                cell_data=[SheetCell(row_num=0, col_num=0, value="x")],
+                etag="old-etag",
+            )
+
+    assert exc_info.value.status_code == 412
+    assert mock_batch.await_count == 1
+    assert mock_batch.call_args.kwargs["batch_operations"][0][2] == {"if_match_etag": "old-etag"}
+    assert _sheet_cache.peek(("x", "y", 2)) is None
+
+
+@pytest.mark.asyncio
+async def test_patch_data__unconditional(mock_cosmos, mock_sheets):
+    from src.model.sheet import SheetCell
+    from src.service.document_handler import patch_sheet_data
+
+    item = {**mock_sheets[1].model_dump(mode="json", by_alias=True), "_etag": "etag"}
+    mock_cosmos.get_container_client().query_items.side_effect = lambda **kwargs: _AsyncIterator([item])
+
+    try:
+        with unittest.mock.patch.object(
+            mock_cosmos.get_container_client(),
+            "execute_item_batch",
+            unittest.mock.AsyncMock(return_value=[{"eTag": "etag-2", "resourceBody": {**item, "_etag": "etag-2"}}]),
+        ) as mock_batch:
+            _, etag = await patch_sheet_data(
+                subject_id="x",
+                document_id="y",
+                sheet_num=2,
+                cell_data=[SheetCell(row_num=0, col_num=0, value="x")],
+            )
+    finally:
+        mock_cosmos.get_container_client().query_items.side_effect = None
+
+    assert etag == "etag-2"
+    assert mock_batch.await_count == 1
+    assert mock_batch.call_args.kwargs["batch_operations"][0][2] == {}
+    assert "ARRAY_LENGTH(c.items) AS row_count" in mock_cosmos.get_container_client().query_items.call_args.kwargs["query"]
+
+
 @pytest.mark.asyncio
 async def test_get_document_sheet__not_found(mock_cosmos):
     from src.service.document_handler import get_document_sheet
@@ -141,3 +350,181 @@ async def test_refresh_documents__error():
             "003": {"detail": "OK", "status": 200},
             "080": {"detail": "OK", "status": 200},
         }
+
+
+@pytest.mark.asyncio
+async def test_iter_document_sheets(mock_cosmos, mock_sheets):
+    from src.service.document_handler import iter_document_sheets
+
+    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator([s.model_dump() for s in mock_sheets])
+    sheets = [sheet async for sheet in iter_document_sheets(subject_id="x", document_id="y")]
+
+    assert [sheet.id for sheet in sheets] == [sheet.id for sheet in mock_sheets]
+
+
+@pytest.mark.asyncio
+async def test_on_changes(mock_sheets):
+    from src.model.sheet import CompactSheet
+    from src.service.document_handler import _on_changes, _sheet_cache
+
+    cached = {**mock_sheets[0].model_dump(mode="json", by_alias=True), "_type": "sheet"}
+    changed = {**cached, "items": [[1]]}
+    _sheet_cache.set(("1", "1", 1), CompactSheet.from_item(cached))
+
+    _on_changes([changed, {**changed, "number": 2}, {"_type": "doc", "id": "1"}])
+
+    assert _sheet_cache.peek(("1", "1", 1)).to_item() == changed
+    assert _sheet_cache.peek(("1", "1", 2)) is None
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheet_window(mock_cosmos, mock_sheets):
+    from src.service.document_handler import get_document_sheet_window
+
+    item = mock_sheets[0].model_dump(mode="json", by_alias=True)
+    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator(
+        [{**item, "items": [row[1:3] for row in item["items"][-1:]], "row_count": 2}]
+    )
+    sheet, row_count = await get_document_sheet_window(
+        subject_id="x", document_id="y", sheet_num=1, rows=slice(-1, None), cols=slice(1, 3)
+    )
+    query = mock_cosmos.get_container_client().query_items.call_args.kwargs["query"]
+
+    assert sheet.items == [["d", 5.0]]
+    assert row_count == 2
+    assert "ARRAY_SLICE(ARRAY(SELECT VALUE ARRAY_SLICE(r, 1, 2) FROM r IN c.items), -1) AS items" in query
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheet_window__fills_cache(mock_cosmos, mock_sheets):
+    from src.service.document_handler import get_document_sheet_window, _sheet_cache, _filling
+
+    container = mock_cosmos.get_container_client()
+    item = mock_sheets[0].model_dump(mode="json", by_alias=True)
+
+    with (
+        unittest.mock.patch.object(container, "query_items", side_effect=lambda **_: _AsyncIterator(
+            [{**item, "items": item["items"][:1], "row_count": 2}]
+        )),
+        unittest.mock.patch.object(container, "read_item", return_value=item) as mock_read,
+    ):
+        await get_document_sheet_window(subject_id="x", document_id="y", sheet_num=1, rows=slice(0, 1))
+        await get_document_sheet_window(subject_id="x", document_id="y", sheet_num=1, rows=slice(0, 1))
+        await asyncio.gather(*_filling.values())
+
+    assert not _filling
+    assert _sheet_cache.get(("x", "y", 1)).meta["id"] == item["id"]
+    mock_read.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheet_window__fill_limit(mock_cosmos, mock_sheets, monkeypatch):
+    from src.service import document_handler
+
+    monkeypatch.setattr(document_handler.CONFIG, "SHEET_CACHE_FILLS", 1)
+    item = mock_sheets[0].model_dump(mode="json", by_alias=True)
+
+    with unittest.mock.patch.object(
+        mock_cosmos.get_container_client(),
+        "query_items",
+        side_effect=lambda **_: _AsyncIterator([{**item, "items": item["items"][:1], "row_count": 2}]),
+    ):
+        await document_handler.get_document_sheet_window(subject_id="x", document_id="y", sheet_num=1, fill=False)
+
+        assert not document_handler._filling
+
+        for sheet_num in (1, 2):
+            await document_handler.get_document_sheet_window(subject_id="x", document_id="y", sheet_num=sheet_num)
+
+    assert list(document_handler._filling) == [("x", "y", 1)]
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheet_window__in_memory(mock_sheets):
+    from test.benchmark.cosmos import InMemoryContainer
+    from src.service.document_handler import get_document_sheet_window, _filling
+
+    container = InMemoryContainer(partition_key="/subject_id")
+    item = mock_sheets[0].model_dump(mode="json", by_alias=True)
+    await container.upsert_item({**item, "subject_id": "x", "doc_id": "y", "number": 1})
+
+    with unittest.mock.patch("src.db.cosmos.c_document", container):
+        sheet, row_count = await get_document_sheet_window(
+            subject_id="x", document_id="y", sheet_num=1, rows=slice(-1, None), cols=slice(1, 3)
+        )
+        await asyncio.gather(*_filling.values())
+
+    assert sheet.items == [row[1:3] for row in item["items"][-1:]]
+    assert row_count == len(item["items"])
+
+
+@pytest.mark.asyncio
+async def test_in_memory_query__in_source():
+    from test.benchmark.cosmos import InMemoryContainer
+
+    container = InMemoryContainer(partition_key="/id")
+    await container.upsert_item({"id": "1", "items": [[1], [2]]})
+
+    with pytest.raises(ValueError):
+        [
+            item
+            async for item
+            in container.query_items(query="SELECT VALUE ARRAY(SELECT VALUE r FROM r IN ARRAY_SLICE(c.items, 1)) FROM c")
+        ]
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheet_window__residual(mock_cosmos, mock_sheets):
+    from src.service.document_handler import get_document_sheet_window
+
+    item = mock_sheets[0].model_dump(mode="json", by_alias=True)
+    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator(
+        [{**item, "items": item["items"][:1], "row_count": 2}]
+    )
+    sheet, _ = await get_document_sheet_window(
+        subject_id="x", document_id="y", sheet_num=1, rows=slice(0, 1), cols=slice(1, -1)
+    )
+    query = mock_cosmos.get_container_client().query_items.call_args.kwargs["query"]
+
+    assert sheet.items == [["b", 1.0, 2.0, 3.0]]
+    assert "ARRAY_SLICE(c.items, 0, 1) AS items" in query
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheet_window__cached(mock_cosmos, mock_sheets):
+    from src.model.sheet import CompactSheet
+    from src.service.document_handler import get_document_sheet_window, _sheet_cache
+
+    _sheet_cache.set(("x", "y", 1), CompactSheet.from_item(mock_sheets[0].model_dump(mode="json", by_alias=True)))
+    mock_cosmos.get_container_client().query_items.reset_mock()
+    sheet, row_count = await get_document_sheet_window(
+        subject_id="x", document_id="y", sheet_num=1, rows=slice(-1, None), cols=slice(-1, None)
+    )
+
+    assert sheet.items == [[8.0]]
+    assert row_count == 2
+    mock_cosmos.get_container_client().query_items.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheet_cells(mock_cosmos):
+    from src.service.document_handler import get_document_sheet_cells
+
+    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator([{"id": "1", "cells": {"c0": "b"}}])
+    cells = await get_document_sheet_cells(subject_id="x", document_id="y", sheet_num=1, cells=[(0, 1), (9, 9)])
+    query = mock_cosmos.get_container_client().query_items.call_args.kwargs["query"]
+
+    assert [(cell.row_num, cell.col_num, cell.value) for cell in cells] == [(0, 1, "b")]
+    assert '{"c0": c.items[0][1], "c1": c.items[9][9]} AS cells' in query
+
+
+@pytest.mark.asyncio
+async def test_get_document_sheet_cells__not_found(mock_cosmos):
+    from src.service.document_handler import get_document_sheet_cells
+
+    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator([])
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_document_sheet_cells(subject_id="x", document_id="y", sheet_num=1, cells=[(0, 0)])
+
+    assert exc_info.value.status_code == 404
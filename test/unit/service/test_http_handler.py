@@ -7,10 +7,17 @@ from src.service import http_handler
 
 @pytest.fixture
 def mock_aiohttp():
-    with unittest.mock.patch("aiohttp.ClientSession") as mock_client:
+    with (
+        unittest.mock.patch("aiohttp.TCPConnector"),
+        unittest.mock.patch("aiohttp.ClientSession") as mock_client,
+    ):
         mock_client.return_value = mock_client
+        mock_client.closed = False
+        mock_client.close = unittest.mock.AsyncMock()
         mock_client.__aenter__.return_value = mock_client
+        http_handler._session = None
         yield mock_client
+        http_handler._session = None
 
 
 @pytest.mark.asyncio
@@ -30,3 +37,49 @@ async def test_post_data__error(mock_aiohttp):
     with pytest.raises(HTTPException):
         await http_handler.post_data("http://test.com", {"key": "value"})
 
+
+@pytest.mark.asyncio
+async def test_open_session__shared(mock_aiohttp):
+    session = await http_handler.open_session()
+
+    assert await http_handler.open_session() is session
+    assert mock_aiohttp.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_close_session(mock_aiohttp):
+    await http_handler.open_session()
+    await http_handler.close_session()
+
+    mock_aiohttp.close.assert_awaited_once()
+    assert http_handler._session is None
+
+
+@pytest.mark.asyncio
+async def test_post_data__retry(mock_aiohttp):
+    mock_aiohttp.post = mock_aiohttp
+    type(mock_aiohttp).status = unittest.mock.PropertyMock(side_effect=[503] * 3 + [200] * 2)
+    mock_aiohttp.json.side_effect = unittest.mock.AsyncMock(return_value={"key": "value"})
+
+    with unittest.mock.patch("src.core.retry.asyncio.sleep", new_callable=unittest.mock.AsyncMock) as mock_sleep:
+        assert await http_handler.post_data("http://test.com", {"key": "value"}) == {"key": "value"}
+
+    mock_sleep.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_post_data__gateway_error(mock_aiohttp):
+    mock_aiohttp.post = mock_aiohttp
+    type(mock_aiohttp).status = unittest.mock.PropertyMock(return_value=502)
+    mock_aiohttp.json.side_effect = unittest.mock.AsyncMock(return_value={"key": "value"})
+
+    with unittest.mock.patch("src.core.retry.asyncio.sleep", new_callable=unittest.mock.AsyncMock) as mock_sleep:
+        with pytest.raises(HTTPException) as exc_info:
+            await http_handler.post_data("http://test.com", {"key": "value"})
+
+        assert exc_info.value.status_code == 502
+        mock_sleep.assert_not_awaited()
+
+        type(mock_aiohttp).status = unittest.mock.PropertyMock(side_effect=[502] * 3 + [200] * 2)
+        assert await http_handler.post_data("http://test.com", {"key": "value"}, idempotent=True) == {"key": "value"}
+        mock_sleep.assert_awaited_once()
@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+import unittest.mock
+
+from src.core.exception import HTTPException
+
+
+@pytest.fixture
+async def mock_score_handler(monkeypatch, mock_score_summary):
+    from src.service import rescore_handler
+
+    monkeypatch.setattr(rescore_handler.CONFIG, "RESCORE_DEBOUNCE", 0.01)
+
+    with unittest.mock.patch.object(rescore_handler, "score_handler") as mock:
+        mock.trigger_score = unittest.mock.AsyncMock(return_value=mock_score_summary[0])
+        yield mock
+
+    await rescore_handler.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_schedule_rescore__coalesced(mock_score_handler, mock_score_summary):
+    from src.service.rescore_handler import schedule_rescore, get_job
+
+    for _ in range(5):
+        schedule_rescore(subject_id="x", correlation_id="correlation-id")
+
+    job = await get_job(subject_id="x", wait=1)
+
+    assert job.status == "done"
+    assert job.coalesced == 4
+    assert job.result == mock_score_summary[0]
+    mock_score_handler.trigger_score.assert_awaited_once_with(subject_id="x", correlation_id="correlation-id")
+
+
+@pytest.mark.asyncio
+async def test_schedule_rescore__fresh_context(mock_score_handler, mock_score_summary):
+    from src.core import request_charge, retry
+    from src.service.rescore_handler import schedule_rescore, get_job
+
+    inherited = []
+
+    async def _trigger_score(**_):
+        inherited.append((request_charge.current(), retry._budget.get()))
+        return mock_score_summary[0]
+
+    mock_score_handler.trigger_score.side_effect = _trigger_score
+    charge_token = request_charge._charge.set(request_charge.RequestCharge())
+    budget_token = retry._budget.set(retry.RetryBudget())
+    try:
+        schedule_rescore(subject_id="x")
+    finally:
+        request_charge._charge.reset(charge_token)
+        retry._budget.reset(budget_token)
+    await get_job(subject_id="x", wait=1)
+
+    assert inherited == [(None, None)]
+
+
+@pytest.mark.asyncio
+async def test_schedule_rescore__after_done(mock_score_handler):
+    from src.service.rescore_handler import schedule_rescore, get_job
+
+    schedule_rescore(subject_id="x")
+    await get_job(subject_id="x", wait=1)
+    schedule_rescore(subject_id="x")
+    await get_job(subject_id="x", wait=1)
+
+    assert mock_score_handler.trigger_score.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_schedule_rescore__failed(mock_score_handler):
+    from src.service.rescore_handler import schedule_rescore, get_job
+
+    mock_score_handler.trigger_score.side_effect = HTTPException(500, detail="Model failed")
+    schedule_rescore(subject_id="x")
+    job = await get_job(subject_id="x", wait=1)
+
+    assert job.status == "failed"
+    assert job.detail == "Model failed"
+
+
+@pytest.mark.asyncio
+async def test_schedule_rescore__max_delay(mock_score_handler, monkeypatch):
+    from src.service.rescore_handler import schedule_rescore, get_job, CONFIG
+
+    monkeypatch.setattr(CONFIG, "RESCORE_DEBOUNCE", 0.05)
+    monkeypatch.setattr(CONFIG, "RESCORE_MAX_DELAY", 0.1)
+
+    for _ in range(20):
+        schedule_rescore(subject_id="x")
+        await asyncio.sleep(0.01)
+
+    job = await get_job(subject_id="x", wait=1)
+
+    assert job.status == "done"
+    assert mock_score_handler.trigger_score.await_count >= 2
+
+
+@pytest.mark.asyncio
+async def test_schedule_rescore__forgotten(mock_score_handler, monkeypatch):
+    from src.service.rescore_handler import schedule_rescore, get_job, CONFIG, _jobs
+
+    monkeypatch.setattr(CONFIG, "RESCORE_JOB_TTL", 0.01)
+    schedule_rescore(subject_id="x")
+    await get_job(subject_id="x", wait=1)
+    await asyncio.sleep(0.05)
+
+    assert "x" not in _jobs
+
+
+@pytest.mark.asyncio
+async def test_get_job__not_found(mock_score_handler):
+    from src.service.rescore_handler import get_job
+
+    with pytest.raises(HTTPException):
+        await get_job(subject_id="x")
@@ -0,0 +1,303 @@
+import asyncio
+import pytest
+import unittest.mock
+
+from src.core.exception import HTTPException
+from src.model.document import Document
+from ..conftest import _AsyncIterator
+
+
+@pytest.fixture(autouse=True)
+def reset_read_item(mock_cosmos):
+    yield
+    mock_cosmos.get_container_client().read_item.side_effect = None
+    mock_cosmos.get_container_client().query_items.side_effect = None
+
+
+def _query_items(docs: list[dict], sheet: dict):
+    """
+    Query mock returning documents for document queries and last cell window of the sheet for sheet queries
+    """
+    def _query(query, **kwargs):
+        if "c._type = 'sheet'" in query:
+            return _AsyncIterator([{**sheet, "items": [sheet["items"][-1][-1:]], "row_count": len(sheet["items"])}])
+        return _AsyncIterator(docs)
+
+    return _query
+
+
+@pytest.mark.asyncio
+async def test_get_score_history(mock_cosmos, mock_docs, mock_sheets):
+    from src.service.score_handler import get_score_history
+
+    mock_cosmos.get_container_client().query_items.side_effect = _query_items(
+        docs=[d.model_dump(mode="json", by_alias=True) for d in mock_docs],
+        sheet=mock_sheets[0].model_dump(mode="json", by_alias=True),
+    )
+
+    history = await get_score_history(subject_id="x")
+
+    assert len(history) == len(mock_docs)
+    assert all(score.score == 8.0 for score in history)
+
+
+@pytest.mark.asyncio
+async def test_read_scores__bounded(mock_cosmos, mock_docs, mock_sheets):
+    from src.service.score_handler import _read_scores
+
+    in_flight, max_in_flight = 0, 0
+
+    class _Window:
+        continuation_token = None
+
+        def __init__(self, doc_id):
+            self.doc_id = doc_id
+
+        def __aiter__(self):
+            return self
+
+        def by_page(self, continuation_token=None):
+            return _AsyncIterator([self])
+
+        async def __anext__(self):
+            nonlocal in_flight, max_in_flight
+            if self.doc_id is None:
+                raise StopAsyncIteration
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            item = {**mock_sheets[0].model_dump(mode="json", by_alias=True), "items": [[int(self.doc_id)]], "row_count": 2}
+            self.doc_id = None
+            return item
+
+    mock_cosmos.get_container_client().query_items.side_effect = lambda query, parameters, partition_key: _Window(
+        parameters[0]["value"]
+    )
+
+    score_docs = [
+        Document(**{**mock_docs[0].model_dump(), "id": str(i), "sheets": [{"id": str(i), "name": "score", "number": 1}]})
+        for i in range(10)
+    ]
+    scores = await _read_scores(subject_id="x", score_docs=score_docs, concurrency=3)
+
+    assert scores == list(range(10))
+    assert max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_get_latest_score(mock_cosmos, mock_docs, mock_sheets):
+    from src.service.score_handler import get_latest_score
+
+    mock_cosmos.get_container_client().query_items.side_effect = _query_items(
+        docs=[mock_docs[0].model_dump(mode="json", by_alias=True)],
+        sheet=mock_sheets[1].model_dump(mode="json", by_alias=True),
+    )
+
+    score = await get_latest_score(subject_id="x")
+    doc_query, sheet_query = [c.kwargs["query"] for c in mock_cosmos.get_container_client().query_items.call_args_list[-2:]]
+
+    assert score.period == mock_docs[0].period
+    assert score.score == 4.0
+    assert "TOP 1" in doc_query
+    assert "ARRAY_SLICE(ARRAY(SELECT VALUE ARRAY_SLICE(r, -1) FROM r IN c.items), -1)" in sheet_query
+
+
+@pytest.mark.asyncio
+async def test_get_latest_score__not_found(mock_cosmos):
+    from src.service.score_handler import get_latest_score
+
+    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator([])
+
+    with pytest.raises(HTTPException):
+        await get_latest_score(subject_id="x")
+
+
+@pytest.mark.asyncio
+async def test_trigger_score(mock_cosmos, mock_docs, mock_sheets):
+    from src.service import score_handler
+
+    docs = {doc.id: doc.model_dump(mode="json", by_alias=True) for doc in mock_docs}
+
+    async def _read_item(item, partition_key, **_):
+        return docs.get(item) or mock_sheets[0].model_dump(mode="json", by_alias=True)
+
+    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator(
+        [
+            {"id": doc["id"], "type_key": "001", "period": doc["period"], "version": 1, "sheets": doc["sheets"]}
+            for doc in reversed(docs.values())
+        ]
+    )
+    mock_cosmos.get_container_client().read_item.side_effect = _read_item
+
+    with unittest.mock.patch.object(score_handler, "http_handler") as mock_http_handler:
+        mock_http_handler.post_data = unittest.mock.AsyncMock(
+            return_value={**docs["1"], "sheets": [mock_sheets[0]]}
+        )
+        score = await score_handler.trigger_score(subject_id="x")
+
+    payload = mock_http_handler.post_data.call_args.kwargs["data"]
+    assert [doc["id"] for doc in payload] == ["3", "2", "1"]
+    assert all(len(doc["sheets"]) == 2 for doc in payload)
+    assert score.score == 8.0
+
+
+@pytest.mark.asyncio
+async def test_select_documents(mock_cosmos):
+    from src.service.score_handler import _select_documents
+
+    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator(
+        [
+            {"id": "a4", "type_key": "A", "period": "2024-12-31", "version": 1, "sheets": []},
+            {"id": "b4", "type_key": "B", "period": "2024-12-31", "version": 1, "sheets": []},
+            {"id": "a3-v1", "type_key": "A", "period": "2023-12-31", "version": 1, "sheets": []},
+            {"id": "a3-v2", "type_key": "A", "period": "2023-12-31", "version": 2, "sheets": []},
+            {"id": "a2", "type_key": "A", "period": "2022-12-31", "version": 1, "sheets": []},
+            {"id": "a1", "type_key": "A", "period": "2021-12-31", "version": 1, "sheets": []},
+            {"id": "b1", "type_key": "B", "period": "2021-12-31", "version": 1, "sheets": []},
+        ]
+    )
+
+    selected = [candidate["id"] async for candidate in _select_documents(subject_id="x")]
+
+    assert selected == ["a4", "b4", "a3-v2", "a2", "b1"]
+
+
+@pytest.mark.asyncio
+async def test_trigger_score__memoized(mock_cosmos, mock_docs, mock_sheets):
+    from src.service import score_handler
+
+    docs = {doc.id: doc.model_dump(mode="json", by_alias=True) for doc in mock_docs}
+
+    async def _read_item(item, partition_key, **_):
+        return docs.get(item) or {**mock_sheets[0].model_dump(mode="json", by_alias=True), "_etag": "etag"}
+
+    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator(
+        [
+            {"id": doc["id"], "type_key": "001", "period": doc["period"], "version": 1, "sheets": doc["sheets"]}
+            for doc in reversed(docs.values())
+        ]
+    )
+    mock_cosmos.get_container_client().read_item.side_effect = _read_item
+
+    with unittest.mock.patch.object(score_handler, "http_handler") as mock_http_handler:
+        mock_http_handler.post_data = unittest.mock.AsyncMock(
+            return_value={**docs["1"], "sheets": [mock_sheets[0]]}
+        )
+        first = await score_handler.trigger_score(subject_id="x")
+        second = await score_handler.trigger_score(subject_id="x")
+
+    assert first == second
+    mock_http_handler.post_data.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_trigger_score__single_flight(mock_score_summary):
+    from src.service import score_handler
+
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def _calculate_score(subject_id, correlation_id):
+        started.set()
+        await release.wait()
+        return mock_score_summary[0]
+
+    with unittest.mock.patch.object(score_handler, "_calculate_score", side_effect=_calculate_score) as mock_calculate:
+        callers = [asyncio.create_task(score_handler.trigger_score(subject_id="x")) for _ in range(3)]
+        await started.wait()
+        release.set()
+        results = await asyncio.gather(*callers)
+
+    assert results == [mock_score_summary[0]] * 3
+    mock_calculate.assert_called_once()
+    assert "x" not in score_handler._flights
+
+
+@pytest.mark.asyncio
+async def test_trigger_score__single_flight_charge(mock_score_summary):
+    from src.core import request_charge, retry
+    from src.service import score_handler
+
+    inherited = []
+    release = asyncio.Event()
+
+    async def _calculate_score(subject_id, correlation_id):
+        inherited.append((request_charge.current(), retry._budget.get()))
+        request_charge.current().add(5.0)
+        await release.wait()
+        return mock_score_summary[0]
+
+    async def _caller():
+        charge = request_charge.RequestCharge()
+        request_charge._charge.set(charge)
+        retry._budget.set(retry.RetryBudget())
+        await score_handler.trigger_score(subject_id="x")
+        return charge
+
+    with unittest.mock.patch.object(score_handler, "_calculate_score", side_effect=_calculate_score):
+        callers = [asyncio.create_task(_caller()) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        charges = await asyncio.gather(*callers)
+
+    (flight_charge, flight_budget), = inherited
+
+    assert flight_charge not in charges
+    assert flight_budget is None
+    assert [charge.total for charge in charges] == [5.0, 5.0]
+
+
+@pytest.mark.asyncio
+async def test_trigger_score__single_flight_cancellation(mock_score_summary):
+    from src.service import score_handler
+
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def _calculate_score(subject_id, correlation_id):
+        started.set()
+        await release.wait()
+        return mock_score_summary[0]
+
+    with unittest.mock.patch.object(score_handler, "_calculate_score", side_effect=_calculate_score):
+        first = asyncio.create_task(score_handler.trigger_score(subject_id="x"))
+        second = asyncio.create_task(score_handler.trigger_score(subject_id="x"))
+        await started.wait()
+
+        # the calculation survives the disconnect of the initiating caller
+        first.cancel()
+        await asyncio.sleep(0)
+        flight = score_handler._flights["x"]
+        assert not flight.task.cancelled()
+
+        # ... but is cancelled once nobody waits for it
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert flight.task.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_trigger_score__single_flight_after_cancellation(mock_score_summary):
+    from src.service import score_handler
+
+    started = asyncio.Event()
+
+    async def _calculate_score(subject_id, correlation_id):
+        started.set()
+        await asyncio.sleep(0.01)
+        return mock_score_summary[0]
+
+    with unittest.mock.patch.object(score_handler, "_calculate_score", side_effect=_calculate_score) as mock_calculate:
+        first = asyncio.create_task(score_handler.trigger_score(subject_id="x"))
+        await started.wait()
+        first.cancel()
+        await asyncio.sleep(0)
+
+        # a caller arriving before the cancelled calculation has finished starts a new one
+        assert await score_handler.trigger_score(subject_id="x") == mock_score_summary[0]
+        await asyncio.gather(first, return_exceptions=True)
+
+    assert mock_calculate.call_count == 2
+    assert "x" not in score_handler._flights
@@ -0,0 +1,162 @@
+import pytest
+import unittest.mock
+
+import azure.cosmos.exceptions
+
+from src.core.exception import HTTPException
+from ..conftest import _AsyncIterator
+
+
+@pytest.fixture(autouse=True)
+def reset_read_item(mock_cosmos):
+    mock_cosmos.get_container_client().read_item.reset_mock()
+    yield
+    mock_cosmos.get_container_client().read_item.side_effect = None
+
+
+@pytest.mark.asyncio
+async def test_get_subject(mock_cosmos, mock_subject):
+    from src.service.subject_handler import get_subject
+
+    mock_cosmos.get_container_client().read_item.return_value = {
+        **mock_subject[0].model_dump(mode="json"), "_etag": "etag",
+    }
+
+    assert await get_subject(subject_id="1") == mock_subject[0]
+    assert await get_subject(subject_id="1") == mock_subject[0]
+    assert mock_cosmos.get_container_client().read_item.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_subject__revalidation(mock_cosmos, mock_subject):
+    from src.service.subject_handler import get_subject, _subject_cache
+
+    mock_cosmos.get_container_client().read_item.return_value = {}
+    _subject_cache.set("1", ("etag", mock_subject[0]))
+
+    with unittest.mock.patch.object(_subject_cache, "get", return_value=None):
+        assert await get_subject(subject_id="1") == mock_subject[0]
+
+    assert mock_cosmos.get_container_client().read_item.call_args.kwargs["etag"] == "etag"
+
+
+@pytest.mark.asyncio
+async def test_get_subject__not_found(mock_cosmos):
+    from src.service.subject_handler import get_subject
+
+    mock_cosmos.get_container_client().read_item.side_effect = azure.cosmos.exceptions.CosmosHttpResponseError(
+        status_code=404,
+    )
+
+    with pytest.raises(HTTPException):
+        await get_subject(subject_id="1")
+
+
+@pytest.mark.asyncio
+async def test_delete_subject__invalidates_cache(mock_cosmos, mock_subject):
+    from src.service.subject_handler import delete_subject, _subject_cache
+
+    _subject_cache.set("1", ("etag", mock_subject[0]))
+    await delete_subject(subject_id="1")
+
+    assert _subject_cache.peek("1") is None
+
+
+@pytest.mark.asyncio
+async def test_delete_subject__recreated_same_second(mock_cosmos, mock_subject):
+    from src.service.subject_handler import create_subject, delete_subject, _subject_cache, _subject_index
+
+    item = mock_subject[0].model_dump(mode="json")
+    _subject_index.upsert(mock_subject[0], timestamp=100, etag="a")
+    _subject_cache.set(item["id"], ("a", mock_subject[0]))
+
+    with unittest.mock.patch.object(
+        mock_cosmos.get_container_client(), "create_item", return_value={**item, "_ts": 100, "_etag": "b"}
+    ):
+        await delete_subject(subject_id=item["id"])
+        # the change feed delivers the deleted version late
+        _subject_index.upsert(mock_subject[0], timestamp=100, etag="a")
+        await create_subject(mock_subject[0])
+
+    try:
+        assert _subject_index._etags[item["id"]] == "b"
+    finally:
+        _subject_index.clear()
+
+
+@pytest.mark.asyncio
+async def test_update_subject__read_in_flight(mock_cosmos, mock_subject):
+    import asyncio
+    from src.service.subject_handler import get_subject, update_subject, _subject_cache
+
+    read, write = asyncio.Event(), asyncio.Event()
+
+    async def _read_item(**kwargs):
+        read.set()
+        await write.wait()
+        return {**mock_subject[0].model_dump(mode="json"), "_etag": "old"}
+
+    mock_cosmos.get_container_client().read_item.side_effect = _read_item
+    with unittest.mock.patch.object(
+        mock_cosmos.get_container_client(),
+        "patch_item",
+        unittest.mock.AsyncMock(return_value={**mock_subject[0].model_dump(mode="json"), "name": "renamed", "_etag": "new"}),
+    ):
+        reading = asyncio.create_task(get_subject(subject_id="1"))
+        await read.wait()
+        await update_subject(subject_id="1", name="renamed")
+        write.set()
+        await reading
+
+    assert _subject_cache.peek("1")[0] == "new"
+    assert _subject_cache.peek("1")[1].name == "renamed"
+
+
+class _Pages:
+    def __init__(self, pages, continuation_tokens):
+        self._pages = iter(pages)
+        self._continuation_tokens = iter(continuation_tokens)
+        self.continuation_token = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            page = next(self._pages)
+        except StopIteration:
+            raise StopAsyncIteration
+        self.continuation_token = next(self._continuation_tokens)
+        return _AsyncIterator(page)
+
+
+@pytest.mark.asyncio
+async def test_search_subject_page(mock_cosmos, mock_subject):
+    from src.service.subject_handler import search_subject_page
+
+    pages = _Pages([[], [mock_subject[0].model_dump(mode="json")], [mock_subject[1].model_dump(mode="json")]], ["a", "b", None])
+    with unittest.mock.patch.object(mock_cosmos.get_container_client(), "query_items") as mock_query_items:
+        mock_query_items.return_value.by_page.return_value = pages
+        subjects, continuation_token = await search_subject_page(name="name", limit=1, cursor="cursor")
+
+    assert subjects == [mock_subject[0]]
+    assert continuation_token == "b"
+    mock_query_items.return_value.by_page.assert_called_once_with(continuation_token="cursor")
+    assert mock_query_items.call_args.kwargs["max_item_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_on_changes(mock_subject):
+    from src.service.subject_handler import _on_changes, _subject_cache
+
+    _subject_cache.set("1", ("etag", mock_subject[0]))
+    _on_changes(
+        [
+            {**mock_subject[0].model_dump(mode="json"), "name": "renamed", "_etag": "new"},
+            {**mock_subject[1].model_dump(mode="json"), "_etag": "new"},
+        ]
+    )
+
+    assert _subject_cache.peek("1")[0] == "new"
+    assert _subject_cache.peek("1")[1].name == "renamed"
+    assert _subject_cache.peek("2") is None
@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+
+from ..conftest import _AsyncIterator
+
+
+@pytest.fixture
+def subject_index(mock_subject):
+    from src.service.subject_index_handler import SubjectIndex
+
+    index = SubjectIndex()
+    for subject in mock_subject:
+        index.upsert(subject)
+    index.ready = True
+
+    return index
+
+
+@pytest.mark.asyncio
+async def test_search__all(subject_index, mock_subject):
+    assert subject_index.search() == [mock_subject[0]]
+    assert subject_index.search(include_not_active=True) == mock_subject
+
+
+@pytest.mark.asyncio
+async def test_search__substring(subject_index, mock_subject):
+    assert subject_index.search(name="NAME_2", include_not_active=True) == [mock_subject[1]]
+    assert subject_index.search(name="ject_n", include_not_active=True) == mock_subject
+    assert subject_index.search(name="_1") == [mock_subject[0]]
+    assert subject_index.search(name="unknown") == []
+
+
+@pytest.mark.asyncio
+async def test_search__prefix(subject_index, mock_subject):
+    assert subject_index.search(ic="^2", include_not_active=True) == [mock_subject[1]]
+    assert subject_index.search(name="^name") == []
+
+
+@pytest.mark.asyncio
+async def test_search__unsupported_pattern(subject_index):
+    assert subject_index.search(name="subject_name_[12]") is None
+
+
+@pytest.mark.asyncio
+async def test_search__not_ready(subject_index):
+    subject_index.ready = False
+
+    assert subject_index.search() is None
+
+
+@pytest.mark.asyncio
+async def test_upsert__replaces(subject_index, mock_subject):
+    subject_index.upsert(mock_subject[0].model_copy(update={"name": "renamed"}))
+
+    assert subject_index.search(name="subject_name") == []
+    assert [subject.name for subject in subject_index.search(name="renamed")] == ["renamed"]
+
+
+@pytest.mark.asyncio
+async def test_remove(subject_index, mock_subject):
+    subject_index.remove(mock_subject[0].id)
+    subject_index.remove("unknown")
+
+    assert subject_index.search(include_not_active=True) == [mock_subject[1]]
+
+
+@pytest.mark.asyncio
+async def test_upsert__older_ignored(subject_index, mock_subject):
+    subject_index.upsert(mock_subject[0], timestamp=2)
+    subject_index.upsert(mock_subject[0].model_copy(update={"name": "renamed"}), timestamp=1)
+
+    assert subject_index.search(name="renamed") == []
+
+
+@pytest.mark.asyncio
+async def test_remove__older_ignored(subject_index, mock_subject):
+    subject_index.upsert(mock_subject[0], timestamp=2, etag="a")
+    subject_index.remove(mock_subject[0].id)
+    subject_index.upsert(mock_subject[0], timestamp=2, etag="a")
+    subject_index.upsert(mock_subject[0], timestamp=1, etag="old")
+
+    assert subject_index.search(include_not_active=True) == [mock_subject[1]]
+
+    subject_index.upsert(mock_subject[0], timestamp=3, etag="b")
+
+    assert subject_index.search(include_not_active=True) == mock_subject
+
+
+@pytest.mark.asyncio
+async def test_remove__recreated_same_second(subject_index, mock_subject):
+    subject_index.upsert(mock_subject[0], timestamp=2, etag="a")
+    subject_index.remove(mock_subject[0].id)
+    subject_index.upsert(mock_subject[0], timestamp=2, etag="b")
+
+    assert subject_index.search(include_not_active=True) == mock_subject
+
+
+@pytest.mark.asyncio
+async def test_rebuild(subject_index, mock_subject):
+    rebuilt = subject_index.rebuild()
+    rebuilt.upsert(mock_subject[0], timestamp=1)
+    rebuilt.upsert(mock_subject[1], timestamp=1)
+
+    # changes during the rebuild are applied to both indexes
+    subject_index.remove(mock_subject[1].id, etag="etag")
+    subject_index.upsert(mock_subject[0].model_copy(update={"name": "renamed"}), timestamp=2)
+
+    assert len(subject_index) == 1
+
+    subject_index.finish_rebuild()
+
+    assert [subject.name for subject in subject_index.search(include_not_active=True)] == ["renamed"]
+
+
+@pytest.mark.asyncio
+async def test_rebuild__drops_deleted(subject_index, mock_subject):
+    subject_index.rebuild().upsert(mock_subject[1], timestamp=1)
+    subject_index.finish_rebuild()
+
+    assert subject_index.search(include_not_active=True) == [mock_subject[1]]
+
+
+@pytest.mark.asyncio
+async def test_rebuild__failed(subject_index, mock_subject):
+    subject_index.rebuild()
+    subject_index.finish_rebuild(ok=False)
+
+    assert subject_index.search(include_not_active=True) == mock_subject
+
+
+@pytest.mark.asyncio
+async def test_start(mock_cosmos, mock_subject):
+    from src.service import subject_index_handler
+
+    mock_cosmos.get_container_client().query_items.return_value = _AsyncIterator(
+        [subject.model_dump(mode="json") for subject in mock_subject]
+    )
+
+    await subject_index_handler.start()
+    await asyncio.sleep(0)
+
+    assert subject_index_handler.index.ready
+    assert len(subject_index_handler.index) == len(mock_subject)
+
+    await subject_index_handler.stop()
+
+    assert not subject_index_handler.index.ready
+
+
+@pytest.mark.asyncio
+async def test_on_changes(mock_subject):
+    from src.service import subject_index_handler
+
+    subject_index_handler._on_changes([{**mock_subject[0].model_dump(mode="json"), "_ts": 1}])
+
+    assert len(subject_index_handler.index) == 1
+    subject_index_handler.index.clear()